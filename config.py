@@ -10,6 +10,10 @@ class Config:
     # Interview specific configs
     MAX_FOUNDATIONAL_QUESTIONS = 3
     JOB_ROLE = "Software Engineer" # Default job role for LLM prompts
+    SINGLE_CALL_TURNS = os.getenv("INTERVIEW_SINGLE_CALL", "0") == "1" # Feedback and next question from one LLM call
+
+    # Coding challenge configs
+    MAX_CUSTOM_STDIN_BYTES = 1024 * 1024 # Largest custom input accepted by /run_code
 
     # Ensure necessary folders exist
     os.makedirs(UPLOAD_FOLDER, exist_ok=True)
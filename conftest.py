@@ -197,9 +197,10 @@ def mock_document_chunks():
 @pytest.fixture(autouse=True)
 def reset_services():
     """Reset service layer state before each test"""
-    from services import document_processor, llm_chains
+    from services import document_processor, llm_chains, judge
     document_processor._db = None
     document_processor._embeddings = None
+    judge._verdict_cache.clear()
     yield
     # Cleanup after test
     document_processor._db = None
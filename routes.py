@@ -91,6 +91,7 @@ def upload_documents():
             print(f"Missing Keywords: {missing_keywords}")
 
             # --- Initialize Interview State ---
+            session.pop('pending_turn', None) # Drop a streamed turn of a previous interview
             session['current_stage'] = 'FOUNDATIONAL_WARMUP' # Start with warm-up
             session['stage_question_count'] = 0
             session['max_foundational_questions'] = Config.MAX_FOUNDATIONAL_QUESTIONS
@@ -122,6 +123,7 @@ def upload_documents():
 
 @main_bp.route('/start_interview')
 def start_interview():
+    interview_manager.apply_pending_turn()
     current_interview_history = session.get('interview_history', [])
     
     if document_processor.get_vector_store() is None or not current_interview_history:
@@ -138,6 +140,7 @@ def start_interview():
 def interview_flow():
     global global_jd_text, global_resume_content
 
+    interview_manager.apply_pending_turn()
     interview_history = session.get('interview_history', [])
     if not interview_history:
         flash("Interview session lost. Please upload documents again.", "danger")
@@ -155,22 +158,30 @@ def interview_flow():
     if interview_history and interview_history[-1]["answer"] is None:
         interview_history[-1]["answer"] = user_answer
     
-    formatted_chat_history = ""
-    for entry in interview_history:
-        if entry["question"]:
-            formatted_chat_history += f"Interviewer: {entry['question']}\n"
-        if entry["answer"]:
-            formatted_chat_history += f"Candidate: {entry['answer']}\n"
+    formatted_chat_history = _format_chat_history(interview_history)
 
-    # --- Analyze the user's answer and get feedback/action ---
+    # --- Analyze the user's answer and get feedback/action (and the next question, in single-call mode) ---
     last_question = interview_history[-1]["question"]
-    feedback, next_action_type = interview_manager.analyze_and_feedback_answer(
-        last_question,
-        user_answer,
-        global_jd_text,
-        global_resume_content,
-        formatted_chat_history
-    )
+    turn = None
+    if Config.SINGLE_CALL_TURNS:
+        turn = interview_manager.single_call_turn(
+            last_question,
+            user_answer,
+            global_jd_text,
+            global_resume_content,
+            formatted_chat_history
+        )
+    if turn is not None:
+        feedback, next_action_type, next_question = turn
+    else:
+        feedback, next_action_type = interview_manager.analyze_and_feedback_answer(
+            last_question,
+            user_answer,
+            global_jd_text,
+            global_resume_content,
+            formatted_chat_history
+        )
+        next_question = None
     
     interview_history[-1]["feedback"] = feedback
     session['interview_history'] = interview_history
@@ -186,12 +197,13 @@ def interview_flow():
     interview_manager.update_interview_stage(next_action_type)
 
     # Get the next question based on analysis and current stage
-    next_question, _ = interview_manager.get_next_question(
-        next_action_type,
-        global_jd_text,
-        global_resume_content,
-        formatted_chat_history
-    )
+    if next_question is None:
+        next_question, _ = interview_manager.get_next_question(
+            next_action_type,
+            global_jd_text,
+            global_resume_content,
+            formatted_chat_history
+        )
     
     # Add the new question to history
     interview_history.append({"question": next_question, "answer": None, "feedback": None})
@@ -200,9 +212,123 @@ def interview_flow():
     return redirect(url_for('main.start_interview'))
 
 
+@main_bp.route('/interview_flow/stream', methods=['POST'])
+def interview_flow_stream():
+    """
+    The /interview_flow turn as server-sent events: 'feedback' events and then
+    'question' events carry the text as the model writes it, and 'done' gives
+    the page to load next ('reset' clears the text when an unparsable
+    single-call reply is replaced by the two-call path). The page falls back
+    to posting /interview_flow if this fails. The turn reaches the session on
+    the next request (see interview_manager.apply_pending_turn).
+    """
+    from flask import Response, stream_with_context
+    import json as json_module
+
+    interview_manager.apply_pending_turn()
+    interview_history = session.get('interview_history', [])
+    if not interview_history or document_processor.get_vector_store() is None:
+        return json_module.dumps({'error': 'Interview session not ready'}), 409
+
+    user_answer = request.form.get('user_answer')
+    if not user_answer:
+        return json_module.dumps({'error': 'Please provide an answer to continue.'}), 400
+
+    turn_id = interview_manager.begin_turn()
+    jd_text, resume_content = global_jd_text, global_resume_content
+    next_page = url_for('main.start_interview')
+    end_page = url_for('main.end_interview')
+
+    def event(name, data):
+        return f"event: {name}\ndata: {json_module.dumps(data)}\n\n"
+
+    def relay(name, pieces):
+        # Send each piece the generator yields, and return what it returns.
+        # With name=None the pieces are (event name, text) pairs.
+        while True:
+            try:
+                piece = next(pieces)
+            except StopIteration as stop:
+                return stop.value
+            if name is None:
+                yield event(piece[0], {'text': piece[1]})
+            else:
+                yield event(name, {'text': piece})
+
+    def generate():
+        if interview_history[-1]["answer"] is None:
+            interview_history[-1]["answer"] = user_answer
+        session['interview_history'] = interview_history
+        formatted_chat_history = _format_chat_history(interview_history)
+
+        try:
+            turn = None
+            if Config.SINGLE_CALL_TURNS:
+                turn = yield from relay(None, interview_manager.stream_single_call_turn(
+                    interview_history[-1]["question"],
+                    user_answer,
+                    jd_text,
+                    resume_content,
+                    formatted_chat_history
+                ))
+                if turn is None:
+                    yield event('reset', {}) # The two-call path streams the turn again
+            if turn is not None:
+                feedback, next_action_type, next_question = turn
+            else:
+                feedback, next_action_type = yield from relay('feedback', interview_manager.stream_answer_analysis(
+                    interview_history[-1]["question"],
+                    user_answer,
+                    jd_text,
+                    resume_content,
+                    formatted_chat_history
+                ))
+                next_question = None
+            interview_history[-1]["feedback"] = feedback
+            print(f"\n--- Answer Analysis ---\nFeedback: {feedback}\nNext Action: {next_action_type}")
+
+            if next_action_type == "END_INTERVIEW":
+                interview_manager.save_turn(turn_id, [(f"Interview Concluded: {feedback}", "info")])
+                yield event('done', {'action': next_action_type, 'redirect': end_page})
+                return
+
+            interview_manager.update_interview_stage(next_action_type)
+            if next_question is None:
+                next_question, _ = yield from relay('question', interview_manager.stream_next_question(
+                    next_action_type,
+                    jd_text,
+                    resume_content,
+                    formatted_chat_history
+                ))
+        except Exception as e:
+            print(f"Error streaming interview turn: {e}")
+            yield event('error', {'error': str(e)})
+            return
+
+        interview_history.append({"question": next_question, "answer": None, "feedback": None})
+        session['interview_history'] = interview_history
+        interview_manager.save_turn(turn_id)
+        yield event('done', {'action': next_action_type, 'redirect': next_page})
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def _format_chat_history(interview_history):
+    """The interview so far as 'Interviewer:' and 'Candidate:' lines for the prompts"""
+    formatted_chat_history = ""
+    for entry in interview_history:
+        if entry["question"]:
+            formatted_chat_history += f"Interviewer: {entry['question']}\n"
+        if entry["answer"]:
+            formatted_chat_history += f"Candidate: {entry['answer']}\n"
+    return formatted_chat_history
+
+
 @main_bp.route('/end_interview')
 def end_interview():
     """Clears the interview session and redirects to the upload page."""
+    interview_manager.apply_pending_turn()
     session.pop('interview_history', None)
     session.pop('ats_results', None)
     session.pop('current_stage', None)
@@ -222,7 +348,7 @@ def end_interview():
 @main_bp.route('/coding_challenge')
 def coding_challenge():
     """Display coding challenge page"""
-    from services import problems
+    from services import problems, languages
     
     # Get problem from session or select a random one
     problem_id = session.get('current_problem_id')
@@ -237,23 +363,30 @@ def coding_challenge():
         flash("Problem not found", "danger")
         return redirect(url_for('main.start_interview'))
     
-    return render_template('coding_challenge.html', problem=problem)
+    return render_template('coding_challenge.html', problem=problem,
+                           languages=languages.list_runtimes(available_only=True))
 
 
 @main_bp.route('/run_code', methods=['POST'])
 def run_code():
-    """Run code with sample test cases"""
+    """Run code once, on the first sample test case or on custom stdin"""
     from services.code_executor import CodeExecutor, CodeExecutionError
-    from services import problems
+    from services import problems, judge
     import json as json_module
     
     data = request.get_json()
     code = data.get('code')
     language = data.get('language')
     problem_id = data.get('problem_id')
+    custom_stdin = data.get('stdin')
     
     if not code or not language:
         return json_module.dumps({'error': 'Missing code or language'}), 400
+    if custom_stdin is not None and (not isinstance(custom_stdin, str)
+                                     or len(custom_stdin.encode('utf-8')) > Config.MAX_CUSTOM_STDIN_BYTES):
+        return json_module.dumps({
+            'error': f'Custom input must be text of at most {Config.MAX_CUSTOM_STDIN_BYTES // 1024} KB'
+        }), 400
     
     executor = CodeExecutor()
     
@@ -263,20 +396,37 @@ def run_code():
         if not problem:
             return json_module.dumps({'error': 'Problem not found'}), 404
         
-        # Run with first example test case
-        test_case = problem['test_cases'][0]
-        stdin_data = '\n'.join(test_case['input'])
+        if custom_stdin is not None:
+            stdin_data, expected_output = custom_stdin, None
+        else:
+            # Run with first example test case
+            test_case = problem['test_cases'][0]
+            stdin_data, expected_output = '\n'.join(test_case['input']), test_case['expected_output']
         
-        result = executor.execute(code, language, stdin_data)
+        # Quick build: compiled without optimizations (unless an optimized
+        # build of this code is cached), since Run is about feedback latency
+        result = executor.execute(code, language, stdin_data, quick_build=True)
         
-        return json_module.dumps({
+        response = {
             'output': result['output'],
             'error': result.get('error'),
-            'test_input': stdin_data
-        })
+            'test_input': stdin_data,
+            'custom_input': custom_stdin is not None,
+            'runtime': result.get('time'),
+            'memory': result.get('memory')
+        }
+        if expected_output is not None:
+            response['expected_output'] = expected_output
+            response['passed'] = judge.outputs_match(result['output'], expected_output)
+        return json_module.dumps(response)
         
     except CodeExecutionError as e:
-        return json_module.dumps({'error': str(e)})
+        return json_module.dumps({
+            'error': str(e),
+            'verdict': e.verdict,
+            'runtime': e.usage.get('time'),
+            'memory': e.usage.get('memory')
+        })
     except Exception as e:
         return json_module.dumps({'error': f'Unexpected error: {str(e)}'})
     finally:
@@ -286,8 +436,7 @@ def run_code():
 @main_bp.route('/submit_code', methods=['POST'])
 def submit_code():
     """Submit code and run all test cases"""
-    from services.code_executor import CodeExecutor, CodeExecutionError
-    from services import problems
+    from services import problems, judge
     import json as json_module
     
     data = request.get_json()
@@ -299,50 +448,16 @@ def submit_code():
     if not code or not language:
         return json_module.dumps({'error': 'Missing code or language'}), 400
     
-    executor = CodeExecutor()
-    
     try:
         # Get problem
         problem = problems.get_problem(problem_id)
         if not problem:
             return json_module.dumps({'error': 'Problem not found'}), 404
         
-        # Run all test cases
-        test_results = []
-        all_passed = True
-        
-        for test_case in problem['test_cases']:
-            stdin_data = '\n'.join(test_case['input'])
-            expected = test_case['expected_output'].strip()
-            
-            try:
-                result = executor.execute(code, language, stdin_data)
-                actual = result['output'].strip()
-                
-                # Normalize output for comparison
-                actual_normalized = actual.replace(' ', '').replace('\n', '')
-                expected_normalized = expected.replace(' ', '').replace('\n', '')
-                
-                passed = actual_normalized == expected_normalized
-                
-                test_results.append({
-                    'input': stdin_data,
-                    'expected': expected,
-                    'actual': actual,
-                    'passed': passed
-                })
-                
-                if not passed:
-                    all_passed = False
-                    
-            except CodeExecutionError as e:
-                test_results.append({
-                    'input': stdin_data,
-                    'expected': expected,
-                    'actual': f'Error: {str(e)}',
-                    'passed': False
-                })
-                all_passed = False
+        # Run all test cases, building the program only once
+        submission = judge.judge_submission(
+            code, language, problem, fail_fast=bool(data.get('fail_fast'))
+        )
         
         # Store submission in session
         if 'code_submissions' not in session:
@@ -351,23 +466,304 @@ def submit_code():
         session['code_submissions'].append({
             'problem_id': problem_id,
             'language': language,
-            'passed': all_passed,
+            'passed': submission['all_passed'],
             'time_taken': time_taken
         })
         
-        return json_module.dumps({
-            'test_results': test_results,
-            'all_passed': all_passed,
-            'total_tests': len(test_results),
-            'passed_tests': sum(1 for t in test_results if t['passed'])
-        })
+        return json_module.dumps(submission)
         
-    except CodeExecutionError as e:
-        return json_module.dumps({'error': str(e)})
     except Exception as e:
         return json_module.dumps({'error': f'Unexpected error: {str(e)}'})
-    finally:
-        executor.cleanup()
+
+
+@main_bp.route('/submit_code_stream', methods=['POST'])
+def submit_code_stream():
+    """Queue a submission and stream each test case's result as NDJSON as soon as it finishes"""
+    from services import problems, judge_queue
+    from flask import Response
+    import json as json_module
+    import time
+
+    data = request.get_json()
+    code = data.get('code')
+    language = data.get('language')
+    problem_id = data.get('problem_id')
+
+    if not code or not language:
+        return json_module.dumps({'error': 'Missing code or language'}), 400
+
+    problem = problems.get_problem(problem_id)
+    if not problem:
+        return json_module.dumps({'error': 'Problem not found'}), 404
+
+    # Judged by the queue's workers, under the same concurrency limit and
+    # backpressure as /submit_code_async
+    queue = judge_queue.get_judge_queue()
+    try:
+        job_id = queue.submit(code, language, problem_id, fail_fast=bool(data.get('fail_fast')))
+    except judge_queue.QueueFullError as e:
+        return json_module.dumps({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    # The session cookie goes out with the response headers, before the
+    # verdict is known; record_finished_jobs adds it on the next request
+    _add_pending_job(job_id, problem_id, language, data.get('time_taken', 0))
+    status_url = url_for('main.judge_job_status', job_id=job_id)
+
+    def generate():
+        yield json_module.dumps({'type': 'start', 'total_tests': len(problem['test_cases'])}) + '\n'
+        sent_cases = set()
+        deadline = time.time() + queue.STREAM_TIMEOUT
+        while True:
+            job = queue.get(job_id)
+            if job is None:
+                yield json_module.dumps({'type': 'error', 'error': 'Job not found'}) + '\n'
+                return
+            for index, case in job['cases'].items():
+                if index not in sent_cases:
+                    sent_cases.add(index)
+                    yield json_module.dumps({'type': 'case', 'index': index, 'case': case}) + '\n'
+            if job['status'] == 'done':
+                yield json_module.dumps({'type': 'summary', **job['result']}) + '\n'
+                return
+            if job['status'] == 'error':
+                yield json_module.dumps({'type': 'error', 'error': f"Unexpected error: {job['error']}"}) + '\n'
+                return
+            if time.time() >= deadline:
+                # A job still queued behind others; the page polls instead of
+                # holding this web worker
+                yield json_module.dumps({'type': 'timeout', 'status_url': status_url}) + '\n'
+                return
+            time.sleep(queue.POLL_INTERVAL)
+
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main_bp.route('/submit_code_async', methods=['POST'])
+def submit_code_async():
+    """Queue a submission for judging and return its job ID right away"""
+    from services import problems, judge_queue
+    import json as json_module
+
+    data = request.get_json()
+    code = data.get('code')
+    language = data.get('language')
+    problem_id = data.get('problem_id')
+
+    if not code or not language:
+        return json_module.dumps({'error': 'Missing code or language'}), 400
+
+    if not problems.get_problem(problem_id):
+        return json_module.dumps({'error': 'Problem not found'}), 404
+
+    queue = judge_queue.get_judge_queue()
+    try:
+        job_id = queue.submit(code, language, problem_id, fail_fast=bool(data.get('fail_fast')))
+    except judge_queue.QueueFullError as e:
+        return json_module.dumps({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    # Recorded in code_submissions once the job finishes
+    _add_pending_job(job_id, problem_id, language, data.get('time_taken', 0))
+
+    return json_module.dumps({
+        'job_id': job_id,
+        'status_url': url_for('main.judge_job_status', job_id=job_id),
+        'events_url': url_for('main.judge_job_events', job_id=job_id)
+    }), 202
+
+
+# --- Queued Submission Verdicts ---
+# Queued submissions wait in the session's pending_jobs until they finish.
+# Their results are read back from the queue's database, which every web
+# process shares, so any worker can record them.
+MAX_SESSION_PENDING_JOBS = 20
+
+
+def _add_pending_job(job_id, problem_id, language, time_taken):
+    """Remember a queued submission until its verdict can be recorded"""
+    pending = session.get('pending_jobs', {})
+    pending[job_id] = {'problem_id': problem_id, 'language': language, 'time_taken': time_taken}
+    # Keep the cookie small if results are never collected
+    session['pending_jobs'] = dict(list(pending.items())[-MAX_SESSION_PENDING_JOBS:])
+
+
+@main_bp.before_request
+def record_finished_jobs():
+    """Record the verdicts of queued submissions that finished since the last request"""
+    if not session.get('pending_jobs'):
+        return
+    from services import judge_queue
+
+    queue = judge_queue.get_judge_queue()
+    for job_id in list(session['pending_jobs']):
+        try:
+            job = queue.get(job_id)
+        except Exception as e:
+            # Tried again on the next request
+            print(f"Could not read judge job {job_id}: {e}")
+            return
+        if job is None:
+            # Pruned after the retention period
+            pending = session['pending_jobs']
+            pending.pop(job_id, None)
+            session['pending_jobs'] = pending
+        elif job['status'] in ('done', 'error'):
+            _record_finished_job(job)
+
+
+def _record_finished_job(job):
+    """Add a finished async submission to the session's code_submissions"""
+    pending = session.get('pending_jobs', {})
+    info = pending.pop(job['id'], None)
+    session['pending_jobs'] = pending
+    if info is None or job['status'] != 'done':
+        return
+    submissions = session.get('code_submissions', [])
+    submissions.append({
+        'problem_id': info['problem_id'],
+        'language': info['language'],
+        'passed': job['result']['all_passed'],
+        'time_taken': info['time_taken']
+    })
+    session['code_submissions'] = submissions
+
+
+@main_bp.route('/judge/jobs/<job_id>')
+def judge_job_status(job_id):
+    """Poll a queued submission: status, finished cases and final result"""
+    from services import judge_queue
+    import json as json_module
+
+    job = judge_queue.get_judge_queue().get(job_id)
+    if job is None:
+        return json_module.dumps({'error': 'Job not found'}), 404
+
+    if job['status'] in ('done', 'error'):
+        _record_finished_job(job)
+
+    return json_module.dumps(job)
+
+
+@main_bp.route('/judge/jobs/<job_id>/events')
+def judge_job_events(job_id):
+    """Stream a queued submission's progress as server-sent events"""
+    from services import judge_queue
+    from flask import Response
+    import json as json_module
+    import time
+
+    queue = judge_queue.get_judge_queue()
+    if queue.get(job_id) is None:
+        return json_module.dumps({'error': 'Job not found'}), 404
+
+    # A reconnecting EventSource sends the id of the last event it got: a
+    # bitmask of the cases it has, which are not sent again
+    last_event_id = request.headers.get('Last-Event-ID', '0')
+    try:
+        sent_mask = int(last_event_id, 16) if len(last_event_id) <= 256 else 0
+    except ValueError:
+        sent_mask = 0
+
+    def generate():
+        sent_cases = {index for index in range(sent_mask.bit_length()) if sent_mask >> index & 1}
+        last_status = None
+        deadline = time.time() + queue.STREAM_TIMEOUT
+        yield f"retry: {queue.STREAM_RETRY_MS}\n\n"
+        while True:
+            job = queue.get(job_id)
+            if job is None:
+                # Pruned after the retention period
+                yield f"event: error\ndata: {json_module.dumps({'error': 'Job not found'})}\n\n"
+                return
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield f"event: status\ndata: {json_module.dumps({'status': last_status, 'queue_position': job['queue_position']})}\n\n"
+            for index, case in job['cases'].items():
+                if index not in sent_cases:
+                    sent_cases.add(index)
+                    mask = sum(1 << sent for sent in sent_cases)
+                    yield f"id: {mask:x}\nevent: case\ndata: {json_module.dumps({'index': index, 'case': case})}\n\n"
+            if job['status'] in ('done', 'error'):
+                yield f"event: {job['status']}\ndata: {json_module.dumps(job['result'] or {'error': job['error']})}\n\n"
+                return
+            if time.time() >= deadline:
+                # The job may still finish; the client reconnects or polls /judge/jobs/<job_id>
+                yield f"event: timeout\ndata: {json_module.dumps({'status': job['status']})}\n\n"
+                return
+            time.sleep(queue.POLL_INTERVAL)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@main_bp.route('/judge/stats')
+def judge_stats():
+    """Queue depth, job counts, compile cache hit rate (and execution workers, if any), for monitoring"""
+    from services import judge_queue
+    from services.compile_cache import get_compile_cache
+    from services.remote_executor import get_remote_executors
+    import json as json_module
+
+    stats = judge_queue.get_judge_queue().stats()
+    stats['compile_cache'] = get_compile_cache().stats()
+    remote = get_remote_executors()
+    if remote is not None:
+        stats['execution_workers'] = remote.stats()
+    return json_module.dumps(stats)
+
+
+@main_bp.route('/llm/cache_stats')
+def llm_cache_stats():
+    """Entries, hits, misses and hit rate of the LLM response and semantic caches"""
+    from services import llm_cache, semantic_cache
+    import json as json_module
+
+    stats = {}
+    for name, cache in (('response_cache', llm_cache.get_llm_cache()),
+                        ('semantic_cache', semantic_cache.get_semantic_cache())):
+        stats[name] = cache.stats() if cache is not None else None
+    return json_module.dumps(stats)
+
+
+@main_bp.route('/metrics')
+def metrics():
+    """Execution phase histograms and submission counts in Prometheus text format"""
+    from services.metrics import get_metrics
+
+    return get_metrics().render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+
+@main_bp.route('/analyze_complexity', methods=['POST'])
+def analyze_complexity():
+    """Queue a complexity analysis (timing on scaled inputs) and return its job ID"""
+    from services import problems, judge_queue
+    import json as json_module
+
+    data = request.get_json()
+    code = data.get('code')
+    language = data.get('language')
+    problem_id = data.get('problem_id')
+
+    if not code or not language:
+        return json_module.dumps({'error': 'Missing code or language'}), 400
+
+    problem = problems.get_problem(problem_id)
+    if not problem:
+        return json_module.dumps({'error': 'Problem not found'}), 404
+    if not problem.get('perf'):
+        return json_module.dumps({'error': 'No performance profile for this problem'}), 404
+
+    # Runs for seconds on inputs of up to a million elements, so it goes
+    # through the judge workers rather than this request thread
+    try:
+        job_id = judge_queue.get_judge_queue().submit(code, language, problem_id, kind='complexity')
+    except judge_queue.QueueFullError as e:
+        return json_module.dumps({'error': str(e)}), 503, {'Retry-After': '5'}
+
+    return json_module.dumps({
+        'job_id': job_id,
+        'status_url': url_for('main.judge_job_status', job_id=job_id)
+    }), 202
 
 
 @main_bp.route('/change_problem/<int:problem_id>')
@@ -0,0 +1,284 @@
+"""
+Streaming comparison of program output against the expected output.
+
+Output is checked chunk by chunk as the program writes it, reading the
+expected output (a file or an in-memory string) at the same pace, so
+neither has to be held in memory and a run can be stopped at the first
+mismatch. Problems choose how output is compared:
+
+- exact: identical bytes, apart from trailing whitespace at the end
+- whitespace: identical once all whitespace is removed (the default,
+  as in judge.outputs_match)
+- unordered_lines: the same lines in any order (blank lines ignored)
+- float: the same whitespace-separated tokens, with numbers compared
+  within an absolute or relative tolerance
+"""
+import collections
+import hashlib
+import io
+import math
+
+COMPARE_MODES = ('exact', 'whitespace', 'unordered_lines', 'float')
+
+DEFAULT_FLOAT_TOLERANCE = 1e-6
+
+_WHITESPACE = b' \t\r\n'
+
+# Bytes read from the expected output at a time
+_READ_SIZE = 65536
+
+
+class _ExpectedStream:
+    """Reads the expected output incrementally"""
+
+    def __init__(self, expected_path=None, expected=None):
+        if expected_path is not None:
+            self._source = open(expected_path, 'rb')
+        else:
+            self._source = io.BytesIO(expected.encode('utf-8') if isinstance(expected, str) else expected)
+        self._buffer = b''
+
+    def take(self, size):
+        """Return up to size bytes, fewer only at the end"""
+        while len(self._buffer) < size:
+            block = self._source.read(_READ_SIZE)
+            if not block:
+                break
+            self._buffer += block
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
+
+    def blocks(self):
+        """Yield the rest of the expected output"""
+        if self._buffer:
+            data, self._buffer = self._buffer, b''
+            yield data
+        while True:
+            block = self._source.read(_READ_SIZE)
+            if not block:
+                return
+            yield block
+
+    def rest_is_whitespace(self):
+        return all(not block.translate(None, _WHITESPACE) for block in self.blocks())
+
+    def close(self):
+        self._source.close()
+
+
+class _Checker:
+    """Base class: feed() output chunks, then finish()"""
+
+    def __init__(self, expected_stream):
+        self._expected = expected_stream
+        self.mismatch = False
+
+    def feed(self, chunk):
+        """
+        Check the next chunk of program output
+
+        Returns:
+            bool: False once the output can no longer match
+        """
+        if not self.mismatch and not self._feed(chunk):
+            self.mismatch = True
+        return not self.mismatch
+
+    def finish(self):
+        """
+        Finish after the program's output has ended
+
+        Returns:
+            bool: Whether the whole output matched
+        """
+        try:
+            return not self.mismatch and self._finish()
+        finally:
+            self.close()
+
+    def close(self):
+        self._expected.close()
+
+
+class ExactChecker(_Checker):
+    """Byte-for-byte comparison, ignoring trailing whitespace at the end"""
+
+    def __init__(self, expected_stream):
+        super().__init__(expected_stream)
+        # Trailing whitespace is held back until more output follows it
+        self._held = b''
+
+    def _feed(self, chunk):
+        data = self._held + chunk
+        core = data.rstrip(_WHITESPACE)
+        self._held = data[len(core):]
+        return self._expected.take(len(core)) == core
+
+    def _finish(self):
+        return self._expected.rest_is_whitespace()
+
+
+class WhitespaceChecker(_Checker):
+    """Comparison with all whitespace removed"""
+
+    def __init__(self, expected_stream):
+        super().__init__(expected_stream)
+        self._pending = b''
+        self._blocks = expected_stream.blocks()
+
+    def _feed(self, chunk):
+        data = chunk.translate(None, _WHITESPACE)
+        while data:
+            if not self._pending:
+                block = next(self._blocks, None)
+                if block is None:
+                    # More output than expected
+                    return False
+                self._pending = block.translate(None, _WHITESPACE)
+                continue
+            size = min(len(data), len(self._pending))
+            if data[:size] != self._pending[:size]:
+                return False
+            data = data[size:]
+            self._pending = self._pending[size:]
+        return True
+
+    def _finish(self):
+        if self._pending:
+            return False
+        return all(not block.translate(None, _WHITESPACE) for block in self._blocks)
+
+
+def _split_complete(carry, chunk, separator=None):
+    """Split carried-over and new output into complete pieces and a remainder"""
+    data = carry + chunk
+    if separator is None:
+        pieces = data.split()
+        complete = data[-1:].isspace() if data else True
+    else:
+        pieces = data.split(separator)
+        complete = data.endswith(separator)
+    if pieces and not complete:
+        return pieces[:-1], pieces[-1]
+    return pieces, b''
+
+
+class UnorderedLinesChecker(_Checker):
+    """Same lines in any order; surrounding whitespace and blank lines ignored"""
+
+    def __init__(self, expected_stream):
+        super().__init__(expected_stream)
+        self._remaining = None
+        self._carry = b''
+
+    @staticmethod
+    def _key(line):
+        # Digests keep memory small for long lines
+        return hashlib.blake2b(line.strip(), digest_size=16).digest()
+
+    def _load_expected(self):
+        self._remaining = collections.Counter()
+        carry = b''
+        for block in self._expected.blocks():
+            lines, carry = _split_complete(carry, block, b'\n')
+            self._remaining.update(self._key(line) for line in lines if line.strip())
+        if carry.strip():
+            self._remaining[self._key(carry)] += 1
+
+    def _take(self, line):
+        if not line.strip():
+            return True
+        key = self._key(line)
+        if self._remaining[key] <= 0:
+            return False
+        self._remaining[key] -= 1
+        return True
+
+    def _feed(self, chunk):
+        if self._remaining is None:
+            self._load_expected()
+        lines, self._carry = _split_complete(self._carry, chunk, b'\n')
+        return all(self._take(line) for line in lines)
+
+    def _finish(self):
+        if self._remaining is None:
+            self._load_expected()
+        return self._take(self._carry) and not any(count > 0 for count in self._remaining.values())
+
+
+class FloatChecker(_Checker):
+    """Token comparison with numbers equal within a tolerance"""
+
+    def __init__(self, expected_stream, tolerance=DEFAULT_FLOAT_TOLERANCE):
+        super().__init__(expected_stream)
+        self.tolerance = tolerance
+        self._carry = b''
+        self._expected_tokens = self._tokens(expected_stream.blocks())
+
+    @staticmethod
+    def _tokens(blocks):
+        carry = b''
+        for block in blocks:
+            tokens, carry = _split_complete(carry, block)
+            yield from tokens
+        if carry:
+            yield carry
+
+    def _tokens_equal(self, actual, expected):
+        if actual == expected:
+            return True
+        try:
+            actual_value, expected_value = float(actual), float(expected)
+        except ValueError:
+            return False
+        if math.isnan(actual_value) or math.isnan(expected_value):
+            return math.isnan(actual_value) and math.isnan(expected_value)
+        difference = abs(actual_value - expected_value)
+        return difference <= self.tolerance or difference <= self.tolerance * abs(expected_value)
+
+    def _match(self, tokens):
+        for token in tokens:
+            expected = next(self._expected_tokens, None)
+            if expected is None or not self._tokens_equal(token, expected):
+                return False
+        return True
+
+    def _feed(self, chunk):
+        tokens, self._carry = _split_complete(self._carry, chunk)
+        return self._match(tokens)
+
+    def _finish(self):
+        return self._match([self._carry] if self._carry else []) \
+            and next(self._expected_tokens, None) is None
+
+
+def create_checker(mode='whitespace', expected_path=None, expected=None, tolerance=None):
+    """
+    Create a streaming checker for one run
+
+    Args:
+        mode (str): One of COMPARE_MODES
+        expected_path (str): File holding the expected output
+        expected (str): Expected output, when it is not in a file
+        tolerance (float): Tolerance for the float mode
+
+    Returns:
+        _Checker: Call feed(chunk) with the output, then finish()
+    """
+    if mode not in COMPARE_MODES:
+        raise ValueError(f"Unknown comparison mode: {mode}")
+    stream = _ExpectedStream(expected_path, expected)
+    if mode == 'exact':
+        return ExactChecker(stream)
+    if mode == 'unordered_lines':
+        return UnorderedLinesChecker(stream)
+    if mode == 'float':
+        return FloatChecker(stream, DEFAULT_FLOAT_TOLERANCE if tolerance is None else tolerance)
+    return WhitespaceChecker(stream)
+
+
+def outputs_equal(actual, expected, mode='whitespace', tolerance=None):
+    """Compare two complete outputs with the given mode"""
+    checker = create_checker(mode, expected=expected, tolerance=tolerance)
+    checker.feed(actual.encode('utf-8'))
+    return checker.finish()
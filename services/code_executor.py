@@ -2,32 +2,152 @@
 Service for executing code safely in multiple languages.
 
 This module provides functionality to execute user-submitted code
-in Python, C++, and Java with proper sandboxing and timeout limits.
+with proper sandboxing and timeout limits. How each language is
+compiled and run is declared in services.languages.
 """
 import subprocess
-import tempfile
+import io
 import os
 import signal
 import json
+import resource
+import selectors
+import glob
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from functools import lru_cache, partial
 from pathlib import Path
 
+from services.checker import create_checker
+from services.compile_cache import get_compile_cache
+from services.cpp_pch import get_pch_flags
+from services.python_pool import get_python_pool
+from services.jvm_pool import get_jvm_pool
+from services.launcher import get_launcher
+from services.languages import get_runtime
+from services.metrics import get_metrics, observe_phases
+from services.process_watchdog import get_process_watchdog
+from services.remote_executor import WorkerUnavailable, encode_stdin, get_remote_executors
+from services.workspace_pool import get_workspace_pool
+
 
 class CodeExecutionError(Exception):
     """Custom exception for code execution errors"""
-    pass
+    
+    def __init__(self, message, verdict=None, usage=None):
+        super().__init__(message)
+        # Judge verdict such as 'Compilation Error' or 'Memory Limit Exceeded'
+        self.verdict = verdict
+        # Resource usage of the failed run, if it got as far as running
+        self.usage = usage or {}
+
+
+# A test case stored on disk. execute_batch streams its input file to the
+# program and checks the output against the expected file as it arrives.
+FileCase = namedtuple('FileCase', ['input_path', 'expected_path'])
+
+# A built submission: the command that runs it, its LanguageRuntime, extra
+# environment variables for the run and how long building it took per phase
+Program = namedtuple('Program', ['cmd', 'runtime', 'env', 'phases'])
+
+
+# Message of the Compilation Error raised when the compiler runs too long,
+# which depends on load rather than on the code alone
+COMPILATION_TIMEOUT = "Compilation Timeout"
+
+# stderr markers of a program that failed to allocate memory
+_OUT_OF_MEMORY_MARKERS = [
+    'MemoryError', 'std::bad_alloc', 'java.lang.OutOfMemoryError',
+    'JavaScript heap out of memory', 'runtime: out of memory', 'memory allocation of'
+]
+
+
+@lru_cache(maxsize=None)
+def _compiler_version(compiler, flag='--version'):
+    """Return the compiler's version banner, used as part of cache keys"""
+    try:
+        result = subprocess.run([compiler, flag], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return 'unknown'
+    # javac prints its version on stderr on older JDKs
+    banner = (result.stdout or result.stderr).strip()
+    return banner.splitlines()[0] if banner else 'unknown'
+
+
+def _skipped_result():
+    """Result for a case that was not run because an earlier case failed"""
+    return {
+        'output': '',
+        'error': None,
+        'verdict': 'Skipped',
+        'skipped': True,
+        'exit_code': None,
+        'time': None,
+        'memory': None,
+        'cpu_time': None
+    }
+
+
+# Thread pool shared by all executors for running test cases concurrently.
+# Each case is its own child process, so threads only wait on I/O.
+_case_pool = None
+_case_pool_lock = threading.Lock()
+
+
+def _get_case_pool():
+    global _case_pool
+    with _case_pool_lock:
+        if _case_pool is None:
+            workers = int(os.getenv("EXECUTOR_PARALLELISM", os.cpu_count() or 1))
+            _case_pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="test-case")
+        return _case_pool
 
 
 class CodeExecutor:
     """Handles code execution for different programming languages"""
     
-    # Timeout in seconds
+    # Wall-clock timeout in seconds
     TIMEOUT = 5
     
+    # CPU time limit in seconds, enforced by the kernel (RLIMIT_CPU)
+    # independently of the wall-clock timeout
+    CPU_TIME_LIMIT = 5
+    
+    # Seconds a stopped program gets to exit after SIGTERM before SIGKILL
+    KILL_GRACE_PERIOD = int(os.getenv("EXECUTOR_KILL_GRACE_MS", "100")) / 1000
+    
     # Memory limit (in MB)
     MEMORY_LIMIT = 256
     
-    def __init__(self):
-        self.temp_dir = tempfile.mkdtemp()
+    # Largest stdout a run may produce (in bytes)
+    OUTPUT_LIMIT = int(os.getenv("EXECUTOR_OUTPUT_LIMIT_MB", "8")) * 1024 * 1024
+    
+    # Output kept for display when it is checked against a file (in bytes)
+    OUTPUT_PREVIEW = 4096
+    
+    # Process/thread limit for native and Python runs
+    MAX_PROCESSES = 64
+    
+    def __init__(self, compile_cache=None, python_pool=None, jvm_pool=None, workspaces=None, watchdog=None,
+                 remote=None, launcher=None):
+        # Each execution leases its own directory, so one executor can be
+        # shared between threads
+        self.workspaces = workspaces or get_workspace_pool()
+        self.compile_cache = compile_cache or get_compile_cache()
+        # Starts programs so their peak memory excludes this process's;
+        # None when no C compiler is available (memory is then not reported)
+        self.launcher = launcher or get_launcher()
+        # Warm interpreters for Python runs; None falls back to a cold python3
+        self.python_pool = python_pool or get_python_pool(self._limits_preexec(), self.launcher)
+        # Long-lived JVMs for Java runs, only when JAVA_BACKEND=pool
+        self.jvm_pool = jvm_pool or get_jvm_pool(self.MEMORY_LIMIT, self._limits_preexec(None, per_run=False))
+        # Reports and kills processes that outlive their run
+        self.watchdog = watchdog or get_process_watchdog()
+        # Execution workers on other machines (EXECUTION_WORKERS); None runs
+        # everything here
+        self.remote = remote or get_remote_executors()
     
     def execute_python(self, code, stdin_data=""):
         """
@@ -40,233 +160,711 @@ class CodeExecutor:
         Returns:
             dict: Execution result with stdout, stderr, and exit code
         """
-        try:
-            # Create temporary Python file
-            file_path = os.path.join(self.temp_dir, "solution.py")
-            with open(file_path, 'w') as f:
-                f.write(code)
+        return self._execute_prepared('python', code, stdin_data)
+    
+    def execute_cpp(self, code, stdin_data=""):
+        """
+        Execute C++ code
+        
+        Args:
+            code (str): C++ code to execute
+            stdin_data (str): Input data for the program
             
-            # Execute with subprocess
-            process = subprocess.Popen(
-                ['python3', file_path],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                preexec_fn=os.setsid  # Create new process group for better cleanup
-            )
+        Returns:
+            dict: Execution result with stdout, stderr, and exit code
+        """
+        return self._execute_prepared('cpp', code, stdin_data)
+    
+    def execute_java(self, code, stdin_data=""):
+        """
+        Execute Java code
+        
+        Args:
+            code (str): Java code to execute
+            stdin_data (str): Input data for the program
             
+        Returns:
+            dict: Execution result with stdout, stderr, and exit code
+        """
+        return self._execute_prepared('java', code, stdin_data)
+    
+    def execute_batch(self, code, language, stdin_list, parallel=False, fail_fast=False,
+                      is_failure=None, on_result=None, expected_outputs=None,
+                      compare_mode='whitespace', float_tolerance=None):
+        """
+        Execute code once per input while building the program only once
+        
+        The source is written (and for compiled languages built) a single time and
+        every input is then fed through the same binary, class files or
+        script. Errors that affect the whole batch, such as a compilation
+        error, are raised; errors of an individual case are reported in
+        that case's result.
+        
+        With execution workers configured the batch runs on one of them,
+        falling back to running here if none is available. A remote batch
+        reports its results through on_result once it has finished, and
+        fail_fast there stops at the first error or checked mismatch
+        rather than calling is_failure.
+        
+        Args:
+            code (str): Code to execute
+            language (str): Language name registered in services.languages
+            stdin_list (list): Input data for each run, as a string or a
+                FileCase
+            parallel (bool): Run cases concurrently on the shared case pool,
+                which is bounded by the number of CPU cores
+            fail_fast (bool): Skip the remaining cases after the first failure
+            is_failure (callable): is_failure(index, result) decides what
+                counts as a failure for fail_fast; defaults to any error
+            on_result (callable): Called as on_result(index, result) on the
+                calling thread as soon as each case's result is known
+            expected_outputs (list): Expected output for each string input
+                (None entries are not checked); FileCase inputs are always
+                checked against their expected file
+            compare_mode (str): How output is compared (see
+                services.checker.COMPARE_MODES)
+            float_tolerance (float): Tolerance for the float compare mode
+            
+        Returns:
+            list: One result dict per input, in order, each with output,
+                error, verdict (on error), exit code, wall-clock time in
+                seconds, peak memory in KB and CPU time in seconds. Checked
+                cases also have output_matches, and their output is only
+                the first OUTPUT_PREVIEW bytes; a run is stopped as soon as
+                its output stops matching. Cases skipped by fail_fast have
+                verdict 'Skipped'. Cases that ran have phases, the seconds
+                spent writing the source, compiling, spawning the process,
+                running it and cleaning up; write, compile and cleanup are
+                shared by the whole batch.
+        """
+        if is_failure is None:
+            is_failure = lambda index, result: result['error'] is not None
+        if on_result is None:
+            on_result = lambda index, result: None
+        if self.remote is not None:
             try:
-                stdout, stderr = process.communicate(
-                    input=stdin_data,
-                    timeout=self.TIMEOUT
+                results = self._remote_call('/execute_batch', {
+                    'code': code,
+                    'language': language,
+                    'stdin_list': [encode_stdin(stdin_data) for stdin_data in stdin_list],
+                    'parallel': parallel,
+                    'fail_fast': fail_fast,
+                    'expected_outputs': expected_outputs,
+                    'compare_mode': compare_mode,
+                    'float_tolerance': float_tolerance
+                })['results']
+            except WorkerUnavailable:
+                pass
+            else:
+                for index, result in enumerate(results):
+                    on_result(index, result)
+                return results
+        
+        checkers = []
+        for index, stdin_data in enumerate(stdin_list):
+            if isinstance(stdin_data, FileCase):
+                checkers.append(partial(create_checker, compare_mode, expected_path=stdin_data.expected_path,
+                                        tolerance=float_tolerance))
+            elif expected_outputs is not None and expected_outputs[index] is not None:
+                checkers.append(partial(create_checker, compare_mode, expected=expected_outputs[index],
+                                        tolerance=float_tolerance))
+            else:
+                checkers.append(None)
+        program, workspace = self._prepare(code, language)
+        
+        try:
+            if parallel:
+                results = self._run_cases_parallel(
+                    program, workspace, stdin_list, checkers, fail_fast, is_failure, on_result
                 )
-                return_code = process.returncode
-            except subprocess.TimeoutExpired:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                raise CodeExecutionError("Time Limit Exceeded (> 5 seconds)")
-            
-            if return_code != 0:
-                error_msg = stderr.strip() if stderr else "Runtime Error"
-                raise CodeExecutionError(f"Runtime Error:\n{error_msg}")
-            
+            else:
+                results = []
+                for index, stdin_data in enumerate(stdin_list):
+                    result = self._run_case(program, workspace, stdin_data, checkers[index])
+                    results.append(result)
+                    on_result(index, result)
+                    if fail_fast and is_failure(index, result):
+                        break
+                for index in range(len(results), len(stdin_list)):
+                    results.append(_skipped_result())
+                    on_result(index, results[index])
+        finally:
+            cleanup_time = self._release(workspace, language)
+        
+        for result in results:
+            if result.get('phases') is not None:
+                result['phases']['cleanup'] = cleanup_time
+        return results
+    
+    def _run_case(self, program, workspace, stdin_data, new_checker=None):
+        """Run one case of a batch, reporting errors in the result"""
+        try:
+            return self._run_process(program, stdin_data, workspace, new_checker)
+        except CodeExecutionError as e:
             return {
-                'output': stdout.strip(),
-                'error': None,
-                'exit_code': return_code
+                'output': '',
+                'error': str(e),
+                'verdict': e.verdict,
+                'exit_code': e.usage.get('exit_code'),
+                'time': e.usage.get('time'),
+                'memory': e.usage.get('memory'),
+                'cpu_time': e.usage.get('cpu_time'),
+                'phases': e.usage.get('phases')
             }
-            
-        except CodeExecutionError:
-            raise
-        except Exception as e:
-            raise CodeExecutionError(f"Execution failed: {str(e)}")
+    
+    def _run_cases_parallel(self, program, workspace, stdin_list, checkers, fail_fast, is_failure, on_result):
+        """Dispatch cases to the shared pool and gather them in input order"""
+        futures = [
+            _get_case_pool().submit(self._run_case, program, workspace, stdin_data, new_checker)
+            for stdin_data, new_checker in zip(stdin_list, checkers)
+        ]
+        index_of = {future: index for index, future in enumerate(futures)}
+        results = [None] * len(futures)
+        
+        for future in as_completed(futures):
+            index = index_of[future]
+            if future.cancelled():
+                continue
+            results[index] = future.result()
+            on_result(index, results[index])
+            if fail_fast and is_failure(index, results[index]):
+                for pending in futures:
+                    pending.cancel()
+        
+        # Cases already running when a failure was seen are allowed to finish,
+        # so the workspace is not scrubbed from under them
+        wait(futures)
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = _skipped_result()
+                on_result(index, results[index])
+        return results
+    
+    def _execute_prepared(self, language, code, stdin_data, quick_build=False):
+        """Build the program for a single run, execute it and clean up"""
+        if self.remote is not None:
+            try:
+                return self._remote_call('/execute', {
+                    'code': code, 'language': language, 'stdin_data': stdin_data, 'quick_build': quick_build
+                })['result']
+            except WorkerUnavailable:
+                pass
+        program, workspace = self._prepare(code, language, quick_build)
+        try:
+            result = self._run_process(program, stdin_data, workspace)
         finally:
-            # Cleanup
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            cleanup_time = self._release(workspace, language)
+        result['phases']['cleanup'] = cleanup_time
+        return result
     
-    def execute_cpp(self, code, stdin_data=""):
+    def _remote_call(self, path, payload):
         """
-        Execute C++ code
+        Run a request on an execution worker
+        
+        Raises:
+            CodeExecutionError: The execution failed on the worker
+            WorkerUnavailable: No worker could run it; run it here instead
+        """
+        response = self.remote.post(path, payload, payload['language'])
+        if 'error' in response:
+            error = response['error']
+            raise CodeExecutionError(error['message'], verdict=error.get('verdict'), usage=error.get('usage'))
+        return response
+    
+    def _release(self, workspace, language):
+        """Scrub and return a workspace to the pool, returning how long it took"""
+        start = time.perf_counter()
+        self.workspaces.release(workspace)
+        elapsed = time.perf_counter() - start
+        observe_phases(language, {'cleanup': elapsed})
+        return elapsed
+    
+    def _prepare(self, code, language, quick_build=False):
+        """
+        Lease a workspace, write the source file and compile it if the
+        language needs it
         
         Args:
-            code (str): C++ code to execute
-            stdin_data (str): Input data for the program
-            
+            quick_build (bool): Compile with the runtime's quick flags
+                (no optimizations)
+        
         Returns:
-            dict: Execution result with stdout, stderr, and exit code
+            tuple: (Program to run, workspace to release afterwards)
         """
-        cpp_file = os.path.join(self.temp_dir, "solution.cpp")
-        exe_file = os.path.join(self.temp_dir, "solution")
+        runtime = get_runtime(language)
+        workspace = self.workspaces.lease()
+        try:
+            return self._build(runtime, code, workspace, quick_build), workspace
+        except BaseException:
+            self.workspaces.release(workspace)
+            raise
+    
+    def _build(self, runtime, code, workspace, quick_build=False):
+        """Write the source and compile it, reusing cached build outputs if possible"""
+        variables = {'workspace': workspace, 'exe': os.path.join(workspace, 'solution'),
+                     'memory_mb': self.MEMORY_LIMIT}
+        if runtime.class_name_pattern:
+            variables['class_name'] = runtime.class_name(code)
+            if not variables['class_name']:
+                raise CodeExecutionError(
+                    f"Could not find public class in {runtime.label} code", verdict='Compilation Error'
+                )
+        variables['source'] = os.path.join(workspace, runtime.source_file.format(**variables))
+        program = Program(
+            runtime.format_command(runtime.run_cmd, variables), runtime,
+            {name: value.format(**variables) for name, value in runtime.run_env.items()}, {}
+        )
         
+        start = time.perf_counter()
         try:
-            # Write C++ code to file
-            with open(cpp_file, 'w') as f:
+            with open(variables['source'], 'w') as f:
                 f.write(code)
+            program.phases['write'] = time.perf_counter() - start
+            if not runtime.compile_cmd:
+                return program
             
-            # Compile
-            compile_process = subprocess.run(
-                ['g++', '-std=c++17', '-O2', cpp_file, '-o', exe_file],
-                capture_output=True,
-                text=True,
-                timeout=10
+            flags = runtime.quick_flags if quick_build else runtime.flags
+            compiler_version = _compiler_version(runtime.compiler, runtime.version_flag)
+            cache_key = self.compile_cache.make_key(code, runtime.name, compiler_version, flags)
+            lookup_keys = [cache_key]
+            if quick_build and flags != runtime.flags:
+                # An optimized build of the same code (from an earlier
+                # submission) runs at least as well as a quick one
+                lookup_keys.insert(0, self.compile_cache.make_key(code, runtime.name, compiler_version, runtime.flags))
+            cached = self.compile_cache.get(lookup_keys[0], workspace, lookup_keys[1:])
+            get_metrics().increment(
+                'compile_cache_lookups_total', help_text='Compile cache lookups, by language and result',
+                language=runtime.name, result='hit' if cached else 'miss'
             )
+            if cached:
+                return program
             
-            if compile_process.returncode != 0:
-                raise CodeExecutionError(f"Compilation Error:\n{compile_process.stderr}")
-            
-            # Execute
-            process = subprocess.Popen(
-                [exe_file],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                preexec_fn=os.setsid
-            )
+            # Let a leading #include <bits/stdc++.h> load its PCH when it is ready
+            pch_flags = get_pch_flags(runtime.compiler, compiler_version, flags) \
+                if runtime.precompiled_headers else []
+            compile_process = self._compile(runtime, variables, flags + pch_flags)
             
-            try:
-                stdout, stderr = process.communicate(
-                    input=stdin_data,
-                    timeout=self.TIMEOUT
+            if compile_process.returncode != 0:
+                raise CodeExecutionError(
+                    f"Compilation Error:\n{compile_process.stderr}", verdict='Compilation Error'
                 )
-                return_code = process.returncode
-            except subprocess.TimeoutExpired:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                raise CodeExecutionError("Time Limit Exceeded (> 5 seconds)")
             
-            if return_code != 0:
-                error_msg = stderr.strip() if stderr else "Runtime Error"
-                raise CodeExecutionError(f"Runtime Error:\n{error_msg}")
+            artifacts = []
+            for pattern in runtime.cache_artifacts:
+                artifacts.extend(glob.glob(os.path.join(workspace, pattern)))
+            self.compile_cache.put(cache_key, artifacts)
+            return program
             
-            return {
-                'output': stdout.strip(),
-                'error': None,
-                'exit_code': return_code
-            }
-            
-        except CodeExecutionError:
+        except CodeExecutionError as e:
+            e.usage.setdefault('phases', program.phases)
             raise
         except subprocess.TimeoutExpired:
-            raise CodeExecutionError("Compilation Timeout")
+            raise CodeExecutionError(COMPILATION_TIMEOUT, verdict='Compilation Error',
+                                     usage={'phases': program.phases})
         except Exception as e:
-            raise CodeExecutionError(f"Execution failed: {str(e)}")
+            raise CodeExecutionError(f"Execution failed: {str(e)}", usage={'phases': program.phases})
         finally:
-            # Cleanup
-            for file in [cpp_file, exe_file]:
-                if os.path.exists(file):
-                    os.remove(file)
+            # A compile cache hit counts as a (short) compile
+            if runtime.compile_cmd and 'write' in program.phases:
+                program.phases['compile'] = time.perf_counter() - start - program.phases['write']
+            observe_phases(runtime.name, program.phases)
     
-    def execute_java(self, code, stdin_data=""):
+    def _compile(self, runtime, variables, flags):
+        return subprocess.run(
+            runtime.format_command(runtime.compile_cmd, variables, flags),
+            capture_output=True,
+            text=True,
+            timeout=runtime.compile_timeout,
+            cwd=variables['workspace'],
+            env={**os.environ, **runtime.compile_env} if runtime.compile_env else None
+        )
+    
+    def _run_process(self, program, stdin_data, workspace, new_checker=None):
         """
-        Execute Java code
+        Run an already prepared program with the given stdin
         
         Args:
-            code (str): Java code to execute
-            stdin_data (str): Input data for the program
+            program (Program): Prepared program from _prepare
+            stdin_data (str or FileCase): Input data for the program
+            workspace (str): Directory the program was prepared in
+            new_checker (callable): Creates the checker the output is
+                compared with as it is produced
             
         Returns:
-            dict: Execution result with stdout, stderr, and exit code
+            dict: Execution result with output, exit code, wall-clock time,
+                peak memory (KB), CPU time (seconds) and phase timings, plus
+                output_matches when the output was checked
         """
-        # Extract class name from code
-        class_name = self._extract_java_class_name(code)
-        if not class_name:
-            raise CodeExecutionError("Could not find public class in Java code")
-        
-        java_file = os.path.join(self.temp_dir, f"{class_name}.java")
-        
+        stdin_file = checker = None
+        phases = dict(program.phases)
         try:
-            # Write Java code to file
-            with open(java_file, 'w') as f:
-                f.write(code)
-            
-            # Compile
-            compile_process = subprocess.run(
-                ['javac', java_file],
-                capture_output=True,
-                text=True,
-                timeout=10,
-                cwd=self.temp_dir
-            )
+            if isinstance(stdin_data, FileCase):
+                stdin_file = open(stdin_data.input_path, 'rb')
+            if new_checker:
+                checker = new_checker()
             
-            if compile_process.returncode != 0:
-                raise CodeExecutionError(f"Compilation Error:\n{compile_process.stderr}")
+            if program.runtime.name == 'java' and self.jvm_pool is not None:
+                # No process is spawned; the class runs on a warm JVM
+                result = self._run_in_jvm(program.cmd, stdin_data, checker)
+                phases['run'] = result['time']
+                observe_phases(program.runtime.name, {'run': phases['run']})
+                result['phases'] = phases
+                return result
             
-            # Execute
-            process = subprocess.Popen(
-                ['java', class_name],
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                cwd=self.temp_dir,
-                preexec_fn=os.setsid
+            start = time.perf_counter()
+            process, stdin_prefix = self._start_process(program, workspace)
+            phases['spawn'] = time.perf_counter() - start
+            source = stdin_file or io.BytesIO(stdin_data.encode('utf-8'))
+            output_limit = self.OUTPUT_LIMIT
+            if stdin_file:
+                # Allow for expected outputs bigger than the usual limit
+                output_limit = max(output_limit, 2 * os.path.getsize(stdin_data.expected_path))
+            run = self._communicate(
+                process, self._input_chunks(stdin_prefix.encode('utf-8'), source), start,
+                checker=checker, output_limit=output_limit
             )
+            phases['run'] = run['time'] - phases['spawn']
+            observe_phases(program.runtime.name, {'spawn': phases['spawn'], 'run': phases['run']})
+            usage = {'time': run['time'], 'memory': run['memory'], 'cpu_time': run['cpu_time'],
+                     'phases': phases}
             
-            try:
-                stdout, stderr = process.communicate(
-                    input=stdin_data,
-                    timeout=self.TIMEOUT
+            if run['mismatch']:
+                # Wrong Answer is already certain; the program was stopped
+                return {
+                    'output': run['stdout'].strip(),
+                    'error': None,
+                    'exit_code': None,
+                    'output_matches': False,
+                    'terminated_early': True,
+                    **usage
+                }
+            if run['timed_out']:
+                raise CodeExecutionError(
+                    f"Time Limit Exceeded (> {self.TIMEOUT} seconds)",
+                    verdict='Time Limit Exceeded', usage=usage
+                )
+            if run['output_exceeded']:
+                raise CodeExecutionError(
+                    f"Output Limit Exceeded (> {output_limit // (1024 * 1024)} MB)",
+                    verdict='Output Limit Exceeded', usage=usage
                 )
-                return_code = process.returncode
-            except subprocess.TimeoutExpired:
-                os.killpg(os.getpgid(process.pid), signal.SIGTERM)
-                raise CodeExecutionError("Time Limit Exceeded (> 5 seconds)")
-            
-            if return_code != 0:
-                error_msg = stderr.strip() if stderr else "Runtime Error"
-                raise CodeExecutionError(f"Runtime Error:\n{error_msg}")
             
-            return {
-                'output': stdout.strip(),
-                'error': None,
-                'exit_code': return_code
-            }
+            result = self._build_result(
+                run['stdout'], run['stderr'], run['returncode'], run['time'],
+                memory=run['memory'], cpu_time=run['cpu_time']
+            )
+            if checker:
+                result['output_matches'] = checker.finish()
+            result['phases'] = phases
+            return result
             
-        except CodeExecutionError:
+        except CodeExecutionError as e:
+            e.usage.setdefault('phases', phases)
             raise
-        except subprocess.TimeoutExpired:
-            raise CodeExecutionError("Compilation Timeout")
         except Exception as e:
-            raise CodeExecutionError(f"Execution failed: {str(e)}")
+            raise CodeExecutionError(f"Execution failed: {str(e)}", usage={'phases': phases})
+        finally:
+            if stdin_file:
+                stdin_file.close()
+            if checker:
+                checker.close()
+    
+    @staticmethod
+    def _input_chunks(prefix, source):
+        """Yield the stdin prefix, then the input in chunks"""
+        if prefix:
+            yield prefix
+        while True:
+            chunk = source.read(65536)
+            if not chunk:
+                return
+            yield chunk
+    
+    def _communicate(self, process, input_chunks, start, checker=None, output_limit=None):
+        """
+        Feed stdin, collect output and reap the child with wait4
+        
+        Unlike Popen.communicate this streams stdin from an iterator of
+        chunks, stops reading once the output limit is exceeded and
+        collects the child's resource usage. With a checker, stdout is
+        checked as it arrives, only a preview of it is kept, and the
+        program is killed as soon as its output stops matching.
+        
+        Returns:
+            dict: stdout, stderr, returncode, time, memory, cpu_time and
+                the timed_out / output_exceeded / mismatch flags
+        """
+        deadline = start + self.TIMEOUT
+        output_limit = output_limit or self.OUTPUT_LIMIT
+        stdout_chunks, stderr_chunks = [], []
+        stdout_size = 0
+        timed_out = output_exceeded = mismatch = False
+        
+        selector = selectors.DefaultSelector()
+        os.set_blocking(process.stdin.fileno(), False)
+        selector.register(process.stdin, selectors.EVENT_WRITE)
+        selector.register(process.stdout, selectors.EVENT_READ, stdout_chunks)
+        selector.register(process.stderr, selectors.EVENT_READ, stderr_chunks)
+        pending = b''
+        
+        try:
+            while selector.get_map():
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    timed_out = True
+                    break
+                for key, _ in selector.select(remaining):
+                    if key.fileobj is process.stdin:
+                        if not pending:
+                            pending = next(input_chunks, None)
+                        if pending is None:
+                            selector.unregister(process.stdin)
+                            process.stdin.close()
+                            continue
+                        try:
+                            pending = pending[os.write(key.fd, pending):]
+                        except BrokenPipeError:
+                            # The program stopped reading; drop the rest
+                            pending, input_chunks = b'', iter(())
+                        continue
+                    
+                    data = os.read(key.fd, 65536)
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        continue
+                    if key.data is not stdout_chunks:
+                        key.data.append(data)
+                        continue
+                    stdout_size += len(data)
+                    if checker is None:
+                        stdout_chunks.append(data)
+                    else:
+                        if stdout_size - len(data) < self.OUTPUT_PREVIEW:
+                            stdout_chunks.append(data[:self.OUTPUT_PREVIEW - (stdout_size - len(data))])
+                        if not checker.feed(data):
+                            mismatch = True
+                            break
+                    if stdout_size > output_limit:
+                        output_exceeded = True
+                        break
+                if output_exceeded or mismatch:
+                    break
         finally:
-            # Cleanup
-            for ext in ['.java', '.class']:
-                file_path = os.path.join(self.temp_dir, f"{class_name}{ext}")
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-    
-    def _extract_java_class_name(self, code):
-        """Extract the public class name from Java code"""
-        import re
-        match = re.search(r'public\s+class\s+(\w+)', code)
-        return match.group(1) if match else None
-    
-    def execute(self, code, language, stdin_data=""):
+            selector.close()
+        
+        # Once output is closed the child should exit promptly
+        if not (timed_out or output_exceeded or mismatch) and not self._wait_for_exit(process, deadline):
+            timed_out = True
+        rusage = self._reap(process, terminate=timed_out or output_exceeded or mismatch)
+        
+        return {
+            'stdout': b''.join(stdout_chunks).decode('utf-8', errors='replace'),
+            'stderr': b''.join(stderr_chunks).decode('utf-8', errors='replace'),
+            'returncode': process.returncode,
+            'time': time.perf_counter() - start,
+            'memory': self.launcher.peak_memory(process.pid) if self.launcher else None,
+            'cpu_time': rusage.ru_utime + rusage.ru_stime if rusage else None,
+            'timed_out': timed_out,
+            'output_exceeded': output_exceeded,
+            'mismatch': mismatch
+        }
+    
+    @staticmethod
+    def _wait_for_exit(process, deadline):
+        """Wait until the process exits or the deadline passes, without reaping it"""
+        while True:
+            if os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOHANG | os.WNOWAIT) is not None:
+                return True
+            if time.perf_counter() >= deadline:
+                return False
+            time.sleep(0.001)
+    
+    def _reap(self, process, terminate=False):
+        """
+        Stop the program's process group and reap the program
+        
+        A program that is still running gets SIGTERM and KILL_GRACE_PERIOD
+        seconds to exit. The whole group is then sent SIGKILL, which also
+        takes out programs that ignore SIGTERM and any children left in
+        the background, before the program itself is reaped with wait4.
+        The exited program keeps the group ID reserved until it is reaped,
+        so the signals cannot reach an unrelated group.
+        
+        Returns:
+            resource.struct_rusage: Resource usage of the program and the
+                children it waited for
+        """
+        # Every run is started with setsid, so the program leads its group
+        pgid = process.pid
+        if terminate:
+            self._signal_group(pgid, signal.SIGTERM)
+            self._wait_for_exit(process, time.perf_counter() + self.KILL_GRACE_PERIOD)
+        self._signal_group(pgid, signal.SIGKILL)
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        if self.watchdog is not None:
+            self.watchdog.watch(pgid)
+        return rusage
+    
+    @staticmethod
+    def _signal_group(pgid, sig):
+        try:
+            os.killpg(pgid, sig)
+        except ProcessLookupError:
+            pass
+    
+    def _run_in_jvm(self, cmd, stdin_data, checker=None):
+        """Run a compiled Java class on a warm JVM from the pool"""
+        class_dir, class_name = cmd[-2], cmd[-1]
+        output_limit = self.OUTPUT_LIMIT
+        if isinstance(stdin_data, FileCase):
+            # The JVM reads the input file directly; its output comes back
+            # through a file and is checked after the run
+            output_limit = max(output_limit, 2 * os.path.getsize(stdin_data.expected_path))
+            run = self.jvm_pool.run(class_dir, class_name, '', self.TIMEOUT, stdin_path=stdin_data.input_path,
+                                    cpu_limit=self.CPU_TIME_LIMIT, output_limit=output_limit)
+        else:
+            run = self.jvm_pool.run(class_dir, class_name, stdin_data, self.TIMEOUT,
+                                    cpu_limit=self.CPU_TIME_LIMIT, output_limit=output_limit)
+        usage = {'time': run['time'], 'cpu_time': run['cpu_time']}
+        if run['timed_out']:
+            raise CodeExecutionError(
+                f"Time Limit Exceeded (> {self.TIMEOUT} seconds)",
+                verdict='Time Limit Exceeded', usage=usage
+            )
+        if run['cpu_exceeded']:
+            raise CodeExecutionError(
+                f"Time Limit Exceeded (> {self.CPU_TIME_LIMIT} seconds of CPU time)",
+                verdict='Time Limit Exceeded', usage=usage
+            )
+        if run['output_exceeded']:
+            raise CodeExecutionError(
+                f"Output Limit Exceeded (> {output_limit // (1024 * 1024)} MB)",
+                verdict='Output Limit Exceeded', usage=usage
+            )
+        # The JVM is shared, so per-run memory is not available; CPU time
+        # covers the submission's own threads
+        result = self._build_result(run['stdout'], run['stderr'], run['returncode'], run['time'],
+                                    cpu_time=run['cpu_time'])
+        if checker:
+            checker.feed(run['stdout'].encode('utf-8'))
+            result['output'] = result['output'][:self.OUTPUT_PREVIEW]
+            result['output_matches'] = checker.finish()
+        return result
+    
+    def _build_result(self, stdout, stderr, return_code, elapsed, memory=None, cpu_time=None):
+        """Turn a finished run into a result dict, raising on runtime errors"""
+        usage = {'time': elapsed, 'memory': memory, 'cpu_time': cpu_time, 'exit_code': return_code}
+        
+        if return_code != 0:
+            # SIGXCPU only comes from RLIMIT_CPU; the rusage reported with it
+            # can fall a few milliseconds short of the limit
+            if return_code == -signal.SIGXCPU or (return_code == -signal.SIGKILL and cpu_time is not None
+                                                  and cpu_time >= self.CPU_TIME_LIMIT):
+                raise CodeExecutionError(
+                    f"Time Limit Exceeded (> {self.CPU_TIME_LIMIT} seconds of CPU time)",
+                    verdict='Time Limit Exceeded', usage=usage
+                )
+            if self._is_memory_error(stderr, memory):
+                raise CodeExecutionError(
+                    f"Memory Limit Exceeded (> {self.MEMORY_LIMIT} MB)",
+                    verdict='Memory Limit Exceeded', usage=usage
+                )
+            error_msg = stderr.strip() if stderr else "Runtime Error"
+            raise CodeExecutionError(f"Runtime Error:\n{error_msg}", verdict='Runtime Error', usage=usage)
+        
+        return {
+            'output': stdout.strip(),
+            'error': None,
+            'exit_code': return_code,
+            'time': elapsed,
+            'memory': memory,
+            'cpu_time': cpu_time
+        }
+    
+    def _is_memory_error(self, stderr, memory):
+        """Whether a failed run died from hitting the memory limit"""
+        if any(marker in (stderr or '') for marker in _OUT_OF_MEMORY_MARKERS):
+            return True
+        return memory is not None and memory >= self.MEMORY_LIMIT * 1024
+    
+    def _start_process(self, program, workspace):
+        """
+        Start the program for one run
+        
+        Python scripts are handed to a pre-started worker from the pool
+        when one is configured; the worker expects the script path on the
+        first line of its stdin.
+        
+        Returns:
+            tuple: (process, text to send before the program's stdin)
+        """
+        if program.runtime.name == 'python' and self.python_pool is not None:
+            return self.python_pool.acquire(), program.cmd[-1] + '\n'
+        
+        process = subprocess.Popen(
+            self.launcher.command(program.cmd) if self.launcher else program.cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=workspace,
+            env={**os.environ, **program.env} if program.env else None,
+            preexec_fn=self._limits_preexec(program.runtime.memory_rlimit)
+        )
+        return process, ''
+    
+    def _limits_preexec(self, memory_rlimit='address_space', per_run=True):
+        """
+        Build the function run in each child before exec
+        
+        Puts the child in its own process group and applies CPU time,
+        output file size, process count and memory limits. memory_rlimit
+        picks the memory limit: 'address_space', 'data' or None (for the
+        JVM, which is capped with -Xmx instead and gets no process limit).
+        per_run=False leaves out the CPU time and file size limits, which
+        would add up over the runs of a pooled JVM; JudgeRunner enforces
+        those per run instead.
+        """
+        memory_bytes = self.MEMORY_LIMIT * 1024 * 1024
+        cpu_seconds = self.CPU_TIME_LIMIT
+        output_bytes = self.OUTPUT_LIMIT
+        max_processes = self.MAX_PROCESSES
+        
+        def preexec():
+            os.setsid()  # Create new process group for better cleanup
+            if per_run:
+                resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+                resource.setrlimit(resource.RLIMIT_FSIZE, (output_bytes, output_bytes))
+            resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+            if memory_rlimit is not None:
+                memory_resource = resource.RLIMIT_AS if memory_rlimit == 'address_space' else resource.RLIMIT_DATA
+                resource.setrlimit(memory_resource, (memory_bytes, memory_bytes))
+                resource.setrlimit(resource.RLIMIT_NPROC, (max_processes, max_processes))
+        
+        return preexec
+    
+    def execute(self, code, language, stdin_data="", quick_build=False):
         """
         Execute code in the specified language
         
         Args:
             code (str): Code to execute
-            language (str): Programming language (python, cpp, java)
+            language (str): Language name registered in services.languages
             stdin_data (str): Input data for the program
+            quick_build (bool): Compile without optimizations for faster
+                feedback (used by "Run"; submissions are judged optimized)
             
         Returns:
             dict: Execution result
         """
-        if language == 'python':
-            return self.execute_python(code, stdin_data)
-        elif language == 'cpp':
-            return self.execute_cpp(code, stdin_data)
-        elif language == 'java':
-            return self.execute_java(code, stdin_data)
-        else:
-            raise ValueError(f"Unsupported language: {language}")
+        return self._execute_prepared(language, code, stdin_data, quick_build)
     
     def cleanup(self):
-        """Clean up temporary directory"""
-        import shutil
-        if os.path.exists(self.temp_dir):
-            shutil.rmtree(self.temp_dir)
+        """
+        Release resources held by the executor
+        
+        Workspaces are scrubbed and returned to the pool after every run,
+        so there is nothing left to remove; kept for existing callers.
+        """
 
 
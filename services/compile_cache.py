@@ -0,0 +1,166 @@
+"""
+Content-addressed cache for compiled code submissions.
+
+Compiled artifacts (C++ binaries, Java .class files) are stored on disk
+under a key derived from the source, the language, the compiler version
+and the compiler flags, so identical submissions skip compilation. The
+cache is bounded in size and evicts the least recently used entries.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+
+
+class CompileCache:
+    """Size-bounded on-disk LRU cache of compiled artifacts"""
+
+    def __init__(self, cache_dir, max_bytes):
+        """
+        Args:
+            cache_dir (str): Directory holding one sub-directory per entry
+            max_bytes (int): Total size the cache may grow to before eviction
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(source, language, compiler_version, flags):
+        """Build the cache key for a compilation"""
+        digest = hashlib.sha256()
+        for part in [language, compiler_version, '\0'.join(flags), source]:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key, dest_dir, alternate_keys=()):
+        """
+        Copy the cached artifacts for a key into a directory
+
+        Args:
+            key (str): Cache key from make_key
+            dest_dir (str): Directory to copy the artifacts into
+            alternate_keys (tuple): Keys tried in order when key has no
+                entry; the lookup still counts as one hit or miss
+
+        Returns:
+            list: Paths of the copied artifacts, or None on a cache miss
+        """
+        for candidate in (key,) + tuple(alternate_keys):
+            copied = self._copy_entry(candidate, dest_dir)
+            if copied is not None:
+                with self._lock:
+                    self.hits += 1
+                return copied
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def _copy_entry(self, key, dest_dir):
+        entry_dir = os.path.join(self.cache_dir, key)
+        try:
+            names = os.listdir(entry_dir)
+            copied = []
+            for name in names:
+                dest = os.path.join(dest_dir, name)
+                shutil.copy2(os.path.join(entry_dir, name), dest)
+                copied.append(dest)
+            # Mark the entry as recently used
+            os.utime(entry_dir)
+        except OSError:
+            # Missing entry, or evicted while we were copying it
+            return None
+        return copied
+
+    def put(self, key, artifact_paths):
+        """
+        Store compiled artifacts under a key and evict old entries if needed
+
+        Args:
+            key (str): Cache key from make_key
+            artifact_paths (list): Files produced by the compiler
+        """
+        entry_dir = os.path.join(self.cache_dir, key)
+        staging_dir = os.path.join(self.cache_dir, f".tmp-{uuid.uuid4().hex}")
+        try:
+            os.makedirs(staging_dir)
+            for path in artifact_paths:
+                shutil.copy2(path, os.path.join(staging_dir, os.path.basename(path)))
+            # Atomic publish, so readers never see a half-written entry
+            os.rename(staging_dir, entry_dir)
+        except OSError:
+            # Another request stored the same key first, or the disk is full
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            return
+
+        self._evict()
+
+    def stats(self):
+        """Return hit/miss counters and current size"""
+        entries = self._entries()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(entries),
+                'size_bytes': sum(size for _, _, size in entries)
+            }
+
+    def clear(self):
+        """Remove every entry and reset the counters"""
+        for entry_dir, _, _ in self._entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _entries(self):
+        """List (path, last use time, size) for every published entry"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.startswith('.tmp-'):
+                continue
+            entry_dir = os.path.join(self.cache_dir, name)
+            try:
+                size = sum(
+                    os.path.getsize(os.path.join(entry_dir, f))
+                    for f in os.listdir(entry_dir)
+                )
+                entries.append((entry_dir, os.path.getmtime(entry_dir), size))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self):
+        """Drop least recently used entries until the cache fits its budget"""
+        entries = sorted(self._entries(), key=lambda e: e[1])
+        total = sum(size for _, _, size in entries)
+        for entry_dir, _, size in entries:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+
+# Shared cache instance used by CodeExecutor
+_cache = None
+
+
+def get_compile_cache():
+    global _cache
+    if _cache is None:
+        cache_dir = os.getenv(
+            "COMPILE_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "code_executor_compile_cache")
+        )
+        max_mb = int(os.getenv("COMPILE_CACHE_MAX_MB", "256"))
+        _cache = CompileCache(cache_dir, max_mb * 1024 * 1024)
+    return _cache
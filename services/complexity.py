@@ -0,0 +1,170 @@
+"""
+Empirical time complexity estimation for code submissions.
+
+Passing the small test cases says little about how a solution scales.
+This runs a submission on generated inputs of increasing size (see the
+"perf" entry of each problem), subtracts the fixed start-up cost
+measured on a tiny input, and fits the timings against the usual
+complexity classes, reporting the best fit with the per-size timings.
+A size that runs out of time still counts: it took at least the time
+limit, which rules out the classes that predict it would finish sooner.
+"""
+import math
+
+from services import code_executor, problems
+
+# Candidate growth functions, from slowest to fastest growing
+COMPLEXITY_CLASSES = [
+    ('O(1)', lambda n: 1.0),
+    ('O(log n)', lambda n: math.log2(n)),
+    ('O(n)', lambda n: float(n)),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: float(n) ** 2),
+    ('O(n^3)', lambda n: float(n) ** 3)
+]
+
+# Timings below this (seconds, after subtracting start-up) are noise
+MIN_SIGNAL = 0.005
+
+# Extra RMS error (in log space) accepted to prefer a slower growing class
+FIT_TOLERANCE = 0.1
+
+# Factor by which a class may underestimate a size that ran out of time
+# before it is ruled out
+BOUND_SLACK = 2.0
+
+
+def fit_complexity(sizes, times, lower_bounds=()):
+    """
+    Pick the complexity class that best explains the timings
+
+    Fits t = c * f(n) for each class by least squares in log space.
+    Neighbouring classes such as O(n) and O(n log n) fit real timings
+    almost equally well, so the slowest growing class whose RMS error is
+    within FIT_TOLERANCE of the best fit wins. A class whose fit predicts
+    less than a lower bound (divided by BOUND_SLACK) is ruled out, so one
+    timing followed by a time limit is enough to tell O(n^2) from O(n).
+
+    Args:
+        sizes (list): Input sizes
+        times (list): Seconds spent on each size, start-up excluded
+        lower_bounds (list): (n, seconds) for sizes that ran out of time
+
+    Returns:
+        str: Complexity class such as 'O(n log n)', or None without
+            enough timings above the noise floor
+    """
+    points = [(n, t) for n, t in zip(sizes, times) if t is not None and n > 1]
+    if not lower_bounds and len(points) >= 2 and all(t < MIN_SIGNAL for _, t in points):
+        return 'O(1)'
+    points = [(n, t) for n, t in points if t >= MIN_SIGNAL]
+    if len(points) < (1 if lower_bounds else 2):
+        return None
+
+    errors = []
+    for name, growth in COMPLEXITY_CLASSES:
+        residuals = [math.log(t) - math.log(growth(n)) for n, t in points]
+        log_c = sum(residuals) / len(residuals)
+        if any(log_c + math.log(growth(n)) < math.log(t / BOUND_SLACK) for n, t in lower_bounds):
+            continue
+        errors.append((name, math.sqrt(sum((r - log_c) ** 2 for r in residuals) / len(residuals))))
+    if not errors:
+        return None
+
+    best_error = min(error for _, error in errors)
+    return next(name for name, error in errors if error <= best_error + FIT_TOLERANCE)
+
+
+def _run_time(result):
+    """CPU time when the executor measured it, else wall-clock time"""
+    if result.get('cpu_time') is not None:
+        return result['cpu_time']
+    return result.get('time')
+
+
+def analyze_complexity(code, language, problem):
+    """
+    Time a submission on scaled inputs and estimate its complexity
+
+    Sizes run in increasing order and stop at the first one that fails
+    (wrong answer, time limit, ...), whose verdict is reported. A time
+    limit bounds the fit from below, so a solution too slow for most
+    sizes is still classified.
+
+    Args:
+        code (str): Submitted source code
+        language (str): Programming language (python, cpp, java)
+        problem (dict): Problem definition with a "perf" entry
+
+    Returns:
+        dict: complexity (estimated class), expected_complexity,
+            timings (n, time, verdict per size), time_budget and
+            within_budget (largest size finished inside the budget)
+    """
+    perf = problem.get('perf')
+    if not perf:
+        raise ValueError(f"Problem {problem['id']} has no performance profile")
+
+    sizes = perf['sizes']
+    cases = [problems.generate_perf_input(problem, n) for n in sizes]
+    # A tiny input first, to measure start-up and input handling overhead
+    baseline_input = '\n'.join(problem['test_cases'][0]['input'])
+    stdin_list = [baseline_input] + [stdin_data for stdin_data, _ in cases]
+
+    # Outputs are checked while running, so a wrong answer on a large
+    # input is stopped early
+    expected_outputs = [None] + [expected for _, expected in cases]
+
+    def is_failure(index, result):
+        if index == 0:
+            return bool(result['error'])
+        return bool(result['error']) or not result['output_matches']
+
+    executor = code_executor.CodeExecutor()
+    try:
+        # Sequential, so the runs do not compete for the CPU
+        results = executor.execute_batch(
+            code, language, stdin_list, fail_fast=True, is_failure=is_failure,
+            expected_outputs=expected_outputs,
+            compare_mode=problem.get('compare_mode', 'whitespace'),
+            float_tolerance=problem.get('float_tolerance')
+        )
+    finally:
+        executor.cleanup()
+
+    baseline = _run_time(results[0]) or 0.0
+    timings = []
+    lower_bounds = []
+    for index, (n, result) in enumerate(zip(sizes, results[1:]), start=1):
+        if result.get('skipped'):
+            verdict = 'Skipped'
+        elif result['error']:
+            verdict = result.get('verdict') or 'Runtime Error'
+        else:
+            verdict = 'Wrong Answer' if is_failure(index, result) else 'Accepted'
+        run_time = _run_time(result)
+        timings.append({
+            'n': n,
+            'time': result.get('time'),
+            'cpu_time': result.get('cpu_time'),
+            'net_time': max(run_time - baseline, 0.0) if run_time is not None and verdict == 'Accepted' else None,
+            'verdict': verdict
+        })
+        if verdict == 'Time Limit Exceeded':
+            limit = run_time if run_time is not None else executor.CPU_TIME_LIMIT
+            lower_bounds.append((n, max(limit - baseline, MIN_SIGNAL)))
+
+    finished = [timing for timing in timings if timing['verdict'] == 'Accepted']
+    largest = timings[-1]
+    return {
+        'complexity': fit_complexity(
+            [t['n'] for t in finished], [t['net_time'] for t in finished], lower_bounds
+        ),
+        'expected_complexity': perf.get('expected_complexity'),
+        'timings': timings,
+        'baseline_time': baseline,
+        'time_budget': perf.get('time_budget'),
+        'within_budget': largest['verdict'] == 'Accepted' and (
+            perf.get('time_budget') is None or largest['time'] <= perf['time_budget']
+        )
+    }
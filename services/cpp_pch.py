@@ -0,0 +1,98 @@
+"""
+Precompiled <bits/stdc++.h> for C++ submissions.
+
+Parsing the standard library headers is a large share of compiling a
+small solution. Submissions start from the C++ starter code in
+services.problems, whose first line is #include <bits/stdc++.h>.
+That header is precompiled once per compiler and flag set (GCC only
+accepts a PCH built with matching options) in the background, into a
+directory added to the include path once it is ready. GCC then loads the
+PCH in place of the header, and only where the source includes it as
+its first token; anything else, including an unusable PCH, compiles
+exactly as it would without it. Until the PCH is ready, or when
+CPP_PCH=0, submissions compile without it.
+"""
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+
+PCH_HEADER = 'bits/stdc++.h'
+
+# Compiling the header takes a few seconds; never block a submission on it
+BUILD_TIMEOUT = 60
+
+# (compiler, flags) -> include directory once its PCH is built, or None
+# while a build is running or after it failed
+_bundles = {}
+_bundles_lock = threading.Lock()
+
+
+def _bundle_dir(compiler_version, flags):
+    """Include directory for one PCH, named by everything that affects it"""
+    digest = hashlib.sha256(
+        '\0'.join([compiler_version, *flags, PCH_HEADER]).encode('utf-8')
+    ).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f"judge_pch_{digest}")
+
+
+def _build(compiler, compiler_version, flags, key):
+    """Write and precompile the header, publishing its directory when done"""
+    bundle_dir = _bundle_dir(compiler_version, flags)
+    header = os.path.join(bundle_dir, PCH_HEADER)
+    if not os.path.exists(header + '.gch'):
+        os.makedirs(os.path.dirname(header), exist_ok=True)
+        # Where GCC cannot use the PCH it reads this header instead, which
+        # defers to the real one
+        with open(header, 'w') as f:
+            f.write(f"#include_next <{PCH_HEADER}>\n")
+        # Build under a temporary name so other processes never see a
+        # partially written PCH
+        partial = f"{header}.gch.{os.getpid()}.{threading.get_ident()}"
+        try:
+            result = subprocess.run(
+                [compiler, *flags, '-x', 'c++-header', header, '-o', partial],
+                capture_output=True,
+                text=True,
+                timeout=BUILD_TIMEOUT
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            print(f"Precompiled header build failed: {e}")
+            return
+        if result.returncode != 0:
+            print(f"Precompiled header build failed: {result.stderr}")
+            if os.path.exists(partial):
+                os.remove(partial)
+            return
+        os.replace(partial, header + '.gch')
+
+    with _bundles_lock:
+        _bundles[key] = bundle_dir
+
+
+def get_pch_flags(compiler, compiler_version, flags):
+    """
+    Return the flags that let a compile use the precompiled header
+
+    Args:
+        compiler (str): Compiler executable
+        compiler_version (str): Version banner, part of the PCH's identity
+        flags (list): Flags the submission is compiled with
+
+    Returns:
+        list: ['-I', directory] when the PCH is ready, otherwise [] (and
+            the PCH is built in the background on first request)
+    """
+    if os.getenv("CPP_PCH", "1") == "0":
+        return []
+    key = (compiler, tuple(flags))
+    with _bundles_lock:
+        if key in _bundles:
+            bundle_dir = _bundles[key]
+            return ['-I', bundle_dir] if bundle_dir else []
+        _bundles[key] = None
+    threading.Thread(
+        target=_build, args=(compiler, compiler_version, list(flags), key), daemon=True
+    ).start()
+    return []
@@ -0,0 +1,202 @@
+"""
+Standalone execution worker serving CodeExecutor over HTTP.
+
+Web nodes configured with EXECUTION_WORKERS send their code executions
+to these workers (see services.remote_executor) instead of running them
+locally, so a burst of submissions on one node spreads over every
+machine that runs a worker. Start one per judge host:
+
+    python -m services.execution_worker --host 0.0.0.0 --port 8101
+
+Endpoints (JSON in and out):
+    GET  /health         status, runs in flight, capacity and languages
+    GET  /metrics        the worker's execution metrics (Prometheus text)
+    POST /execute        one run: code, language, stdin_data, quick_build
+    POST /execute_batch  code, language, stdin_list and the execute_batch
+                         options; FileCase inputs are sent as
+                         {"input_name", "expected_name", "sizes"}, files
+                         under the worker's TEST_DATA_DIR
+
+A CodeExecutionError is answered as {"error": {"message", "verdict",
+"usage"}} so the web node can raise it again. A batch naming test data
+the worker does not have (or has in another size) is answered as
+{"missing_test_data": message}, and the web node sends it elsewhere. The protocol has no
+authentication; bind workers to a private network.
+"""
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from services import languages, problems
+from services.code_executor import CodeExecutor, CodeExecutionError, FileCase
+from services.metrics import get_metrics
+
+
+class MissingTestData(Exception):
+    """Raised when a batch names test data this worker does not have"""
+    pass
+
+
+def decode_stdin(stdin_data, test_data_dir):
+    """
+    Batch input from its JSON form (a string, or test data files by name)
+
+    Raises:
+        MissingTestData: A named file is missing, outside test_data_dir or
+            not the size the web node sent
+    """
+    if not isinstance(stdin_data, dict):
+        return stdin_data
+    root = os.path.realpath(test_data_dir)
+    paths = []
+    for name, size in zip((stdin_data['input_name'], stdin_data['expected_name']), stdin_data['sizes']):
+        path = os.path.realpath(os.path.join(root, name))
+        if os.path.commonpath([root, path]) != root:
+            raise MissingTestData(f"{name} is outside the test data")
+        if not os.path.isfile(path) or os.path.getsize(path) != size:
+            raise MissingTestData(f"{name} is missing or differs from the web node's copy")
+        paths.append(path)
+    return FileCase(*paths)
+
+
+class ExecutionWorker:
+    """Runs execution requests on a local CodeExecutor and tracks its load"""
+
+    def __init__(self, executor=None, capacity=None, test_data_dir=None):
+        """
+        Args:
+            executor (CodeExecutor): Executor the requests run on; it never
+                forwards to other workers
+            capacity (int): Runs this worker is sized for, reported to web
+                nodes to weigh its load (defaults to the CPU count)
+            test_data_dir (str): Where hidden test files sent by name are
+                looked up (defaults to problems.TEST_DATA_DIR)
+        """
+        self.executor = executor or CodeExecutor()
+        self.executor.remote = None
+        self.capacity = capacity or int(os.getenv("EXECUTOR_PARALLELISM", os.cpu_count() or 1))
+        self.test_data_dir = test_data_dir or problems.TEST_DATA_DIR
+        self.active = 0
+        self.served = 0
+        self._lock = threading.Lock()
+
+    def health(self):
+        with self._lock:
+            active, served = self.active, self.served
+        return {
+            'status': 'ok',
+            'active': active,
+            'served': served,
+            'capacity': self.capacity,
+            'languages': [runtime.name for runtime in languages.list_runtimes(available_only=True)]
+        }
+
+    def handle(self, path, request):
+        """
+        Run one execution request
+
+        Returns:
+            dict: {'result': ...} for /execute, {'results': [...]} for
+                /execute_batch, {'error': ...} if execution failed, or
+                {'missing_test_data': ...} if the batch needs test files
+                this worker does not have
+        """
+        with self._lock:
+            self.active += 1
+        try:
+            if path == '/execute':
+                return {'result': self.executor.execute(
+                    request['code'], request['language'], request.get('stdin_data', ''),
+                    quick_build=bool(request.get('quick_build'))
+                )}
+            return {'results': self.executor.execute_batch(
+                request['code'], request['language'],
+                [decode_stdin(stdin_data, self.test_data_dir) for stdin_data in request['stdin_list']],
+                parallel=bool(request.get('parallel')),
+                fail_fast=bool(request.get('fail_fast')),
+                is_failure=_is_failure,
+                expected_outputs=request.get('expected_outputs'),
+                compare_mode=request.get('compare_mode', 'whitespace'),
+                float_tolerance=request.get('float_tolerance')
+            )}
+        except CodeExecutionError as e:
+            return {'error': {'message': str(e), 'verdict': e.verdict, 'usage': e.usage}}
+        except MissingTestData as e:
+            return {'missing_test_data': str(e)}
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.served += 1
+
+
+def _is_failure(index, result):
+    """fail_fast check for remote batches: an error or a checked mismatch"""
+    return result['error'] is not None or result.get('output_matches') is False
+
+
+def make_server(host='127.0.0.1', port=8101, worker=None):
+    """
+    Create (but do not start) the HTTP server for a worker
+
+    Args:
+        port (int): Port to listen on; 0 picks a free one (see
+            server.server_address)
+
+    Returns:
+        ThreadingHTTPServer: Call serve_forever() to start serving
+    """
+    worker = worker or ExecutionWorker()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/health':
+                self._reply(200, json.dumps(worker.health()), 'application/json')
+            elif self.path == '/metrics':
+                self._reply(200, get_metrics().render(), 'text/plain; version=0.0.4; charset=utf-8')
+            else:
+                self._reply(404, json.dumps({'error': 'Not found'}), 'application/json')
+
+        def do_POST(self):
+            if self.path not in ('/execute', '/execute_batch'):
+                self._reply(404, json.dumps({'error': 'Not found'}), 'application/json')
+                return
+            try:
+                request = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            except ValueError:
+                self._reply(400, json.dumps({'error': 'Invalid JSON'}), 'application/json')
+                return
+            self._reply(200, json.dumps(worker.handle(self.path, request)), 'application/json')
+
+        def _reply(self, status, body, content_type):
+            data = body.encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass  # one line per request would drown the worker's own logs
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    server.worker = worker
+    return server
+
+
+if __name__ == '__main__':
+    from dotenv import load_dotenv
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Serve code executions to web nodes over HTTP")
+    parser.add_argument('--host', default=os.getenv("EXECUTION_WORKER_HOST", "127.0.0.1"))
+    parser.add_argument('--port', type=int, default=int(os.getenv("EXECUTION_WORKER_PORT", "8101")))
+    args = parser.parse_args()
+    server = make_server(args.host, args.port)
+    print(f"Execution worker listening on http://{args.host}:{server.server_address[1]} "
+          f"(capacity {server.worker.capacity})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -1,7 +1,10 @@
 import re
-from flask import session
+import uuid
+from flask import flash, session
 from services import llm_chains # Import llm_chains for getting chain functions
 from services import document_processor # For retriever
+from services import metrics
+from services import turn_store
 from config import Config
 
 def analyze_and_feedback_answer(question, answer, jd_text, resume_content, chat_history_str):
@@ -17,7 +20,10 @@ def analyze_and_feedback_answer(question, answer, jd_text, resume_content, chat_
         "resume_content": resume_content,
         "chat_history_str": chat_history_str
     })
+    return parse_answer_analysis(response_str)
 
+def parse_answer_analysis(response_str):
+    """Splits the answer analysis chain's output into (feedback, next_action_type)."""
     feedback_match = re.search(r"FEEDBACK:\s*(.*)", response_str, re.DOTALL)
     action_match = re.search(r"ACTION:\s*([A-Z_]+)", response_str)
 
@@ -26,8 +32,73 @@ def analyze_and_feedback_answer(question, answer, jd_text, resume_content, chat_
 
     return feedback, action
 
+def stream_answer_analysis(question, answer, jd_text, resume_content, chat_history_str):
+    """
+    Streaming form of analyze_and_feedback_answer.
+    Yields the feedback text in pieces as the model writes it, and returns
+    (feedback, next_action_type) like analyze_and_feedback_answer.
+    """
+    analysis_chain = llm_chains.get_answer_analysis_chain()
+    response_str = ""
+    sent = 0
+    for chunk in analysis_chain.stream({
+        "question": question,
+        "answer": answer,
+        "jd_text": jd_text,
+        "resume_content": resume_content,
+        "chat_history_str": chat_history_str
+    }):
+        response_str += chunk
+        feedback = _partial_section(response_str, "FEEDBACK:", "ACTION:")
+        if len(feedback) > sent:
+            yield feedback[sent:]
+            sent = len(feedback)
+    return parse_answer_analysis(response_str)
+
+def _partial_section(response_str, label, end_label=None):
+    """The text after `label` in a partly streamed reply, up to end_label and without anything that may turn out to be end_label."""
+    start = re.search(re.escape(label) + r"\s*", response_str)
+    if not start:
+        return ""
+    section = response_str[start.end():]
+    if end_label is None:
+        return section.rstrip()
+    end = section.find(end_label)
+    if end >= 0:
+        return section[:end].rstrip()
+    for size in range(min(len(section), len(end_label) - 1), 0, -1):
+        if end_label.startswith(section[-size:]):
+            section = section[:-size]
+            break
+    return section.rstrip()
+
 def get_next_question(next_action_type, global_jd_text, global_resume_content, formatted_chat_history):
     """Determines the next question based on interview state and action type."""
+    chain, chain_input = select_next_question_chain(next_action_type, global_jd_text, global_resume_content, formatted_chat_history)
+    if chain is None:
+        return "An internal error occurred. Please restart the interview.", "END_INTERVIEW"
+
+    next_question = chain.invoke(chain_input)
+    return next_question, next_action_type # Return next_action_type just in case, though it's already determined by analyze_and_feedback_answer
+
+def stream_next_question(next_action_type, global_jd_text, global_resume_content, formatted_chat_history):
+    """
+    Streaming form of get_next_question.
+    Yields the question in pieces as the model writes it, and returns
+    (next_question, next_action_type) like get_next_question.
+    """
+    chain, chain_input = select_next_question_chain(next_action_type, global_jd_text, global_resume_content, formatted_chat_history)
+    if chain is None:
+        return "An internal error occurred. Please restart the interview.", "END_INTERVIEW"
+
+    next_question = ""
+    for chunk in chain.stream(chain_input):
+        next_question += chunk
+        yield chunk
+    return next_question, next_action_type
+
+def select_next_question_chain(next_action_type, global_jd_text, global_resume_content, formatted_chat_history):
+    """Picks the question chain for the interview state and action type, and its input. Returns (None, None) on error."""
     current_stage = session.get('current_stage', 'FOUNDATIONAL_WARMUP')
     stage_question_count = session.get('stage_question_count', 0)
 
@@ -91,14 +162,13 @@ def get_next_question(next_action_type, global_jd_text, global_resume_content, f
     else:
         # Fallback or error case if stage is not recognized
         print(f"Error: Unknown current_stage: {current_stage}")
-        return "An internal error occurred. Please restart the interview.", "END_INTERVIEW"
+        return None, None
 
     if next_question_prompt_template_chain is None:
         print(f"Error: No question chain selected for next_action_type: {next_action_type} and stage: {current_stage}")
-        return "An internal error occurred. Please restart the interview.", "END_INTERVIEW"
+        return None, None
 
-    next_question = next_question_prompt_template_chain.invoke(common_next_question_input)
-    return next_question, next_action_type # Return next_action_type just in case, though it's already determined by analyze_and_feedback_answer
+    return next_question_prompt_template_chain, common_next_question_input
 
 
 def update_interview_stage(next_action_type):
@@ -106,17 +176,158 @@ def update_interview_stage(next_action_type):
     current_stage = session.get('current_stage', 'FOUNDATIONAL_WARMUP')
     stage_question_count = session.get('stage_question_count', 0)
 
+    new_stage, session['stage_question_count'] = next_stage(current_stage, stage_question_count, next_action_type)
+    if new_stage != current_stage:
+        session['current_stage'] = new_stage
+        print(f"--- Transitioning to stage: {session['current_stage']} ---")
+    
+    return session['current_stage']
+
+def next_stage(current_stage, stage_question_count, next_action_type):
+    """Returns the (stage, stage_question_count) that follow a turn with this action type."""
     # Don't increment count for clarifying or pivoting questions, they are follow-ups
     if next_action_type not in ["PIVOT_BEHAVIORAL", "PIVOT_FOUNDATIONAL", "CLARIFY"]:
         stage_question_count += 1
-        session['stage_question_count'] = stage_question_count
 
     # Transition logic
     if current_stage == 'FOUNDATIONAL_WARMUP' and stage_question_count >= Config.MAX_FOUNDATIONAL_QUESTIONS:
-        session['current_stage'] = 'JD_RESUME_SPECIFIC'
-        session['stage_question_count'] = 0 # Reset count for new stage
-        print(f"--- Transitioning to stage: {session['current_stage']} ---")
-    
+        return 'JD_RESUME_SPECIFIC', 0 # Reset count for new stage
+
     # Add more stage transitions here if needed (e.g., JD_RESUME_SPECIFIC to BEHAVIORAL)
-    
-    return session['current_stage']
\ No newline at end of file
+
+    return current_stage, stage_question_count
+
+
+# --- Single-Call Turns ---
+# With Config.SINGLE_CALL_TURNS, one call to the interview_turn chain returns
+# the feedback, the action and the next question together. A reply that does
+# not parse is discarded and the turn runs the two-call path instead.
+
+TURN_ACTIONS = ('CONTINUE', 'PIVOT_BEHAVIORAL', 'PIVOT_FOUNDATIONAL', 'CLARIFY', 'END_INTERVIEW')
+
+# "FEEDBACK:", "**Action:**", "Next Question:" and the like at the start of a line
+_TURN_LABEL = re.compile(r"^[\s*#>`_-]*(FEEDBACK|ACTION|NEXT[ _]QUESTION)[\s*_`]*:[\s*_`]*", re.IGNORECASE | re.MULTILINE)
+
+_CONTINUE_GUIDANCE = {
+    'FOUNDATIONAL_WARMUP': "A foundational technical question on core programming concepts, data structures, algorithms or basic problem solving, language-agnostic where possible. Avoid questions taken directly from the resume or JD.",
+    'JD_RESUME_SPECIFIC': "A follow-up question specific to the JD requirements and the candidate's resume, building on their answer and the relevant context."
+}
+
+def parse_turn(response_str):
+    """
+    Splits the interview_turn chain's output into (feedback, next_action_type, next_question).
+    Returns None when any part is missing or ambiguous. next_question is None for END_INTERVIEW.
+    """
+    matches = list(_TURN_LABEL.finditer(response_str))
+    sections = {}
+    for match, following in zip(matches, matches[1:] + [None]):
+        label = match.group(1).upper().replace(' ', '_')
+        end = following.start() if following else len(response_str)
+        sections.setdefault(label, response_str[match.end():end].strip().strip('`*_"').strip())
+
+    actions = set(re.findall(r"\b(" + "|".join(TURN_ACTIONS) + r")\b", sections.get('ACTION', '').upper()))
+    if len(actions) != 1 or not sections.get('FEEDBACK'):
+        return None
+    action = actions.pop()
+    if action == 'END_INTERVIEW':
+        return sections['FEEDBACK'], action, None
+
+    next_question = sections.get('NEXT_QUESTION', '')
+    if not next_question or next_question.upper() == 'NONE':
+        return None
+    return sections['FEEDBACK'], action, next_question
+
+def single_call_turn(question, answer, jd_text, resume_content, chat_history_str):
+    """
+    Analyzes the answer and writes the next question with one LLM call.
+    Returns (feedback, next_action_type, next_question), or None if the reply could not be parsed.
+    """
+    response_str = llm_chains.get_interview_turn_chain().invoke(
+        _turn_input(question, answer, jd_text, resume_content, chat_history_str)
+    )
+    return _checked_turn(response_str)
+
+def stream_single_call_turn(question, answer, jd_text, resume_content, chat_history_str):
+    """
+    Streaming form of single_call_turn.
+    Yields ('feedback', text) and then ('question', text) pieces as the model writes them, and
+    returns what single_call_turn would. The pieces of a reply that fails to parse have been sent already.
+    """
+    response_str = ""
+    sent = {'feedback': 0, 'question': 0}
+    for chunk in llm_chains.get_interview_turn_chain().stream(
+        _turn_input(question, answer, jd_text, resume_content, chat_history_str)
+    ):
+        response_str += chunk
+        for kind, text in (('feedback', _partial_section(response_str, "FEEDBACK:", "ACTION:")),
+                           ('question', _partial_section(response_str, "NEXT_QUESTION:"))):
+            if len(text) > sent[kind]:
+                yield kind, text[sent[kind]:]
+                sent[kind] = len(text)
+    return _checked_turn(response_str)
+
+def _turn_input(question, answer, jd_text, resume_content, chat_history_str):
+    """Input for the interview_turn chain, with the question guidance for the stage a CONTINUE would lead to."""
+    continue_stage, _ = next_stage(
+        session.get('current_stage', 'FOUNDATIONAL_WARMUP'), session.get('stage_question_count', 0), 'CONTINUE'
+    )
+    retrieved_context = ""
+    retriever_instance = document_processor.get_retriever()
+    if retriever_instance:
+        retrieved_docs = retriever_instance.invoke(f"Generate a follow-up question based on the candidate's answer. Previous Question: {question}\nCandidate's Answer: {answer}")
+        retrieved_context = "\n".join([d.page_content for d in retrieved_docs])
+    return {
+        "job_role": Config.JOB_ROLE,
+        "jd_text": jd_text,
+        "resume_content": resume_content,
+        "retrieved_context": retrieved_context,
+        "chat_history_str": chat_history_str,
+        "question": question,
+        "answer": answer,
+        "continue_guidance": _CONTINUE_GUIDANCE.get(continue_stage, _CONTINUE_GUIDANCE['JD_RESUME_SPECIFIC'])
+    }
+
+def _checked_turn(response_str):
+    turn = parse_turn(response_str)
+    metrics.get_metrics().increment(
+        'interview_single_call_turns_total', help_text='Single-call interview turns, by whether the reply parsed',
+        result='parsed' if turn is not None else 'fallback'
+    )
+    if turn is None:
+        print(f"Could not parse single-call turn, falling back to two calls: {response_str[:200]!r}")
+    return turn
+
+
+# --- Streamed Turns ---
+# /interview_flow/stream sends its response body before the turn's outcome is
+# known, so the session cookie cannot carry it. The outcome waits in
+# services.turn_store, keyed by the turn ID stored in the session when the
+# stream started, until the candidate's next request (in any web process)
+# applies it to the session.
+
+TURN_SESSION_KEYS = ('interview_history', 'current_stage', 'stage_question_count')
+
+def begin_turn():
+    """Marks the session as waiting for a streamed turn and returns the turn ID."""
+    turn_id = uuid.uuid4().hex
+    session['pending_turn'] = turn_id
+    return turn_id
+
+def save_turn(turn_id, flashes=()):
+    """Keeps the session's interview state and any (message, category) flashes for apply_pending_turn."""
+    turn_store.get_turn_store().put(turn_id, {
+        'session': {key: session[key] for key in TURN_SESSION_KEYS if key in session},
+        'flashes': list(flashes)
+    })
+
+def apply_pending_turn():
+    """Copies a finished streamed turn into the session. A turn that never finished leaves it unchanged."""
+    turn_id = session.pop('pending_turn', None)
+    if turn_id is None:
+        return
+    turn = turn_store.get_turn_store().pop(turn_id)
+    if turn is None:
+        return
+    session.update(turn['session'])
+    for message, category in turn['flashes']:
+        flash(message, category)
@@ -0,0 +1,320 @@
+"""
+Grading of code submissions against a problem's test cases.
+
+Runs a submission through CodeExecutor and turns each case's raw result
+into a graded entry (verdict, expected vs actual output, runtime and
+memory). Used by the /submit_code route and by the judge queue workers.
+Output is checked while the program runs, in the problem's compare_mode
+(see services.checker), so a run is stopped at its first wrong byte.
+Verdicts for identical submissions are served from a bounded in-memory
+cache keyed by the code, language, problem and its test cases. Every
+submission is logged as one JSON line with its verdict and how long each
+execution phase took, and counted in services.metrics.
+"""
+import collections
+import copy
+import hashlib
+import json
+import os
+import signal
+import threading
+import time
+
+from services import code_executor, metrics, problems
+
+# Verdicts that follow from the code and the test data alone. Anything
+# else (time and memory limits, executor failures) can depend on machine
+# load and is judged again on resubmission
+_CACHEABLE_VERDICTS = {'Accepted', 'Wrong Answer', 'Skipped', 'Runtime Error', 'Compilation Error'}
+
+# Exit codes of runs killed from outside the program (the kernel's OOM
+# killer, the process watchdog), which a Runtime Error can also come from
+_KILLED_EXIT_CODES = {-signal.SIGKILL, -signal.SIGTERM}
+
+
+class VerdictCache:
+    """Bounded LRU cache of submission results"""
+
+    def __init__(self, max_entries):
+        """
+        Args:
+            max_entries (int): Results kept before the least recently used
+                is evicted; 0 disables the cache
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(code, language, problem, fail_fast):
+        """
+        Hash a submission together with the problem's current test cases,
+        so editing a problem's test_cases, hidden test files or comparison
+        settings invalidates its entries
+        """
+        test_cases_version = hashlib.sha256(json.dumps(
+            [problem['test_cases'], problems.hidden_tests_fingerprint(problem),
+             problem.get('compare_mode'), problem.get('float_tolerance')], sort_keys=True
+        ).encode()).hexdigest()
+        digest = hashlib.sha256()
+        for part in [language, str(problem.get('id')), test_cases_version, str(bool(fail_fast)), code]:
+            digest.update(part.encode('utf-8'))
+            digest.update(b'\0')
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached result, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return copy.deepcopy(result)
+
+    def put(self, key, result):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = copy.deepcopy(result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Shared cache used by judge_submission
+_verdict_cache = VerdictCache(int(os.getenv("VERDICT_CACHE_SIZE", "1024")))
+
+
+def outputs_match(actual, expected):
+    """Compare program output to the expected output, ignoring whitespace"""
+    actual_normalized = actual.strip().replace(' ', '').replace('\n', '')
+    expected_normalized = expected.strip().replace(' ', '').replace('\n', '')
+    return actual_normalized == expected_normalized
+
+
+def case_passed(test_case, result):
+    """Whether a successful run produced the expected output"""
+    if 'output_matches' in result:
+        # Checked against the expected output while running
+        return result['output_matches']
+    return outputs_match(result['output'], test_case['expected_output'])
+
+
+def _hidden_case(input_path, expected_path):
+    """Test case entry for a hidden test stored on disk"""
+    size_kb = os.path.getsize(input_path) / 1024
+    return {
+        'hidden': True,
+        'input': f"Hidden test {os.path.basename(input_path)} ({size_kb:.0f} KB)",
+        'expected_output': 'Hidden'
+    }
+
+
+def grade_case(test_case, stdin_data, result):
+    """
+    Build the graded entry for one test case
+
+    Args:
+        test_case (dict): Test case from the problem definition
+        stdin_data (str or FileCase): Input that was fed to the program
+        result (dict): Result from CodeExecutor.execute_batch
+
+    Returns:
+        dict: input, expected, actual, passed, verdict, runtime and memory
+    """
+    expected = test_case['expected_output'].strip()
+    if test_case.get('hidden'):
+        # Only describe hidden inputs, which may be megabytes long
+        stdin_data = test_case['input']
+
+    if result.get('skipped'):
+        return {
+            'input': stdin_data,
+            'expected': expected,
+            'actual': 'Not run (an earlier test case failed)',
+            'passed': False,
+            'verdict': 'Skipped'
+        }
+
+    if result.get('error'):
+        return {
+            'input': stdin_data,
+            'expected': expected,
+            'actual': f"Error: {result['error']}",
+            'passed': False,
+            'verdict': result.get('verdict') or 'Runtime Error',
+            'runtime': result.get('time'),
+            'memory': result.get('memory')
+        }
+
+    actual = result['output'].strip()
+    passed = case_passed(test_case, result)
+
+    return {
+        'input': stdin_data,
+        'expected': expected,
+        'actual': actual,
+        'passed': passed,
+        'verdict': 'Accepted' if passed else 'Wrong Answer',
+        'runtime': result.get('time'),
+        'memory': result.get('memory')
+    }
+
+
+def is_cacheable(graded_case, result):
+    """Whether a graded case would get the same verdict on any healthy machine"""
+    if graded_case['verdict'] not in _CACHEABLE_VERDICTS:
+        return False
+    if graded_case['verdict'] == 'Runtime Error' and result.get('exit_code') in _KILLED_EXIT_CODES | {None}:
+        return False
+    if not result.get('error') or result.get('skipped'):
+        return True
+    # Errors without a verdict are failures of the executor itself
+    return result.get('verdict') is not None and result['error'] != code_executor.COMPILATION_TIMEOUT
+
+
+def submission_verdict(graded):
+    """The first verdict that is not Accepted (or Skipped), else Accepted"""
+    for case in graded:
+        if case['verdict'] not in ('Accepted', 'Skipped'):
+            return case['verdict']
+    return 'Accepted'
+
+
+def submission_phases(results):
+    """
+    Total time per execution phase across a batch's results
+
+    Writing, compiling and cleaning up happen once per batch, so they are
+    taken once; spawn and run times are summed over the cases.
+    """
+    phases = {}
+    for result in results:
+        for phase, seconds in (result.get('phases') or {}).items():
+            if phase in ('spawn', 'run'):
+                phases[phase] = phases.get(phase, 0.0) + seconds
+            else:
+                phases.setdefault(phase, seconds)
+    return phases
+
+
+def log_submission(language, problem, submission, elapsed):
+    """Print a structured log line for a judged submission and count it"""
+    verdict = submission_verdict(submission['test_results'])
+    metrics.get_metrics().increment(
+        'judge_submissions_total', help_text='Submissions judged, by language and verdict',
+        language=language, verdict=verdict
+    )
+    print(json.dumps({
+        'event': 'submission',
+        'language': language,
+        'problem_id': problem.get('id'),
+        'verdict': verdict,
+        'passed_tests': submission['passed_tests'],
+        'total_tests': submission['total_tests'],
+        'cached': submission['cached'],
+        'elapsed': round(elapsed, 6),
+        'phases': {phase: round(seconds, 6) for phase, seconds in submission['phases'].items()}
+    }), flush=True)
+
+
+def judge_submission(code, language, problem, fail_fast=False, on_case=None):
+    """
+    Run a submission against every test case of a problem
+
+    Args:
+        code (str): Submitted source code
+        language (str): Programming language (python, cpp, java)
+        problem (dict): Problem definition from services.problems
+        fail_fast (bool): Skip the remaining cases after the first failure
+        on_case (callable): Called as on_case(index, graded_case) as soon as
+            each case is graded, in completion order
+
+    Returns:
+        dict: test_results (in test case order), all_passed, total_tests,
+            passed_tests, cached (served from the verdict cache) and phases
+            (seconds per execution phase; empty when cached)
+    """
+    start = time.perf_counter()
+    cache_key = VerdictCache.make_key(code, language, problem, fail_fast)
+    cached = _verdict_cache.get(cache_key)
+    if cached is not None:
+        if on_case:
+            for index, graded_case in enumerate(cached['test_results']):
+                on_case(index, graded_case)
+        cached['cached'] = True
+        cached['phases'] = {}
+        log_submission(language, problem, cached, time.perf_counter() - start)
+        return cached
+
+    test_cases = list(problem['test_cases'])
+    stdin_list = ['\n'.join(test_case['input']) for test_case in test_cases]
+    expected_outputs = [test_case['expected_output'] for test_case in test_cases]
+    for input_path, expected_path in problems.get_hidden_tests(problem):
+        test_cases.append(_hidden_case(input_path, expected_path))
+        stdin_list.append(code_executor.FileCase(input_path, expected_path))
+        expected_outputs.append(None)
+    graded = [None] * len(test_cases)
+
+    def is_failure(index, result):
+        return bool(result['error']) or not case_passed(test_cases[index], result)
+
+    def on_result(index, result):
+        graded[index] = grade_case(test_cases[index], stdin_list[index], result)
+        if on_case:
+            on_case(index, graded[index])
+
+    executor = code_executor.CodeExecutor()
+    try:
+        results = executor.execute_batch(
+            code, language, stdin_list,
+            parallel=True,
+            fail_fast=fail_fast,
+            is_failure=is_failure,
+            on_result=on_result,
+            expected_outputs=expected_outputs,
+            compare_mode=problem.get('compare_mode', 'whitespace'),
+            float_tolerance=problem.get('float_tolerance')
+        )
+    except code_executor.CodeExecutionError as e:
+        # Errors such as a failed compilation affect every test case
+        results = [{'output': '', 'error': str(e), 'verdict': e.verdict, 'exit_code': e.usage.get('exit_code'),
+                    'phases': e.usage.get('phases')} for _ in stdin_list]
+        for index, result in enumerate(results):
+            on_result(index, result)
+    finally:
+        executor.cleanup()
+
+    # Fill in anything the executor did not report through on_result
+    for index, result in enumerate(results):
+        if graded[index] is None:
+            on_result(index, result)
+
+    submission = {
+        'test_results': graded,
+        'all_passed': all(case['passed'] for case in graded),
+        'total_tests': len(graded),
+        'passed_tests': sum(1 for case in graded if case['passed']),
+        'cached': False
+    }
+    if all(is_cacheable(case, result) for case, result in zip(graded, results)):
+        _verdict_cache.put(cache_key, submission)
+    # Timings describe this run only, so they are kept out of the cache
+    submission['phases'] = submission_phases(results)
+    log_submission(language, problem, submission, time.perf_counter() - start)
+    return submission
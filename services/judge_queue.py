@@ -0,0 +1,373 @@
+"""
+Local job queue for code submissions.
+
+/submit_code_async puts submissions into a SQLite-backed queue and
+returns a job ID at once; a separate pool of judge worker threads (or
+standalone worker processes started with `python -m services.judge_queue`)
+claims jobs, runs them through services.judge and records each test
+case's result as it completes, so clients can poll or stream progress.
+/analyze_complexity queues 'complexity' jobs the same way, which time an
+accepted solution on scaled inputs (services.complexity) off the web
+workers' request threads.
+SQLite keeps the queue shared between gunicorn workers without an
+external broker. Submissions are rejected once the queue is full.
+
+Workers also maintain the queue: jobs left 'running' by a worker that
+died are requeued, and finished jobs are deleted once they are older
+than the retention period. A finished job's source code is dropped as
+soon as it is judged.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from services import complexity, judge, problems
+
+
+class QueueFullError(Exception):
+    """Raised when the queue is at its maximum depth"""
+    pass
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL DEFAULT 'submission',
+    status TEXT NOT NULL,
+    problem_id INTEGER,
+    language TEXT NOT NULL,
+    code TEXT NOT NULL,
+    fail_fast INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    result TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created);
+CREATE TABLE IF NOT EXISTS job_cases (
+    job_id TEXT NOT NULL,
+    case_index INTEGER NOT NULL,
+    result TEXT NOT NULL,
+    PRIMARY KEY (job_id, case_index)
+);
+"""
+
+
+class JudgeQueue:
+    """SQLite-backed submission queue with its own judge worker threads"""
+
+    # How often idle workers look for jobs queued by other processes
+    POLL_INTERVAL = 0.2
+
+    # Jobs left 'running' for longer than this (a worker died) are requeued
+    STALE_AFTER = 300
+
+    # Seconds between maintenance sweeps (stale requeueing and retention)
+    MAINTENANCE_INTERVAL = 60
+
+    # Longest one event stream stays open. Each open stream holds a web
+    # worker (a sync gunicorn worker serves one request at a time), so
+    # streams end early and the client reconnects or polls instead
+    STREAM_TIMEOUT = 25
+
+    # Milliseconds an EventSource waits before reconnecting
+    STREAM_RETRY_MS = 1000
+
+    def __init__(self, db_path, workers=2, max_depth=100, judge_fn=None, retention=3600, analyze_fn=None):
+        """
+        Args:
+            db_path (str): SQLite database file shared by all processes
+            workers (int): Judge threads started by start(); 0 relies on
+                standalone worker processes
+            max_depth (int): Queued jobs allowed before submit() rejects
+            judge_fn (callable): judge_fn(code, language, problem, fail_fast,
+                on_case) returning the submission summary; defaults to
+                judge.judge_submission
+            retention (float): Seconds finished jobs are kept for polling
+                before they are deleted
+            analyze_fn (callable): analyze_fn(code, language, problem)
+                returning the result of a 'complexity' job; defaults to
+                complexity.analyze_complexity
+        """
+        self.db_path = db_path
+        self.workers = workers
+        self.max_depth = max_depth
+        self.judge_fn = judge_fn or judge.judge_submission
+        self.retention = retention
+        self.analyze_fn = analyze_fn or complexity.analyze_complexity
+        self._last_maintenance = 0.0
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+            # Databases created before jobs had a kind
+            if 'kind' not in {row['name'] for row in conn.execute("PRAGMA table_info(jobs)")}:
+                try:
+                    conn.execute("ALTER TABLE jobs ADD COLUMN kind TEXT NOT NULL DEFAULT 'submission'")
+                except sqlite3.OperationalError:
+                    pass  # Added by another process meanwhile
+
+    def submit(self, code, language, problem_id, fail_fast=False, kind='submission'):
+        """
+        Queue a submission, or with kind='complexity' a complexity analysis
+
+        Returns:
+            str: Job ID
+
+        Raises:
+            QueueFullError: The queue already holds max_depth jobs
+        """
+        job_id = uuid.uuid4().hex
+        with self._connect() as conn:
+            # Count and insert in one write transaction so concurrent
+            # submitters cannot overshoot the limit
+            conn.execute("BEGIN IMMEDIATE")
+            depth = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued'").fetchone()[0]
+            if depth >= self.max_depth:
+                conn.execute("ROLLBACK")
+                raise QueueFullError(f"Judge queue is full ({depth} submissions waiting)")
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, problem_id, language, code, fail_fast, created) "
+                "VALUES (?, ?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, kind, problem_id, language, code, int(fail_fast), time.time())
+            )
+            conn.execute("COMMIT")
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id):
+        """
+        Return a job's status and the test cases finished so far
+
+        Returns:
+            dict: id, kind, status (queued, running, done, error), position in
+                queue, cases (index -> graded case), result once done; or
+                None for an unknown job
+        """
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT id, kind, status, problem_id, language, created, started, finished, result, error "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            cases = conn.execute(
+                "SELECT case_index, result FROM job_cases WHERE job_id = ? ORDER BY case_index",
+                (job_id,)
+            ).fetchall()
+            position = None
+            if row['status'] == 'queued':
+                position = conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND created <= ?",
+                    (row['created'],)
+                ).fetchone()[0]
+
+        return {
+            'id': row['id'],
+            'kind': row['kind'],
+            'status': row['status'],
+            'problem_id': row['problem_id'],
+            'language': row['language'],
+            'queue_position': position,
+            'cases': {index: json.loads(result) for index, result in cases},
+            'result': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'queued_seconds': (row['started'] or time.time()) - row['created'],
+            'run_seconds': (row['finished'] or time.time()) - row['started'] if row['started'] else None
+        }
+
+    def stats(self):
+        """Return queue depth and job counts by status"""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {
+            'queue_depth': counts.get('queued', 0),
+            'running': counts.get('running', 0),
+            'done': counts.get('done', 0),
+            'failed': counts.get('error', 0),
+            'max_depth': self.max_depth,
+            'workers': len(self._threads)
+        }
+
+    def start(self):
+        """Start the judge worker threads (idempotent)"""
+        with self._lock:
+            if self._threads:
+                return
+            self.maintain()
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self.work, name=f"judge-worker-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self):
+        """Ask worker threads to exit after their current job"""
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        self._stop.clear()
+
+    def work(self):
+        """Worker loop: claim and run jobs until stop() is called"""
+        worker_id = f"{os.getpid()}-{threading.get_ident()}"
+        while not self._stop.is_set():
+            self._maintain_if_due()
+            job = self._claim(worker_id)
+            if job is None:
+                self._wakeup.wait(self.POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            self._run(job)
+
+    def _claim(self, worker_id):
+        """Atomically move the oldest queued job to running"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, kind, problem_id, language, code, fail_fast FROM jobs "
+                "WHERE status = 'queued' ORDER BY created LIMIT 1"
+            ).fetchone()
+            if row is None:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', worker = ?, started = ? WHERE id = ?",
+                (worker_id, time.time(), row['id'])
+            )
+            conn.execute("COMMIT")
+        return {**dict(row), 'worker': worker_id}
+
+    def _run(self, job):
+        """Run one claimed job, recording each judged case as it finishes"""
+        def on_case(index, graded_case):
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO job_cases (job_id, case_index, result) VALUES (?, ?, ?)",
+                    (job['id'], index, json.dumps(graded_case))
+                )
+
+        try:
+            problem = problems.get_problem(job['problem_id'])
+            if not problem:
+                raise ValueError("Problem not found")
+            if job['kind'] == 'complexity':
+                result = self.analyze_fn(job['code'], job['language'], problem)
+            else:
+                result = self.judge_fn(
+                    job['code'], job['language'], problem, bool(job['fail_fast']), on_case
+                )
+            status, result_json, error = 'done', json.dumps(result), None
+        except Exception as e:
+            status, result_json, error = 'error', None, str(e)
+
+        with self._connect() as conn:
+            # A job requeued as stale meanwhile belongs to its new worker
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ?, code = '' "
+                "WHERE id = ? AND worker = ?",
+                (status, time.time(), result_json, error, job['id'], job['worker'])
+            )
+
+    def maintain(self):
+        """Requeue stale jobs and delete finished jobs past the retention period"""
+        self._last_maintenance = time.time()
+        self._requeue_stale()
+        self._prune_finished()
+
+    def _maintain_if_due(self):
+        with self._lock:
+            if time.time() - self._last_maintenance < self.MAINTENANCE_INTERVAL:
+                return
+            self._last_maintenance = time.time()
+        try:
+            self.maintain()
+        except sqlite3.Error as e:
+            print(f"Judge queue maintenance failed: {e}")
+
+    def _prune_finished(self):
+        """Delete finished jobs, and their cases, older than the retention period"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "DELETE FROM job_cases WHERE job_id IN "
+                "(SELECT id FROM jobs WHERE status IN ('done', 'error') AND finished < ?)",
+                (time.time() - self.retention,)
+            )
+            conn.execute(
+                "DELETE FROM jobs WHERE status IN ('done', 'error') AND finished < ?",
+                (time.time() - self.retention,)
+            )
+            conn.execute("COMMIT")
+
+    def _requeue_stale(self):
+        """Put jobs abandoned by a crashed worker back on the queue"""
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET status = 'queued', worker = NULL, started = NULL "
+                "WHERE status = 'running' AND started < ?",
+                (time.time() - self.STALE_AFTER,)
+            )
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _closing(conn)
+
+
+class _closing:
+    """Context manager that closes a sqlite3 connection (autocommit mode)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        self.conn.close()
+
+
+# Shared queue instance used by the routes
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_judge_queue():
+    """Return the shared queue, starting its worker threads on first use"""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JudgeQueue(
+                os.getenv("JUDGE_QUEUE_DB", os.path.join(tempfile.gettempdir(), "judge_queue.sqlite3")),
+                workers=int(os.getenv("JUDGE_WORKERS", "2")),
+                max_depth=int(os.getenv("JUDGE_QUEUE_MAX_DEPTH", "100")),
+                retention=float(os.getenv("JUDGE_JOB_RETENTION", "3600"))
+            )
+            _queue.start()
+        return _queue
+
+
+if __name__ == '__main__':
+    # Standalone judge worker process sharing the web app's queue database
+    from dotenv import load_dotenv
+    load_dotenv()
+    queue = get_judge_queue()
+    print(f"Judge worker running {queue.workers} threads on {queue.db_path}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        queue.stop()
@@ -0,0 +1,268 @@
+import java.io.BufferedInputStream;
+import java.io.BufferedOutputStream;
+import java.io.ByteArrayInputStream;
+import java.io.BufferedReader;
+import java.io.File;
+import java.io.FileDescriptor;
+import java.io.FileInputStream;
+import java.io.FileOutputStream;
+import java.io.FilterOutputStream;
+import java.io.IOException;
+import java.io.InputStream;
+import java.io.InputStreamReader;
+import java.io.OutputStream;
+import java.io.PrintStream;
+import java.lang.management.ManagementFactory;
+import java.lang.management.ThreadMXBean;
+import java.lang.reflect.InvocationTargetException;
+import java.lang.reflect.Method;
+import java.net.URL;
+import java.net.URLClassLoader;
+import java.util.ArrayList;
+import java.util.Arrays;
+import java.util.HashMap;
+import java.util.HashSet;
+import java.util.List;
+import java.util.Map;
+import java.util.Set;
+
+/**
+ * Long-lived JVM that runs submitted classes on request.
+ *
+ * Reads one job per line from stdin:
+ *   classDir \t className \t stdinFile \t stdoutFile \t stderrFile \t timeoutMillis \t cpuMillis \t outputLimit
+ * and answers on the original stdout with one line:
+ *   OK|ERROR|TIMEOUT|CPU_LIMIT|OUTPUT_LIMIT \t elapsedMillis \t cpuMillis \t threadsLeft
+ *
+ * Every job gets its own class loader, so static state never leaks between
+ * submissions. The threads alive when the runner starts are its own and
+ * the JVM's; any other thread belongs to the job, whatever thread group or
+ * pool (e.g. ForkJoinPool.commonPool) it runs in. A run ends like a JVM
+ * would exit: once no non-daemon thread of the job is left. The CPU time of
+ * the job's threads and the bytes it writes to stdout are capped like a
+ * forked run.
+ *
+ * Threads cannot be stopped safely, so the JVM halts after any reply other
+ * than OK or ERROR, and after any job that left a thread of any kind
+ * alive; the pool then replaces it. Jobs are read from the stdin file
+ * descriptor directly, and System.in, System.out and System.err point
+ * nowhere between jobs, so a submission can neither read the control pipe
+ * nor write to it.
+ */
+public class JudgeRunner {
+    // How often a running job's CPU time and output are checked
+    private static final long POLL_MILLIS = 5;
+
+    private static final ThreadMXBean THREADS = ManagementFactory.getThreadMXBean();
+
+    private static volatile PrintStream currentOut;
+
+    // Threads of the runner and the JVM itself
+    private static Set<Thread> baseline;
+
+    public static void main(String[] args) throws Exception {
+        BufferedReader control = new BufferedReader(
+            new InputStreamReader(new FileInputStream(FileDescriptor.in), "UTF-8"));
+        PrintStream reply = new PrintStream(new FileOutputStream(FileDescriptor.out), true, "UTF-8");
+        PrintStream discard = new PrintStream(OutputStream.nullOutputStream());
+        System.setIn(new ByteArrayInputStream(new byte[0]));
+        System.setOut(discard);
+        System.setErr(discard);
+
+        // A submission calling System.exit() ends this JVM; flush what it printed first
+        Runtime.getRuntime().addShutdownHook(new Thread(() -> {
+            PrintStream out = currentOut;
+            if (out != null) {
+                out.flush();
+            }
+        }));
+
+        baseline = new HashSet<>(Arrays.asList(liveThreads()));
+
+        // Signal readiness so the pool knows class loading is done
+        reply.println("READY");
+
+        String line;
+        while ((line = control.readLine()) != null) {
+            String[] fields = line.split("\t");
+            String[] result = run(fields[0], fields[1], fields[2], fields[3], fields[4],
+                                  Long.parseLong(fields[5]), Long.parseLong(fields[6]), Long.parseLong(fields[7]));
+            reply.println(String.join("\t", result));
+            String status = result[0];
+            if (!(status.equals("OK") || status.equals("ERROR")) || !result[3].equals("0")) {
+                Runtime.getRuntime().halt(0);
+            }
+        }
+    }
+
+    private static String[] run(String classDir, String className, String inPath, String outPath,
+                                String errPath, long timeoutMillis, long cpuMillis, long outputLimit) {
+        InputStream originalIn = System.in;
+        PrintStream originalOut = System.out;
+        PrintStream originalErr = System.err;
+        long start = System.nanoTime();
+        Map<Long, Long> cpuTimes = new HashMap<>();
+
+        try (InputStream in = new BufferedInputStream(new FileInputStream(inPath));
+             CappedOutputStream capped = new CappedOutputStream(new FileOutputStream(outPath), outputLimit);
+             PrintStream out = new PrintStream(new BufferedOutputStream(capped), false, "UTF-8");
+             PrintStream err = new PrintStream(new CappedOutputStream(new FileOutputStream(errPath), outputLimit),
+                                               true, "UTF-8");
+             URLClassLoader loader = new URLClassLoader(
+                 new URL[]{new File(classDir).toURI().toURL()},
+                 ClassLoader.getPlatformClassLoader())) {
+
+            currentOut = out;
+            System.setIn(in);
+            System.setOut(out);
+            System.setErr(err);
+
+            final Throwable[] failure = new Throwable[1];
+            // Not a daemon, so threads the submission starts are not daemons either
+            Thread submission = new Thread(() -> {
+                try {
+                    Class<?> mainClass = Class.forName(className, true, loader);
+                    Method main = mainClass.getMethod("main", String[].class);
+                    main.invoke(null, (Object) new String[0]);
+                } catch (InvocationTargetException e) {
+                    failure[0] = e.getCause();
+                } catch (Throwable e) {
+                    failure[0] = e;
+                }
+            }, "main");
+            submission.start();
+
+            long deadline = start + timeoutMillis * 1_000_000;
+            String status = null;
+            while (status == null) {
+                Thread[] threads = jobThreads();
+                Thread running = null;
+                for (Thread thread : threads) {
+                    if (!thread.isDaemon()) {
+                        running = thread;
+                        break;
+                    }
+                }
+                if (capped.exceeded()) {
+                    status = "OUTPUT_LIMIT";
+                } else if (cpuTime(threads, cpuTimes) > cpuMillis * 1_000_000) {
+                    status = "CPU_LIMIT";
+                } else if (running == null) {
+                    status = failure[0] != null ? "ERROR" : "OK";
+                } else if (System.nanoTime() >= deadline) {
+                    status = "TIMEOUT";
+                } else {
+                    running.join(POLL_MILLIS);
+                }
+            }
+            out.flush();
+            if (status.equals("OK") && capped.exceeded()) {
+                status = "OUTPUT_LIMIT";
+            }
+            if (status.equals("ERROR")) {
+                err.print("Exception in thread \"main\" ");
+                failure[0].printStackTrace(err);
+            }
+            return outcome(status, start, cpuTimes);
+        } catch (Throwable e) {
+            // Setting up the run failed (unreadable files, bad class dir)
+            try (PrintStream err = new PrintStream(new FileOutputStream(errPath, true), true, "UTF-8")) {
+                e.printStackTrace(err);
+            } catch (Throwable ignored) {
+                // Nothing more we can report
+            }
+            return outcome("ERROR", start, cpuTimes);
+        } finally {
+            currentOut = null;
+            System.setIn(originalIn);
+            System.setOut(originalOut);
+            System.setErr(originalErr);
+        }
+    }
+
+    private static String[] outcome(String status, long start, Map<Long, Long> cpuTimes) {
+        long cpu = 0;
+        for (long time : cpuTimes.values()) {
+            cpu += time;
+        }
+        return new String[]{status, String.valueOf((System.nanoTime() - start) / 1_000_000),
+                            String.valueOf(cpu / 1_000_000), String.valueOf(jobThreads().length)};
+    }
+
+    /** Every live thread of the JVM */
+    private static Thread[] liveThreads() {
+        ThreadGroup root = Thread.currentThread().getThreadGroup();
+        while (root.getParent() != null) {
+            root = root.getParent();
+        }
+        Thread[] threads = new Thread[root.activeCount() + 16];
+        int count;
+        while ((count = root.enumerate(threads, true)) == threads.length) {
+            threads = new Thread[threads.length * 2];
+        }
+        return Arrays.copyOf(threads, count);
+    }
+
+    /** Live threads outside the baseline, i.e. started by jobs */
+    private static Thread[] jobThreads() {
+        List<Thread> threads = new ArrayList<>();
+        for (Thread thread : liveThreads()) {
+            if (!baseline.contains(thread)) {
+                threads.add(thread);
+            }
+        }
+        return threads.toArray(new Thread[0]);
+    }
+
+    /**
+     * Update the last CPU time seen for each live thread and return the
+     * total, which keeps counting threads that have since finished
+     */
+    @SuppressWarnings("deprecation")
+    private static long cpuTime(Thread[] threads, Map<Long, Long> cpuTimes) {
+        for (Thread thread : threads) {
+            long time = THREADS.getThreadCpuTime(thread.getId());
+            if (time >= 0) {
+                cpuTimes.put(thread.getId(), time);
+            }
+        }
+        long total = 0;
+        for (long time : cpuTimes.values()) {
+            total += time;
+        }
+        return total;
+    }
+
+    /** Writes at most `limit` bytes and drops the rest */
+    private static final class CappedOutputStream extends FilterOutputStream {
+        private final long limit;
+        private long written;
+        private volatile boolean exceeded;
+
+        CappedOutputStream(OutputStream out, long limit) {
+            super(out);
+            this.limit = limit;
+        }
+
+        boolean exceeded() {
+            return exceeded;
+        }
+
+        @Override
+        public synchronized void write(int b) throws IOException {
+            write(new byte[]{(byte) b}, 0, 1);
+        }
+
+        @Override
+        public synchronized void write(byte[] b, int off, int len) throws IOException {
+            if (written + len > limit) {
+                exceeded = true;
+                len = (int) (limit - written);
+            }
+            if (len > 0) {
+                out.write(b, off, len);
+                written += len;
+            }
+        }
+    }
+}
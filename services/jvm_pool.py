@@ -0,0 +1,252 @@
+"""
+Pool of long-lived JVMs for running Java submissions.
+
+Starting a JVM and warming up its JIT costs far more than running the
+small programs in our problem set. With this optional backend each
+submission is loaded into a fresh class loader inside an already running
+JVM (see jvm/JudgeRunner.java), with stdin/stdout redirected to files and
+`main` run under the same wall-clock, CPU time and output limits as a
+forked run. A JVM that hits a limit, exits, stops answering or is left
+with threads of a finished submission is discarded and replaced.
+"""
+import hashlib
+import os
+import select
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+import uuid
+
+RUNNER_SOURCE = os.path.join(os.path.dirname(__file__), 'jvm', 'JudgeRunner.java')
+
+# Seconds to wait for a new JVM to report READY
+STARTUP_TIMEOUT = 15
+
+# Extra seconds the pool waits past the time limit before killing a JVM
+# that did not report back on its own
+REPLY_GRACE = 1
+
+# Default cap on a run's stdout (in bytes); CodeExecutor passes its own
+OUTPUT_LIMIT = 8 * 1024 * 1024
+
+
+def _compile_runner():
+    """Compile JudgeRunner.java once per source version and return its directory"""
+    with open(RUNNER_SOURCE, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    runner_dir = os.path.join(tempfile.gettempdir(), f"judge_runner_{digest}")
+    if os.path.exists(os.path.join(runner_dir, 'JudgeRunner.class')):
+        return runner_dir
+
+    os.makedirs(runner_dir, exist_ok=True)
+    result = subprocess.run(
+        ['javac', '-d', runner_dir, RUNNER_SOURCE],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise OSError(f"Could not compile JudgeRunner: {result.stderr}")
+    return runner_dir
+
+
+class JvmWorker:
+    """One long-lived JVM running JudgeRunner"""
+
+    def __init__(self, runner_dir, memory_limit_mb, preexec_fn=os.setsid):
+        self.runs = 0
+        self.process = subprocess.Popen(
+            ['java', f'-Xmx{memory_limit_mb}m', '-XX:+UseSerialGC', '-cp', runner_dir, 'JudgeRunner'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            preexec_fn=preexec_fn
+        )
+        if self._read_line(STARTUP_TIMEOUT) != 'READY':
+            self.kill()
+            raise OSError("JVM worker failed to start")
+
+    def run(self, class_dir, class_name, stdin_data, timeout, stdin_path=None, cpu_limit=None,
+            output_limit=OUTPUT_LIMIT):
+        """
+        Run a compiled class's main method
+
+        Args:
+            class_dir (str): Directory holding the compiled classes
+            class_name (str): Class with the main method
+            stdin_data (str): Input data for the program
+            timeout (float): Wall-clock limit in seconds
+            stdin_path (str): File to use as stdin instead of stdin_data
+            cpu_limit (float): CPU time limit of the submission's threads in
+                seconds; defaults to the wall-clock limit
+            output_limit (int): Bytes of stdout kept before the run is
+                stopped
+
+        Returns:
+            dict: stdout, stderr, returncode, time, cpu_time, the
+                timed_out / cpu_exceeded / output_exceeded flags, and a
+                healthy flag telling the pool whether to keep the JVM
+        """
+        # Unique names, as cases of one submission may run concurrently
+        run_id = uuid.uuid4().hex
+        in_path = stdin_path or os.path.join(class_dir, f'.jvm_stdin_{run_id}')
+        out_path = os.path.join(class_dir, f'.jvm_stdout_{run_id}')
+        err_path = os.path.join(class_dir, f'.jvm_stderr_{run_id}')
+        if stdin_path is None:
+            with open(in_path, 'w') as f:
+                f.write(stdin_data)
+
+        self.runs += 1
+        start = time.perf_counter()
+        try:
+            self.process.stdin.write('\t'.join([
+                class_dir, class_name, in_path, out_path, err_path, str(int(timeout * 1000)),
+                str(int((cpu_limit or timeout) * 1000)), str(output_limit)
+            ]) + '\n')
+            self.process.stdin.flush()
+            reply = self._read_line(timeout + REPLY_GRACE)
+        except (BrokenPipeError, OSError):
+            reply = ''
+        elapsed = time.perf_counter() - start
+
+        try:
+            fields = reply.split('\t') if reply else [reply]
+            status = fields[0]
+            if status is None or status == 'TIMEOUT':
+                self.kill()
+                return {'stdout': '', 'stderr': '', 'returncode': None, 'time': elapsed, 'cpu_time': None,
+                        'timed_out': True, 'cpu_exceeded': False, 'output_exceeded': False, 'healthy': False}
+
+            stdout = self._read_file(out_path, output_limit)
+            stderr = self._read_file(err_path, output_limit)
+            if status == '':
+                # The submission called System.exit() or the JVM died
+                return_code = self.process.wait()
+                return {'stdout': stdout, 'stderr': stderr, 'returncode': return_code, 'time': elapsed,
+                        'cpu_time': None, 'timed_out': False, 'cpu_exceeded': False, 'output_exceeded': False,
+                        'healthy': False}
+
+            # Threads still running after the reply could write into the
+            # next job's files, so such a JVM is never reused
+            threads_left = int(fields[3])
+            return {'stdout': stdout, 'stderr': stderr, 'returncode': 0 if status == 'OK' else 1,
+                    'time': elapsed, 'cpu_time': int(fields[2]) / 1000, 'timed_out': False,
+                    'cpu_exceeded': status == 'CPU_LIMIT', 'output_exceeded': status == 'OUTPUT_LIMIT',
+                    'healthy': status in ('OK', 'ERROR') and threads_left == 0}
+        finally:
+            for path in [out_path, err_path] + ([in_path] if stdin_path is None else []):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def kill(self):
+        """Stop the JVM and any threads the submission left behind"""
+        if self.alive():
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        self.process.wait()
+
+    def _read_line(self, timeout):
+        """Read one reply line, '' at EOF, or None if nothing arrives in time"""
+        ready, _, _ = select.select([self.process.stdout], [], [], timeout)
+        if not ready:
+            return None
+        return self.process.stdout.readline().rstrip('\n')
+
+    @staticmethod
+    def _read_file(path, limit):
+        """Read at most limit bytes of a run's output file"""
+        if not os.path.exists(path):
+            return ''
+        with open(path, 'rb') as f:
+            return f.read(limit).decode('utf-8', errors='replace')
+
+
+class JvmPool:
+    """Hands out warm JVM workers and recycles misbehaving ones"""
+
+    def __init__(self, size, memory_limit_mb=256, max_runs=100, preexec_fn=os.setsid):
+        """
+        Args:
+            size (int): Maximum number of idle JVMs kept between runs
+            memory_limit_mb (int): Heap limit passed to each JVM as -Xmx
+            max_runs (int): Runs after which a JVM is replaced, bounding
+                anything leaked through the platform class loader
+            preexec_fn (callable): Run in each JVM before exec; it must
+                start a new session, as workers are killed by process group
+        """
+        self.size = size
+        self.memory_limit_mb = memory_limit_mb
+        self.max_runs = max_runs
+        self.preexec_fn = preexec_fn
+        self.recycled = 0
+        self._idle = []
+        self._runner_dir = None
+        self._lock = threading.Lock()
+
+    def run(self, class_dir, class_name, stdin_data, timeout, stdin_path=None, cpu_limit=None,
+            output_limit=OUTPUT_LIMIT):
+        """Run a compiled class on a warm JVM (see JvmWorker.run)"""
+        worker = self._acquire()
+        result = worker.run(class_dir, class_name, stdin_data, timeout, stdin_path, cpu_limit, output_limit)
+        self._release(worker, result['healthy'])
+        return result
+
+    def stats(self):
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle), 'recycled': self.recycled}
+
+    def shutdown(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for worker in idle:
+            worker.kill()
+
+    def _acquire(self):
+        with self._lock:
+            while self._idle:
+                worker = self._idle.pop()
+                if worker.alive():
+                    return worker
+            if self._runner_dir is None:
+                self._runner_dir = _compile_runner()
+            runner_dir = self._runner_dir
+        return JvmWorker(runner_dir, self.memory_limit_mb, self.preexec_fn)
+
+    def _release(self, worker, healthy):
+        with self._lock:
+            if healthy and worker.alive() and worker.runs < self.max_runs and len(self._idle) < self.size:
+                self._idle.append(worker)
+                return
+            self.recycled += 1
+        worker.kill()
+
+
+# Shared pool instance used by CodeExecutor
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_jvm_pool(memory_limit_mb=256, preexec_fn=os.setsid):
+    """
+    Return the shared JVM pool, or None unless JAVA_BACKEND=pool
+
+    Args:
+        memory_limit_mb (int): Heap limit of each JVM
+        preexec_fn (callable): Applied to JVMs when the pool is first
+            created (CodeExecutor passes its process limits)
+    """
+    global _pool
+    if os.getenv("JAVA_BACKEND", "cold") != "pool":
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = JvmPool(int(os.getenv("JVM_POOL_SIZE", "2")), memory_limit_mb, preexec_fn=preexec_fn)
+        return _pool
@@ -0,0 +1,231 @@
+"""
+Registry of the languages submissions can be written in.
+
+Each LanguageRuntime declares how a submission is laid out in its
+workspace, how it is compiled (if at all), how it is run and which build
+outputs the compile cache keeps. CodeExecutor drives every language
+through the same prepare and run steps, so supporting a new language is
+a register_runtime() call rather than new executor code.
+
+Commands are lists of arguments with {placeholders} filled in for each
+submission: {workspace}, {source}, {exe}, {class_name} and {memory_mb};
+an argument that is exactly {flags} expands to the compiler flags.
+"""
+import os
+import re
+import shutil
+import tempfile
+
+
+class LanguageRuntime:
+    """How to build and run submissions in one language"""
+
+    def __init__(self, name, label, source_file, run_cmd, compile_cmd=None, flags=None,
+                 quick_flags=None, cache_artifacts=None, compile_timeout=10, compile_env=None,
+                 run_env=None, version_flag='--version', memory_rlimit='address_space', class_name_pattern=None,
+                 precompiled_headers=False, editor_mode=None, starter_from=None, default_starter=''):
+        """
+        Args:
+            name (str): Language id used by the API, e.g. 'cpp'
+            label (str): Name shown in the editor
+            source_file (str): Source file name inside the workspace
+            run_cmd (list): Command that runs the program
+            compile_cmd (list): Compiler command; None for interpreted
+                languages
+            flags (list): Compiler flags (part of the compile cache key)
+            quick_flags (list): Flags for quick builds ("Run"); defaults
+                to flags
+            cache_artifacts (list): Glob patterns, relative to the
+                workspace, of the build outputs to cache
+            compile_timeout (int): Seconds a compilation may take
+            compile_env (dict): Extra environment for the compiler
+            run_env (dict): Extra environment for the program (values may
+                use the placeholders)
+            version_flag (str): Argument that makes the compiler print its
+                version, which is part of the compile cache key
+            memory_rlimit (str): How memory is capped: 'address_space'
+                (RLIMIT_AS), 'data' (RLIMIT_DATA, for runtimes that reserve
+                large virtual ranges up front) or None when run_cmd caps
+                the heap itself
+            class_name_pattern (str): Regex whose first group names the
+                {class_name} the source must be saved as
+            precompiled_headers (bool): Compile with the precompiled <bits/stdc++.h> on the include path
+            editor_mode (str): Monaco editor language; defaults to name
+            starter_from (str): Language whose starter code this one
+                shares, e.g. PyPy runs the Python starter code
+            default_starter (str): Starter code for problems that have
+                none for this language
+        """
+        self.name = name
+        self.label = label
+        self.source_file = source_file
+        self.run_cmd = list(run_cmd)
+        self.compile_cmd = list(compile_cmd) if compile_cmd else None
+        self.flags = list(flags or [])
+        self.quick_flags = list(quick_flags) if quick_flags is not None else self.flags
+        self.cache_artifacts = list(cache_artifacts or [])
+        self.compile_timeout = compile_timeout
+        self.compile_env = compile_env or {}
+        self.run_env = run_env or {}
+        self.version_flag = version_flag
+        self.memory_rlimit = memory_rlimit
+        self.class_name_pattern = class_name_pattern
+        self.precompiled_headers = precompiled_headers
+        self.editor_mode = editor_mode or name
+        self.starter_from = starter_from
+        self.default_starter = default_starter
+
+    @property
+    def compiler(self):
+        return self.compile_cmd[0] if self.compile_cmd else None
+
+    def available(self):
+        """Whether the compiler and runtime are installed"""
+        tools = {self.compiler, self.run_cmd[0]}
+        # Compiled programs ({exe}) need nothing installed to run
+        return all(shutil.which(tool) for tool in tools if tool and not tool.startswith('{'))
+
+    def class_name(self, code):
+        """The class the source must be named after, or None if not found"""
+        match = re.search(self.class_name_pattern, code)
+        return match.group(1) if match else None
+
+    @staticmethod
+    def format_command(template, variables, flags=()):
+        """Fill in a command template"""
+        command = []
+        for arg in template:
+            if arg == '{flags}':
+                command.extend(flags)
+            else:
+                command.append(arg.format(**variables))
+        return command
+
+    def starter_code(self, problem):
+        """Starter code for a problem, falling back to a generic template"""
+        starters = problem.get('starter_code', {})
+        return starters.get(self.name) or starters.get(self.starter_from) or self.default_starter
+
+
+_runtimes = {}
+
+
+def register_runtime(runtime):
+    """Add a language, or replace the one with the same name"""
+    _runtimes[runtime.name] = runtime
+
+
+def get_runtime(language):
+    """
+    Look up a language
+
+    Raises:
+        ValueError: If the language is not registered
+    """
+    runtime = _runtimes.get(language)
+    if runtime is None:
+        raise ValueError(f"Unsupported language: {language}")
+    return runtime
+
+
+def list_runtimes(available_only=False):
+    """Registered runtimes in registration order"""
+    return [runtime for runtime in _runtimes.values() if not available_only or runtime.available()]
+
+
+register_runtime(LanguageRuntime(
+    'python', 'Python', 'solution.py',
+    run_cmd=['python3', '{source}']
+))
+
+register_runtime(LanguageRuntime(
+    'cpp', 'C++', 'solution.cpp',
+    compile_cmd=['g++', '{flags}', '{source}', '-o', '{exe}'],
+    run_cmd=['{exe}'],
+    flags=['-std=c++17', '-O2'],
+    # Compile time dominates quick builds
+    quick_flags=['-std=c++17', '-O0'],
+    cache_artifacts=['solution'],
+    precompiled_headers=True
+))
+
+register_runtime(LanguageRuntime(
+    'java', 'Java', '{class_name}.java',
+    compile_cmd=['javac', '{source}'],
+    run_cmd=['java', '-Xmx{memory_mb}m', '-cp', '{workspace}', '{class_name}'],
+    # Nested and helper classes produce extra .class files
+    cache_artifacts=['*.class'],
+    version_flag='-version',
+    memory_rlimit=None,
+    class_name_pattern=r'public\s+class\s+(\w+)'
+))
+
+register_runtime(LanguageRuntime(
+    'pypy', 'Python (PyPy)', 'solution.py',
+    run_cmd=['pypy3', '{source}'],
+    editor_mode='python',
+    starter_from='python'
+))
+
+register_runtime(LanguageRuntime(
+    'javascript', 'JavaScript (Node.js)', 'solution.js',
+    run_cmd=['node', '--max-old-space-size={memory_mb}', '{source}'],
+    # V8 reserves far more address space than it uses
+    memory_rlimit='data',
+    default_starter="""const lines = require('fs').readFileSync(0, 'utf8').split('\\n');
+
+// Write your code here
+"""
+))
+
+register_runtime(LanguageRuntime(
+    'go', 'Go', 'solution.go',
+    compile_cmd=['go', 'build', '{flags}', '-o', '{exe}', '{source}'],
+    run_cmd=['{exe}'],
+    # Quick builds skip optimizations and inlining
+    quick_flags=['-gcflags=all=-N -l'],
+    cache_artifacts=['solution'],
+    compile_timeout=30,
+    compile_env={
+        'GOCACHE': os.path.join(tempfile.gettempdir(), 'judge_go_build_cache'),
+        'GO111MODULE': 'off'
+    },
+    # The Go runtime reserves its heap address range up front; GOMEMLIMIT
+    # makes the collector work harder before the hard limit is reached
+    run_env={'GOMEMLIMIT': '{memory_mb}MiB'},
+    memory_rlimit='data',
+    version_flag='version',
+    default_starter="""package main
+
+import (
+\t"bufio"
+\t"fmt"
+\t"os"
+)
+
+func main() {
+\treader := bufio.NewReader(os.Stdin)
+\t// Write your code here
+\t_ = reader
+\tfmt.Println()
+}
+"""
+))
+
+register_runtime(LanguageRuntime(
+    'rust', 'Rust', 'solution.rs',
+    compile_cmd=['rustc', '{flags}', '-o', '{exe}', '{source}'],
+    run_cmd=['{exe}'],
+    flags=['--edition=2021', '-O'],
+    quick_flags=['--edition=2021', '-C', 'opt-level=0'],
+    cache_artifacts=['solution'],
+    compile_timeout=30,
+    default_starter="""use std::io::{self, Read};
+
+fn main() {
+    let mut input = String::new();
+    io::stdin().read_to_string(&mut input).unwrap();
+    // Write your code here
+}
+"""
+))
@@ -0,0 +1,101 @@
+"""
+Launcher that measures the peak memory of a program by itself.
+
+ru_maxrss of a child includes the resident set it inherited when it was
+forked, and the value survives exec. Every run is forked from the web
+process, which holds the embeddings model, so wait4 reported hundreds of
+MB for a hello-world. native/launcher.c forks the program from its own
+small image instead and writes the program's peak RSS to a report file
+named after the launcher's pid, which the executor reads after reaping
+the launcher. Without a C compiler no launcher is available and peak
+memory is not reported.
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+
+LAUNCHER_SOURCE = os.path.join(os.path.dirname(__file__), 'native', 'launcher.c')
+
+C_COMPILERS = ['cc', 'gcc', 'clang']
+
+
+class Launcher:
+    """A compiled launcher and the directory it writes its reports to"""
+
+    def __init__(self, path, report_dir):
+        self.path = path
+        self.report_dir = report_dir
+
+    def command(self, cmd):
+        """Return cmd wrapped in the launcher"""
+        return [self.path, self.report_dir, *cmd]
+
+    def peak_memory(self, pid):
+        """
+        Read and remove the report of a reaped launcher
+
+        Returns:
+            int: Peak RSS of the program in KB, or None when the launcher
+                was killed before it could report
+        """
+        path = os.path.join(self.report_dir, str(pid))
+        try:
+            with open(path) as f:
+                return int(f.read())
+        except (OSError, ValueError):
+            return None
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _compile_launcher():
+    """Compile launcher.c once per source version and return the binary's path"""
+    with open(LAUNCHER_SOURCE, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()[:16]
+    path = os.path.join(tempfile.gettempdir(), f"judge_launcher_{digest}")
+    if os.path.exists(path):
+        return path
+
+    compiler = next((c for c in C_COMPILERS if shutil.which(c)), None)
+    if compiler is None:
+        raise OSError("No C compiler found for the launcher")
+    # Build next to the final path and rename, so concurrent builds never
+    # expose a half-written binary
+    partial = f"{path}.{os.getpid()}"
+    result = subprocess.run(
+        [compiler, '-O2', '-o', partial, LAUNCHER_SOURCE],
+        capture_output=True,
+        text=True,
+        timeout=60
+    )
+    if result.returncode != 0:
+        raise OSError(f"Could not compile the launcher: {result.stderr}")
+    os.replace(partial, path)
+    return path
+
+
+# Shared launcher used by CodeExecutor
+_launcher = None
+_launcher_configured = False
+_launcher_lock = threading.Lock()
+
+
+def get_launcher():
+    """Return the shared launcher, or None when it cannot be built"""
+    global _launcher, _launcher_configured
+    with _launcher_lock:
+        if not _launcher_configured:
+            try:
+                report_dir = os.path.join(tempfile.gettempdir(), 'judge_launcher_reports')
+                os.makedirs(report_dir, exist_ok=True)
+                _launcher = Launcher(_compile_launcher(), report_dir)
+            except (OSError, subprocess.SubprocessError) as e:
+                print(f"Launcher unavailable, peak memory will not be reported: {e}")
+            _launcher_configured = True
+        return _launcher
@@ -0,0 +1,229 @@
+"""
+Response cache for deterministic LLM chains.
+
+Chains that opt in (see llm_chains.CACHED_CHAINS) look up the model's
+reply by the model name and a hash of the fully rendered prompt before
+calling the model, so replaying the same JD and resume does not pay for
+the same Gemini call twice. Two backends are available: an in-memory
+LRU, and a SQLite file shared between processes and kept across
+restarts. Both expire entries after a TTL and evict the least recently
+used entries beyond their size bound. Lookups are counted per chain in
+services.metrics.
+"""
+import collections
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+from services import metrics
+
+
+def make_key(model_name, rendered_prompt):
+    """Cache key for a model and the exact prompt sent to it"""
+    digest = hashlib.sha256()
+    digest.update(model_name.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(rendered_prompt.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MemoryResponseCache:
+    """Bounded in-memory LRU cache of LLM responses"""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        """
+        Args:
+            max_entries (int): Responses kept before the least recently
+                used is evicted
+            ttl (float): Seconds a response stays valid; None keeps it
+                until evicted
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (created, response)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached response, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.time() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, response):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {'backend': 'memory', 'entries': len(self._entries), 'max_entries': self.max_entries,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used);
+"""
+
+
+class SqliteResponseCache:
+    """LLM responses in a SQLite file, with TTL and LRU eviction"""
+
+    def __init__(self, db_path, max_entries=10000, ttl=None):
+        """
+        Args:
+            db_path (str): SQLite file, created if missing
+            max_entries (int): Responses kept before the least recently
+                used are evicted
+            ttl (float): Seconds a response stays valid; None keeps it
+                until evicted
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def get(self, key):
+        """Return the cached response, or None"""
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is not None:
+                conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return row[0]
+
+    def put(self, key, response):
+        if self.max_entries <= 0:
+            return
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, now, now)
+            )
+            if self.ttl is not None:
+                conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def stats(self):
+        with self._connect() as conn:
+            entries = conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            return {'backend': 'sqlite', 'entries': entries, 'max_entries': self.max_entries,
+                    'ttl': self.ttl, 'hits': self.hits, 'misses': self.misses}
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM responses")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _closing(conn)
+
+
+class _closing:
+    """Context manager that closes a sqlite3 connection (autocommit mode)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        self.conn.close()
+
+
+def record_lookup(chain_name, hit):
+    """Count a cache lookup for a chain in services.metrics"""
+    metrics.get_metrics().increment(
+        'llm_cache_lookups_total', help_text='LLM response cache lookups, by chain and result',
+        chain=chain_name, result='hit' if hit else 'miss'
+    )
+
+
+# Shared cache used by the chains in services.llm_chains
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Return the shared response cache, or None when LLM_CACHE is 'off'
+
+    LLM_CACHE picks the backend ('memory', the default, or 'sqlite' at
+    LLM_CACHE_DB); LLM_CACHE_TTL (seconds, 0 for no expiry) and
+    LLM_CACHE_MAX_ENTRIES bound it.
+    """
+    global _cache, _cache_configured
+    with _cache_lock:
+        if not _cache_configured:
+            backend = os.getenv("LLM_CACHE", "memory")
+            ttl = float(os.getenv("LLM_CACHE_TTL", "86400")) or None
+            max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+            if backend == 'sqlite':
+                _cache = SqliteResponseCache(
+                    os.getenv("LLM_CACHE_DB", os.path.join(tempfile.gettempdir(), "llm_cache.sqlite3")),
+                    max_entries, ttl
+                )
+            elif backend == 'memory':
+                _cache = MemoryResponseCache(max_entries, ttl)
+            _cache_configured = True
+        return _cache
+
+
+def set_llm_cache(cache):
+    """Replace the shared response cache (None disables caching)"""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
@@ -1,15 +1,21 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.messages import HumanMessage, SystemMessage
+from langchain_core.messages import AIMessage, SystemMessage
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
 import re
+import threading
+
+from services import llm_cache, semantic_cache
 
 # Initialize LLM (passed from app context or imported after config)
 llm = None # This will be set from app.py after Flask app creation
 
 def set_llm_instance(llm_instance):
     global llm
-    llm = llm_instance
+    with _chains_lock:
+        llm = llm_instance
+        _chains.clear()
 
 # --- Prompt Templates ---
 
@@ -41,7 +47,7 @@ Avoid direct questions from the resume or JD for now.
 {jd_context}
 
 --- Candidate's Resume (for general context of their background) ---
-{resume_context}
+{resume_content}
 
 --- Interview History (for context) ---
 {chat_history}
@@ -155,36 +161,70 @@ Example: "While you may not have direct experience with X, can you explain the c
 Do NOT ask another question about the specific technology they denied.
 """
 
-# --- LLM Chain Definitions ---
+# Single-call turn: answer analysis and the next question in one reply
+INTERVIEW_TURN_PROMPT_TEMPLATE = """
+You are an AI mock interviewer for a {job_role} position. In one reply, analyze the candidate's answer to your last question and then write your next question.
 
-def get_initial_question_chain():
-    return ChatPromptTemplate.from_template(INITIAL_WARMUP_PROMPT_TEMPLATE) | llm | StrOutputParser()
+--- Job Description ---
+{jd_text}
 
-def get_foundational_question_chain():
-    return ChatPromptTemplate.from_template(FOUNDATIONAL_QUESTION_PROMPT_TEMPLATE) | llm | StrOutputParser()
+--- Candidate's Resume ---
+{resume_content}
 
-def get_jd_resume_specific_chain():
-    return ChatPromptTemplate.from_template(JD_RESUME_SPECIFIC_PROMPT_TEMPLATE) | llm | StrOutputParser()
+--- Relevant Context (for inspiration, not direct questioning) ---
+{retrieved_context}
 
-def get_clarifying_question_chain():
-    return ChatPromptTemplate.from_template(CLARIFYING_PROMPT_TEMPLATE) | llm | StrOutputParser()
+--- Interview History ---
+{chat_history_str}
 
-def get_pivot_behavioral_chain():
-    return ChatPromptTemplate.from_template(PIVOT_BEHAVIORAL_PROMPT_TEMPLATE) | llm | StrOutputParser()
+Last Question: {question}
+Candidate's Answer: {answer}
 
-def get_pivot_foundational_chain():
-    return ChatPromptTemplate.from_template(PIVOT_FOUNDATIONAL_PROMPT_TEMPLATE) | llm | StrOutputParser()
+**Feedback:** Give constructive feedback on the answer's relevance to the question and the role, its clarity and conciseness, its completeness (e.g., the STAR method for behavioral questions) and its accuracy against the resume. If the candidate denied knowledge or implied dishonesty, acknowledge this.
+
+**Action:** Choose exactly one:
+- CONTINUE: The answer was generally good; proceed normally.
+- PIVOT_BEHAVIORAL: The candidate denied knowledge of a technical skill; switch to a behavioral question.
+- PIVOT_FOUNDATIONAL: The candidate denied knowledge of a technical skill; switch to a more basic technical question.
+- CLARIFY: The answer was vague, unclear or contradictory.
+- END_INTERVIEW: The answer was highly inappropriate or dismissive, or clearly shows the candidate is not a fit (e.g., admitting the resume is fake, refusing to answer).
+
+**Next question:** Write one clear, concise question that fits the action:
+- CONTINUE: {continue_guidance}
+- PIVOT_BEHAVIORAL: A behavioral question about problem-solving, learning new skills or handling unfamiliar situations, without asking about the technology they denied.
+- PIVOT_FOUNDATIONAL: A foundational or conceptual question on the principles behind the area they did not know, without asking about the specific technology they denied.
+- CLARIFY: Ask them to clarify or expand on the vague or contradictory part of their answer.
+- END_INTERVIEW: Write NONE.
+Do not repeat a question from the interview history. Do not answer the question yourself.
+
+Format your response strictly as follows:
+FEEDBACK: [Your constructive feedback here]
+ACTION: [CONTINUE|PIVOT_BEHAVIORAL|PIVOT_FOUNDATIONAL|CLARIFY|END_INTERVIEW]
+NEXT_QUESTION: [Your next question here]
+"""
 
-def get_ats_score_chain():
-    return ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                "You are an Applicant Tracking System (ATS) evaluator. Your task is to assess how well "
-                "a given resume matches a job description, focusing on skills, experience, and requirements. "
-                "Provide a match score out of 100 and a brief explanation of the score, highlighting "
-                "strengths and areas for improvement. Be concise."
-            ),
-            HumanMessage(content="""
+# --- Parsed Prompts ---
+# Parsed once at import; every chain built from them shares the same object
+
+PROMPTS = {
+    'initial_question': ChatPromptTemplate.from_template(INITIAL_WARMUP_PROMPT_TEMPLATE),
+    'foundational_question': ChatPromptTemplate.from_template(FOUNDATIONAL_QUESTION_PROMPT_TEMPLATE),
+    'jd_resume_specific': ChatPromptTemplate.from_template(JD_RESUME_SPECIFIC_PROMPT_TEMPLATE),
+    'clarifying_question': ChatPromptTemplate.from_template(CLARIFYING_PROMPT_TEMPLATE),
+    'pivot_behavioral': ChatPromptTemplate.from_template(PIVOT_BEHAVIORAL_PROMPT_TEMPLATE),
+    'pivot_foundational': ChatPromptTemplate.from_template(PIVOT_FOUNDATIONAL_PROMPT_TEMPLATE),
+    'interview_turn': ChatPromptTemplate.from_template(INTERVIEW_TURN_PROMPT_TEMPLATE),
+}
+
+ATS_SCORE_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessage(
+            "You are an Applicant Tracking System (ATS) evaluator. Your task is to assess how well "
+            "a given resume matches a job description, focusing on skills, experience, and requirements. "
+            "Provide a match score out of 100 and a brief explanation of the score, highlighting "
+            "strengths and areas for improvement. Be concise."
+        ),
+        ("human", """
 Job Description:
 {jd_text}
 
@@ -198,51 +238,49 @@ Format:
 Score: XX/100
 Rationale: [Your explanation here]
 """)
-        ]
-    ) | llm | StrOutputParser()
-
-def get_keyword_extraction_chain():
-    return ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                "You are an expert HR assistant. Your task is to identify and list "
-                "the most important technical skills, tools, programming languages, methodologies, "
-                "and core requirements mentioned in the job description. "
-                "List them as a comma-separated string, prioritize single words or short phrases. "
-                "Exclude common words like 'experience', 'ability', 'strong', 'good communication', 'team player', 'responsible', 'collaborate'. "
-                "Example: Python, SQL, AWS, Machine Learning, Data Analysis, TensorFlow, Agile, API Development"
-            ),
-            HumanMessage(content="Extract keywords from the following Job Description:\n\n{jd_text}")
-        ]
-    ) | llm | StrOutputParser()
-
-
-def get_answer_analysis_chain():
-    return ChatPromptTemplate.from_messages(
-        [
-            SystemMessage(
-                "You are an expert interview coach and an AI language model. "
-                "Your task is to analyze a candidate's answer to an interview question "
-                "in the context of the job description and their resume. "
-                "Provide constructive feedback. Also, determine the appropriate 'next_action_type' "
-                "for the interviewer based on the answer's content and its implications."
-                "\n\n**Feedback Criteria:**"
-                "\n- **Relevance:** Was the answer relevant to the question and the job role?"
-                "\n- **Clarity & Conciseness:** Was it easy to understand and to the point?"
-                "\n- **Completeness:** Did it fully address the question? (e.g., used STAR method for behavioral questions?)"
-                "\n- **Accuracy:** Was the information presented accurate and consistent with their resume?"
-                "\n- **Adaptability:** If the candidate explicitly denied knowledge or implied dishonesty, acknowledge this."
-                "\n\n**Next Action Types (choose one):**"
-                "\n- `CONTINUE`: The answer was generally good, proceed with a normal follow-up question related to the JD/Resume."
-                "\n- `PIVOT_BEHAVIORAL`: The candidate denied knowledge of a technical skill, needs a behavioral question (e.g., problem-solving, learning new things)."
-                "\n- `PIVOT_FOUNDATIONAL`: The candidate denied knowledge of a technical skill, needs a more basic/foundational technical question."
-                "\n- `CLARIFY`: The answer was vague, unclear, or contradictory, needs a clarifying question."
-                "\n- `END_INTERVIEW`: The candidate's answer was highly inappropriate, dismissive, or clearly indicates they are not a fit (e.g., admitting resume is fake, refusal to answer)."
-                "\n\nFormat your response strictly as follows:"
-                "\nFEEDBACK: [Your constructive feedback here]"
-                "\nACTION: [CONTINUE|PIVOT_BEHAVIORAL|PIVOT_FOUNDATIONAL|CLARIFY|END_INTERVIEW]"
-            ),
-            HumanMessage(content="""
+    ]
+)
+
+KEYWORD_EXTRACTION_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessage(
+            "You are an expert HR assistant. Your task is to identify and list "
+            "the most important technical skills, tools, programming languages, methodologies, "
+            "and core requirements mentioned in the job description. "
+            "List them as a comma-separated string, prioritize single words or short phrases. "
+            "Exclude common words like 'experience', 'ability', 'strong', 'good communication', 'team player', 'responsible', 'collaborate'. "
+            "Example: Python, SQL, AWS, Machine Learning, Data Analysis, TensorFlow, Agile, API Development"
+        ),
+        ("human", "Extract keywords from the following Job Description:\n\n{jd_text}")
+    ]
+)
+
+
+ANSWER_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages(
+    [
+        SystemMessage(
+            "You are an expert interview coach and an AI language model. "
+            "Your task is to analyze a candidate's answer to an interview question "
+            "in the context of the job description and their resume. "
+            "Provide constructive feedback. Also, determine the appropriate 'next_action_type' "
+            "for the interviewer based on the answer's content and its implications."
+            "\n\n**Feedback Criteria:**"
+            "\n- **Relevance:** Was the answer relevant to the question and the job role?"
+            "\n- **Clarity & Conciseness:** Was it easy to understand and to the point?"
+            "\n- **Completeness:** Did it fully address the question? (e.g., used STAR method for behavioral questions?)"
+            "\n- **Accuracy:** Was the information presented accurate and consistent with their resume?"
+            "\n- **Adaptability:** If the candidate explicitly denied knowledge or implied dishonesty, acknowledge this."
+            "\n\n**Next Action Types (choose one):**"
+            "\n- `CONTINUE`: The answer was generally good, proceed with a normal follow-up question related to the JD/Resume."
+            "\n- `PIVOT_BEHAVIORAL`: The candidate denied knowledge of a technical skill, needs a behavioral question (e.g., problem-solving, learning new things)."
+            "\n- `PIVOT_FOUNDATIONAL`: The candidate denied knowledge of a technical skill, needs a more basic/foundational technical question."
+            "\n- `CLARIFY`: The answer was vague, unclear, or contradictory, needs a clarifying question."
+            "\n- `END_INTERVIEW`: The candidate's answer was highly inappropriate, dismissive, or clearly indicates they are not a fit (e.g., admitting resume is fake, refusal to answer)."
+            "\n\nFormat your response strictly as follows:"
+            "\nFEEDBACK: [Your constructive feedback here]"
+            "\nACTION: [CONTINUE|PIVOT_BEHAVIORAL|PIVOT_FOUNDATIONAL|CLARIFY|END_INTERVIEW]"
+        ),
+        ("human", """
 Job Description:
 {jd_text}
 
@@ -255,5 +293,146 @@ Interview History (for context of previous exchanges):
 Last Question: {question}
 Candidate's Answer: {answer}
 """)
-        ]
-    ) | llm | StrOutputParser()
\ No newline at end of file
+    ]
+)
+
+PROMPTS['ats_score'] = ATS_SCORE_PROMPT
+PROMPTS['keyword_extraction'] = KEYWORD_EXTRACTION_PROMPT
+PROMPTS['answer_analysis'] = ANSWER_ANALYSIS_PROMPT
+
+# Chains whose replies depend only on their inputs. Their responses are cached
+# by model and rendered prompt (see services.llm_cache); conversational
+# chains call the model unless the semantic cache (services.semantic_cache)
+# has them in scope.
+CACHED_CHAINS = {'keyword_extraction', 'ats_score'}
+
+def _model_name(llm_instance):
+    return str(getattr(llm_instance, 'model', None) or getattr(llm_instance, 'model_name', None)
+               or type(llm_instance).__name__)
+
+def _store_reply(store):
+    """Pass the model's reply through unchanged, handing its text to store() once complete"""
+    def relay(chunks):
+        content = ""
+        for chunk in chunks:
+            if isinstance(chunk.content, str):
+                content += chunk.content
+            yield chunk
+        if content:
+            store(content)
+
+    return RunnableGenerator(relay)
+
+# The model steps below return the runnable that answers the prompt: the llm
+# itself, the llm followed by a cache write, or a cached message. Returning the
+# llm (rather than its reply) keeps chain.stream() streaming token by token.
+
+def _cached_model(name, llm_instance):
+    """The model step of chain `name`, answered from the response cache when the prompt repeats"""
+    model_name = _model_name(llm_instance)
+
+    def answer(prompt_value):
+        cache = llm_cache.get_llm_cache()
+        if cache is None:
+            return llm_instance
+        key = llm_cache.make_key(model_name, prompt_value.to_string())
+        response = cache.get(key)
+        llm_cache.record_lookup(name, response is not None)
+        if response is not None:
+            return AIMessage(content=response)
+        return llm_instance | _store_reply(lambda content: cache.put(key, content))
+
+    return RunnableLambda(answer, name=f"cached_{name}_model")
+
+def _semantic_chain(name, llm_instance):
+    """The prompt and model steps of chain `name`, answered from the semantic cache when it is in scope"""
+    prompt = PROMPTS[name]
+    model_name = _model_name(llm_instance)
+
+    def answer(inputs):
+        cache = semantic_cache.get_semantic_cache()
+        if cache is None or name not in cache.chains:
+            return prompt | llm_instance
+        # Looked up by the input variables rather than the rendered prompt, so
+        # the template text does not crowd the resume and history out of the
+        # embedding
+        variables = {key: inputs.get(key, '') for key in prompt.input_variables}
+        try:
+            response, pending = cache.lookup(name, model_name, variables)
+        except Exception as e:
+            print(f"Semantic cache lookup failed for {name}, calling the model: {e}")
+            return prompt | llm_instance
+        semantic_cache.record_lookup(name, response is not None)
+        if response is not None:
+            return AIMessage(content=response)
+        return prompt | llm_instance | _store_reply(lambda content: cache.store(pending, content))
+
+    return RunnableLambda(answer, name=f"semantic_{name}")
+
+# --- Chain Registry ---
+# prompt | llm | StrOutputParser() runnables, built once per LLM instance.
+# They are rebuilt when set_llm_instance installs a new model, or when the
+# module's llm attribute is replaced directly.
+
+_chains = {}
+_chains_llm = None
+_chains_lock = threading.Lock()
+
+def get_chain(name):
+    """
+    Return the prebuilt runnable for a prompt in PROMPTS
+
+    Args:
+        name (str): Prompt name, e.g. 'answer_analysis'
+
+    Returns:
+        Runnable: PROMPTS[name] | llm | StrOutputParser() for the current
+            llm, with the llm step going through the response cache for
+            CACHED_CHAINS and the prompt and llm steps going through the
+            semantic cache for the others
+    """
+    global _chains_llm
+    with _chains_lock:
+        if _chains_llm is not llm:
+            _chains.clear()
+            _chains_llm = llm
+        chain = _chains.get(name)
+        if chain is None:
+            if name in CACHED_CHAINS:
+                chain = PROMPTS[name] | _cached_model(name, llm) | StrOutputParser()
+            else:
+                chain = _semantic_chain(name, llm) | StrOutputParser()
+            _chains[name] = chain
+        return chain
+
+# --- LLM Chain Definitions ---
+
+def get_initial_question_chain():
+    return get_chain('initial_question')
+
+def get_foundational_question_chain():
+    return get_chain('foundational_question')
+
+def get_jd_resume_specific_chain():
+    return get_chain('jd_resume_specific')
+
+def get_clarifying_question_chain():
+    return get_chain('clarifying_question')
+
+def get_pivot_behavioral_chain():
+    return get_chain('pivot_behavioral')
+
+def get_pivot_foundational_chain():
+    return get_chain('pivot_foundational')
+
+def get_ats_score_chain():
+    return get_chain('ats_score')
+
+def get_keyword_extraction_chain():
+    return get_chain('keyword_extraction')
+
+def get_answer_analysis_chain():
+    return get_chain('answer_analysis')
+
+def get_interview_turn_chain():
+    return get_chain('interview_turn')
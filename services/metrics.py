@@ -0,0 +1,134 @@
+"""
+In-process metrics for the code execution pipeline.
+
+CodeExecutor records how long each phase of an execution took (writing
+the source, compiling, spawning the process, running it and cleaning up
+the workspace) and the judge counts submissions by verdict. The /metrics
+route renders them in the Prometheus text exposition format, so they can
+be scraped or simply read with curl.
+"""
+import bisect
+import threading
+
+# Histogram bucket upper bounds in seconds, from process spawns (well under
+# a millisecond with a warm pool) up to slow compiles
+PHASE_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values"""
+
+    def __init__(self, buckets=PHASE_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self):
+        """(upper bound, observations <= bound) pairs, ending with +Inf"""
+        total = 0
+        pairs = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            pairs.append((bound, total))
+        return pairs
+
+
+def _format_labels(labels):
+    return ','.join(f'{name}="{value}"' for name, value in labels)
+
+
+def _format_bound(bound):
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class MetricsRegistry:
+    """Histograms and counters keyed by name and label values"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._counters = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name, value, help_text='', **labels):
+        """Add an observation to the histogram with these labels"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name, amount=1, help_text='', **labels):
+        """Increase the counter with these labels"""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._help.setdefault(name, help_text)
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def get_histogram(self, name, **labels):
+        """The histogram for these labels, or None if nothing was observed"""
+        with self._lock:
+            return self._histograms.get((name, tuple(sorted(labels.items()))))
+
+    def get_counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def render(self):
+        """
+        Render every metric in the Prometheus text format
+
+        Returns:
+            str: Exposition text, one sample per line
+        """
+        lines = []
+        with self._lock:
+            for metric_type, metrics in (('counter', self._counters), ('histogram', self._histograms)):
+                for name in sorted({name for name, _ in metrics}):
+                    lines.append(f"# HELP {name} {self._help.get(name, '')}")
+                    lines.append(f"# TYPE {name} {metric_type}")
+                    for (metric_name, labels), value in sorted(metrics.items()):
+                        if metric_name != name:
+                            continue
+                        if metric_type == 'counter':
+                            lines.append(f"{name}{{{_format_labels(labels)}}} {value}")
+                            continue
+                        for bound, count in value.cumulative_counts():
+                            bucket_labels = _format_labels(labels + (('le', _format_bound(bound)),))
+                            lines.append(f"{name}_bucket{{{bucket_labels}}} {count}")
+                        lines.append(f"{name}_sum{{{_format_labels(labels)}}} {value.sum}")
+                        lines.append(f"{name}_count{{{_format_labels(labels)}}} {value.count}")
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+# Shared registry the services record into and /metrics renders
+_registry = MetricsRegistry()
+
+
+def get_metrics():
+    """Return the shared metrics registry"""
+    return _registry
+
+
+def observe_phases(language, phases):
+    """Record an execution's phase durations (seconds) for a language"""
+    for phase, seconds in phases.items():
+        if seconds is not None:
+            _registry.observe(
+                'code_execution_phase_seconds', seconds,
+                help_text='Time spent in each phase of a code execution',
+                language=language, phase=phase
+            )
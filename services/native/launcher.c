@@ -0,0 +1,66 @@
+/*
+ * Runs a program and reports the program's own peak memory.
+ *
+ *   launcher REPORT_DIR COMMAND [ARG]...
+ *
+ * A process started straight from the web process counts the resident set
+ * it inherits at fork toward its peak (ru_maxrss survives exec), so a
+ * small program started from a large parent looks large. The launcher
+ * forks COMMAND from its own small image instead, waits for it, writes its
+ * peak RSS in KB to REPORT_DIR/<launcher pid> and exits with its status,
+ * dying from the same signal if it was killed.
+ *
+ * SIGTERM is ignored here (but not in COMMAND), so a program stopped with
+ * SIGTERM is still reported.
+ */
+#include <errno.h>
+#include <signal.h>
+#include <stdio.h>
+#include <sys/resource.h>
+#include <sys/types.h>
+#include <sys/wait.h>
+#include <unistd.h>
+
+int main(int argc, char **argv) {
+    if (argc < 3) {
+        fprintf(stderr, "usage: %s REPORT_DIR COMMAND [ARG]...\n", argv[0]);
+        return 127;
+    }
+
+    signal(SIGTERM, SIG_IGN);
+    pid_t child = fork();
+    if (child < 0) {
+        perror("fork");
+        return 127;
+    }
+    if (child == 0) {
+        signal(SIGTERM, SIG_DFL);
+        execvp(argv[2], argv + 2);
+        perror(argv[2]);
+        _exit(127);
+    }
+
+    int status;
+    struct rusage usage;
+    while (wait4(child, &status, 0, &usage) < 0) {
+        if (errno != EINTR) {
+            return 127;
+        }
+    }
+
+    char path[4096];
+    snprintf(path, sizeof path, "%s/%d", argv[1], (int) getpid());
+    FILE *report = fopen(path, "w");
+    if (report != NULL) {
+        fprintf(report, "%ld\n", usage.ru_maxrss);
+        fclose(report);
+    }
+
+    if (WIFSIGNALED(status)) {
+        int sig = WTERMSIG(status);
+        signal(sig, SIG_DFL);
+        kill(getpid(), sig);
+        return 128 + sig;
+    }
+    return WEXITSTATUS(status);
+}
@@ -3,7 +3,27 @@ Problem database for coding challenges.
 
 This module contains coding problems similar to LeetCode challenges
 with test cases and starter code for multiple languages.
+
+Each problem's "perf" entry drives the complexity analysis: a named
+input generator (see PERF_GENERATORS), the input sizes to time, the
+complexity a good solution has and the time budget in seconds for the
+largest size.
+
+Besides the visible test_cases, a problem can have hidden tests stored
+as files: TEST_DATA_DIR/<problem id>/<name>.in with a matching
+<name>.out. These can be megabytes in size; they are streamed to the
+program rather than loaded into memory (see CodeExecutor FileCase).
 """
+import glob
+import json
+import os
+import random
+import sys
+from functools import lru_cache
+
+# Input sizes the complexity analysis times, about 3x apart so that a
+# slow solution still finishes several before it runs out of time
+PERF_SIZES = [100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000]
 
 PROBLEMS = {
     1: {
@@ -54,8 +74,7 @@ if __name__ == "__main__":
     target = int(input())
     result = twoSum(nums, target)
     print(json.dumps(result))""",
-            "cpp": """#include <iostream>
-#include <vector>
+            "cpp": """#include <bits/stdc++.h>
 #include <json/json.h>
 using namespace std;
 
@@ -117,6 +136,12 @@ public class Solution {
     }
 }"""
         },
+        "perf": {
+            "generator": "two_sum",
+            "sizes": PERF_SIZES,
+            "expected_complexity": "O(n)",
+            "time_budget": 2.0
+        },
         "test_cases": [
             {
                 "input": ["[2,7,11,15]", "9"],
@@ -174,9 +199,7 @@ if __name__ == "__main__":
     s = json.loads(input())
     reverseString(s)
     print(json.dumps(s))""",
-            "cpp": """#include <iostream>
-#include <vector>
-#include <string>
+            "cpp": """#include <bits/stdc++.h>
 using namespace std;
 
 void reverseString(vector<char>& s) {
@@ -236,6 +259,12 @@ public class Solution {
     }
 }"""
         },
+        "perf": {
+            "generator": "reverse_string",
+            "sizes": PERF_SIZES,
+            "expected_complexity": "O(n)",
+            "time_budget": 1.5
+        },
         "test_cases": [
             {
                 "input": ['["h","e","l","l","o"]'],
@@ -300,8 +329,7 @@ if __name__ == "__main__":
     s = input().strip()
     result = isValid(s)
     print(str(result).lower())""",
-            "cpp": """#include <iostream>
-#include <string>
+            "cpp": """#include <bits/stdc++.h>
 using namespace std;
 
 bool isValid(string s) {
@@ -337,6 +365,12 @@ public class Solution {
     }
 }"""
         },
+        "perf": {
+            "generator": "valid_parentheses",
+            "sizes": PERF_SIZES,
+            "expected_complexity": "O(n)",
+            "time_budget": 1.0
+        },
         "test_cases": [
             {
                 "input": ["()"],
@@ -379,3 +413,130 @@ def get_random_problem():
     return random.choice(list(PROBLEMS.values()))
 
 
+def _generate_two_sum(n, rng):
+    """n numbers with exactly one pair summing to the target"""
+    # Every other number is larger than the target, so no other pair fits
+    target = rng.randint(2, 10**6 - 1)
+    first = rng.randint(1, target - 1)
+    nums = [rng.randint(10**6, 2 * 10**6) for _ in range(n)]
+    i, j = sorted(rng.sample(range(n), 2))
+    nums[i], nums[j] = first, target - first
+    return [json.dumps(nums, separators=(',', ':')), str(target)], json.dumps([i, j])
+
+
+def _generate_reverse_string(n, rng):
+    """n random letters"""
+    letters = [rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(n)]
+    return [json.dumps(letters, separators=(',', ':'))], json.dumps(letters[::-1], separators=(',', ':'))
+
+
+def _generate_valid_parentheses(n, rng):
+    """A valid, randomly nested bracket string of length n (rounded down to even)"""
+    pairs = {'(': ')', '[': ']', '{': '}'}
+    chars, stack = [], []
+    for position in range(n - n % 2):
+        remaining = n - n % 2 - position
+        if stack and (len(stack) == remaining or rng.random() < 0.5):
+            chars.append(pairs[stack.pop()])
+        else:
+            opening = rng.choice('([{')
+            stack.append(opening)
+            chars.append(opening)
+    return [''.join(chars)], 'true'
+
+
+# Input generators for the complexity analysis: name -> fn(n, rng)
+# returning (stdin lines, expected output)
+PERF_GENERATORS = {
+    'two_sum': _generate_two_sum,
+    'reverse_string': _generate_reverse_string,
+    'valid_parentheses': _generate_valid_parentheses
+}
+
+
+def generate_perf_input(problem, n, seed=0):
+    """
+    Generate a scaled input for a problem's complexity analysis
+
+    Args:
+        problem (dict): Problem with a "perf" entry
+        n (int): Input size
+        seed (int): Seed, so every submission is timed on the same data
+
+    Returns:
+        tuple: (stdin data, expected output)
+    """
+    return _generate_perf_input(problem['id'], problem['perf']['generator'], n, seed)
+
+
+@lru_cache(maxsize=32)
+def _generate_perf_input(problem_id, generator_name, n, seed):
+    """Inputs are deterministic and up to millions of elements, so each is generated once"""
+    lines, expected = PERF_GENERATORS[generator_name](n, random.Random(f"{problem_id}:{n}:{seed}"))
+    return '\n'.join(lines), expected
+
+
+# Root directory of the hidden test data
+TEST_DATA_DIR = os.getenv(
+    "TEST_DATA_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'problem_data')
+)
+
+
+def get_hidden_tests(problem):
+    """
+    Return a problem's hidden tests stored on disk
+
+    Returns:
+        list: (input path, expected output path) pairs, sorted by name;
+            inputs without a matching .out file are ignored
+    """
+    directory = os.path.join(TEST_DATA_DIR, str(problem['id']))
+    pairs = []
+    for input_path in sorted(glob.glob(os.path.join(directory, '*.in'))):
+        expected_path = input_path[:-len('.in')] + '.out'
+        if os.path.exists(expected_path):
+            pairs.append((input_path, expected_path))
+    return pairs
+
+
+def hidden_tests_fingerprint(problem):
+    """Identify the current version of a problem's hidden tests"""
+    return [
+        (os.path.basename(input_path), os.stat(input_path).st_mtime_ns, os.stat(expected_path).st_mtime_ns)
+        for input_path, expected_path in get_hidden_tests(problem)
+    ]
+
+
+def write_perf_test_files(problem, sizes, seed=0):
+    """
+    Write generated stress tests as hidden test files
+
+    Args:
+        problem (dict): Problem with a "perf" entry
+        sizes (list): Input sizes, one test file pair per size
+        seed (int): Generator seed
+
+    Returns:
+        list: Paths of the written .in files
+    """
+    directory = os.path.join(TEST_DATA_DIR, str(problem['id']))
+    os.makedirs(directory, exist_ok=True)
+    written = []
+    for n in sizes:
+        stdin_data, expected = generate_perf_input(problem, n, seed)
+        base = os.path.join(directory, f"stress_{n}")
+        with open(base + '.in', 'w') as f:
+            f.write(stdin_data + '\n')
+        with open(base + '.out', 'w') as f:
+            f.write(expected + '\n')
+        written.append(base + '.in')
+    return written
+
+
+if __name__ == '__main__':
+    # Generate hidden stress tests: python -m services.problems [size ...]
+    stress_sizes = [int(arg) for arg in sys.argv[1:]] or [100000, 1000000]
+    for stress_problem in get_all_problems():
+        for path in write_perf_test_files(stress_problem, stress_sizes):
+            print(f"Wrote {path}")
+
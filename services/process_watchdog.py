@@ -0,0 +1,152 @@
+"""
+Watchdog for processes that outlive their submission's run.
+
+Every run is started in a process group of its own, and CodeExecutor
+kills the whole group before reaping the program. Anything that still
+belongs to a finished run's group afterwards (a child forked while the
+group was being killed, for example) has leaked: it no longer counts
+against any run's limits but can keep a core busy indefinitely. The
+watchdog periodically scans /proc for members of recently finished
+groups, reports them and kills them.
+"""
+import atexit
+import os
+import signal
+import threading
+import time
+
+from services import metrics
+
+# Finished groups are checked this many times before they are forgotten
+CHECKS_PER_GROUP = 3
+
+
+def _clock_ticks_since_boot():
+    """Current time in the units of /proc/<pid>/stat's starttime field"""
+    return int(time.clock_gettime(time.CLOCK_BOOTTIME) * os.sysconf('SC_CLK_TCK'))
+
+
+def _list_processes():
+    """
+    Yield (pid, process group, start time in clock ticks, command) for
+    every live process in /proc; zombies hold no resources beyond their
+    process table entry and are skipped
+    """
+    try:
+        pids = [int(name) for name in os.listdir('/proc') if name.isdigit()]
+    except OSError:
+        return
+    for pid in pids:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                stat = f.read()
+        except OSError:
+            continue  # exited while scanning
+        # The command name is in parentheses and may contain spaces
+        command = stat[stat.index('(') + 1:stat.rindex(')')]
+        fields = stat[stat.rindex(')') + 2:].split()
+        if fields[0] in ('Z', 'X'):
+            continue
+        yield pid, int(fields[2]), int(fields[19]), command
+
+
+class ProcessWatchdog:
+    """Finds, reports and kills processes left behind by finished runs"""
+
+    def __init__(self, interval=1.0):
+        """
+        Args:
+            interval (float): Seconds between scans of /proc
+        """
+        self.interval = interval
+        self.leaked = 0
+        # process group -> [clock tick the run finished at, checks left]
+        self._groups = {}
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def watch(self, pgid):
+        """Check a finished run's process group for leftover processes"""
+        with self._lock:
+            self._groups[pgid] = [_clock_ticks_since_boot(), CHECKS_PER_GROUP]
+
+    def check(self):
+        """
+        Scan once for leaked processes and kill them
+
+        Only processes started before their run finished count, so a new
+        run that was given a recycled process group ID is left alone.
+
+        Returns:
+            list: (pid, command) of each leaked process found
+        """
+        with self._lock:
+            groups = {pgid: finished for pgid, (finished, _) in self._groups.items()}
+        if not groups:
+            return []
+
+        leaked = []
+        for pid, pgid, started, command in _list_processes():
+            if pgid in groups and started <= groups[pgid]:
+                leaked.append((pid, command))
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        with self._lock:
+            for pgid in groups:
+                entry = self._groups.get(pgid)
+                if entry is None:
+                    continue
+                entry[1] -= 1
+                if entry[1] <= 0:
+                    del self._groups[pgid]
+            self.leaked += len(leaked)
+        for pid, command in leaked:
+            print(f"Process watchdog: killed leaked process {pid} ({command})")
+            metrics.get_metrics().increment(
+                'executor_leaked_processes_total',
+                help_text='Processes found running after their submission finished'
+            )
+        return leaked
+
+    def start(self):
+        """Scan in a background thread until stop() is called"""
+        self._thread = threading.Thread(target=self._loop, name="process-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def stats(self):
+        with self._lock:
+            return {'watched_groups': len(self._groups), 'leaked': self.leaked}
+
+    def _loop(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:
+                print(f"Process watchdog check failed: {e}")
+
+
+# Shared watchdog used by CodeExecutor
+_watchdog = None
+_watchdog_lock = threading.Lock()
+
+
+def get_process_watchdog():
+    """Return the shared watchdog, started on first use, or None when
+    PROCESS_WATCHDOG_INTERVAL is 0 or /proc is not available"""
+    global _watchdog
+    with _watchdog_lock:
+        if _watchdog is None:
+            interval = float(os.getenv("PROCESS_WATCHDOG_INTERVAL", "1.0"))
+            if interval <= 0 or not os.path.isdir('/proc'):
+                return None
+            _watchdog = ProcessWatchdog(interval)
+            _watchdog.start()
+            atexit.register(_watchdog.stop)
+        return _watchdog
@@ -0,0 +1,208 @@
+"""
+Pool of pre-started Python interpreters for running submissions.
+
+Each worker is a fresh `python3` process that has already imported the
+common standard library modules and then blocks until it is handed a
+script. A worker runs exactly one submission and is never reused, so
+runs stay as isolated as a cold `python3 solution.py`; the pool simply
+pays the interpreter startup and import cost ahead of time.
+"""
+import atexit
+import collections
+import os
+import signal
+import subprocess
+import threading
+
+# Runs inside each worker. The script path is read from stdin one byte at
+# a time so everything after the first newline is left in the pipe for
+# the submission's own input() calls.
+_BOOTSTRAP = r"""
+import os, sys
+_name = None
+for _name in sys.argv[1:]:
+    try:
+        __import__(_name)
+    except ImportError:
+        pass
+_line = b''
+while True:
+    _char = os.read(0, 1)
+    if not _char or _char == b'\n':
+        break
+    _line += _char
+if not _line:
+    sys.exit(0)
+_path = _line.decode()
+del _name, _line, _char
+os.chdir(os.path.dirname(_path))
+sys.argv = [_path]
+sys.path[0] = os.path.dirname(_path)
+import runpy
+try:
+    runpy.run_path(_path, run_name='__main__')
+except SystemExit:
+    raise
+except BaseException as _exc:
+    # Report the traceback from the submission's frames only, as python3 would
+    import traceback
+    _tb = _exc.__traceback__
+    while _tb is not None and _tb.tb_frame.f_code.co_filename != _path:
+        _tb = _tb.tb_next
+    traceback.print_exception(type(_exc), _exc, _tb)
+    sys.exit(1)
+"""
+
+DEFAULT_WARM_MODULES = [
+    'json', 'collections', 'heapq', 'itertools', 'functools',
+    'math', 'bisect', 're', 'string', 'typing'
+]
+
+
+class PythonWorkerPool:
+    """Keeps a number of idle, pre-warmed Python workers ready to run a script"""
+
+    def __init__(self, size, warm_modules=None, python='python3', preexec_fn=os.setsid, launcher=None):
+        """
+        Args:
+            size (int): Number of idle workers to keep ready
+            warm_modules (list): Modules every worker imports before waiting
+            python (str): Interpreter to start
+            preexec_fn (callable): Run in each worker before exec (process
+                group, resource limits)
+            launcher (Launcher): Starts each worker so its peak memory can
+                be reported (see services.launcher)
+        """
+        self.size = size
+        self.warm_modules = list(DEFAULT_WARM_MODULES if warm_modules is None else warm_modules)
+        self.python = python
+        self.preexec_fn = preexec_fn
+        self.launcher = launcher
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self._idle = collections.deque()
+        self._pending = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Fill the pool in the background"""
+        self._refill_async()
+
+    def acquire(self):
+        """
+        Take a worker for a single run
+
+        The caller must write the script path followed by a newline and
+        then the program's stdin to the worker, and must not return it.
+
+        Returns:
+            subprocess.Popen: A worker waiting for its script
+        """
+        worker = None
+        with self._lock:
+            while self._idle:
+                candidate = self._idle.popleft()
+                if candidate.poll() is None:
+                    worker = candidate
+                    break
+            if worker is not None:
+                self.warm_hits += 1
+            else:
+                self.cold_starts += 1
+
+        if worker is None:
+            # Pool drained (burst of requests): start one on demand
+            worker = self._spawn()
+        self._refill_async()
+        return worker
+
+    def stats(self):
+        """Return pool counters"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'idle': len(self._idle),
+                'warm_hits': self.warm_hits,
+                'cold_starts': self.cold_starts
+            }
+
+    def shutdown(self):
+        """Stop all idle workers"""
+        with self._lock:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+        for worker in idle:
+            _kill(worker)
+
+    def _spawn(self):
+        """Start one worker process"""
+        cmd = [self.python, '-c', _BOOTSTRAP, *self.warm_modules]
+        return subprocess.Popen(
+            self.launcher.command(cmd) if self.launcher else cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            preexec_fn=self.preexec_fn
+        )
+
+    def _refill_async(self):
+        """Start enough workers in a background thread to get back to size"""
+        with self._lock:
+            missing = self.size - len(self._idle) - self._pending
+            if self._closed or missing <= 0:
+                return
+            self._pending += missing
+        threading.Thread(target=self._refill, args=(missing,), daemon=True).start()
+
+    def _refill(self, count):
+        for _ in range(count):
+            try:
+                worker = self._spawn()
+            except OSError:
+                worker = None
+            with self._lock:
+                self._pending -= 1
+                if worker is not None and not self._closed:
+                    self._idle.append(worker)
+                    worker = None
+            if worker is not None:
+                _kill(worker)
+
+
+def _kill(worker):
+    """Stop a worker's whole process group, which includes the launched interpreter"""
+    try:
+        os.killpg(worker.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    worker.wait()
+
+
+# Shared pool instance used by CodeExecutor
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_python_pool(preexec_fn=os.setsid, launcher=None):
+    """
+    Return the shared worker pool, or None when PYTHON_POOL_SIZE is 0
+
+    Args:
+        preexec_fn (callable): Applied to workers when the pool is first
+            created (CodeExecutor passes its resource limits)
+        launcher (Launcher): Starts the workers (see services.launcher)
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            size = int(os.getenv("PYTHON_POOL_SIZE", "2"))
+            if size <= 0:
+                return None
+            modules = os.getenv("PYTHON_WARM_MODULES")
+            warm_modules = [m.strip() for m in modules.split(',') if m.strip()] if modules is not None else None
+            _pool = PythonWorkerPool(size, warm_modules, preexec_fn=preexec_fn, launcher=launcher)
+            _pool.start()
+            atexit.register(_pool.shutdown)
+        return _pool
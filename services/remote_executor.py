@@ -0,0 +1,210 @@
+"""
+Client side of the execution workers in services.execution_worker.
+
+A web node with EXECUTION_WORKERS set (comma-separated base URLs, such
+as http://10.0.0.5:8101) sends its executions to the least-loaded
+healthy worker that has the submission's language installed. Workers
+are health-checked in the background; one that fails a request is taken
+out of rotation until it answers a health check again, and the request
+is retried on the next worker. When no worker can take it, CodeExecutor
+runs the request locally.
+
+Hidden tests stored as files are sent by name, relative to
+problems.TEST_DATA_DIR, with their sizes. A worker without the same
+files under its own TEST_DATA_DIR turns the batch down and it goes to
+the next worker, or runs locally.
+"""
+import atexit
+import json
+import os
+import threading
+import urllib.error
+import urllib.request
+
+from services import problems
+
+
+class WorkerUnavailable(Exception):
+    """Raised when no execution worker could serve a request"""
+    pass
+
+
+def encode_stdin(stdin_data):
+    """
+    Batch input in its JSON form: a string, or a FileCase as the names of
+    its files under TEST_DATA_DIR and their sizes
+
+    Raises:
+        WorkerUnavailable: The files are not test data a worker can have
+    """
+    if isinstance(stdin_data, str):
+        return stdin_data
+    names = [os.path.relpath(path, problems.TEST_DATA_DIR) for path in stdin_data]
+    if any(name == os.pardir or name.startswith(os.pardir + os.sep) for name in names):
+        raise WorkerUnavailable(f"{stdin_data[0]} is not under TEST_DATA_DIR")
+    return {'input_name': names[0], 'expected_name': names[1],
+            'sizes': [os.path.getsize(path) for path in stdin_data]}
+
+
+class WorkerState:
+    """What a web node knows about one worker"""
+
+    def __init__(self, url):
+        self.url = url.rstrip('/')
+        self.healthy = False
+        self.active = 0
+        self.capacity = 1
+        self.languages = set()
+        # Requests this node has sent and not yet had answered
+        self.in_flight = 0
+        self.served = 0
+        self.failures = 0
+
+    def load(self):
+        """Fraction of the worker's capacity in use, including our own requests"""
+        return (self.active + self.in_flight) / max(self.capacity, 1)
+
+
+class RemoteExecutors:
+    """Routes execution requests to a set of workers"""
+
+    def __init__(self, urls, health_interval=2.0, request_timeout=120.0, health_timeout=1.0):
+        """
+        Args:
+            urls (list): Base URLs of the workers
+            health_interval (float): Seconds between background health checks
+            request_timeout (float): Longest wait for one execution request;
+                a batch includes compiling and running every case
+            health_timeout (float): Longest wait for a health check
+        """
+        self.workers = [WorkerState(url) for url in urls]
+        self.health_interval = health_interval
+        self.request_timeout = request_timeout
+        self.health_timeout = health_timeout
+        self.fallbacks = 0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Check every worker once, then keep checking in the background"""
+        self.check_health()
+        self._thread = threading.Thread(target=self._health_loop, name="worker-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+
+    def check_health(self):
+        """Refresh each worker's health, load and languages"""
+        for worker in self.workers:
+            try:
+                health = self._request(worker, '/health', timeout=self.health_timeout)
+            except WorkerUnavailable:
+                with self._lock:
+                    worker.healthy = False
+                continue
+            with self._lock:
+                worker.healthy = health.get('status') == 'ok'
+                worker.active = health.get('active', 0)
+                worker.capacity = health.get('capacity', 1)
+                worker.languages = set(health.get('languages', []))
+
+    def post(self, path, payload, language):
+        """
+        Send an execution request to the least-loaded worker for the language
+
+        Args:
+            path (str): '/execute' or '/execute_batch'
+            payload (dict): Request body
+            language (str): Language of the submission
+
+        Returns:
+            dict: The worker's response
+
+        Raises:
+            WorkerUnavailable: Every suitable worker failed or none is healthy
+        """
+        tried = set()
+        while True:
+            with self._lock:
+                candidates = [
+                    worker for worker in self.workers
+                    if worker.healthy and language in worker.languages and worker.url not in tried
+                ]
+                if not candidates:
+                    self.fallbacks += 1
+                    raise WorkerUnavailable(f"No execution worker available for {language}")
+                worker = min(candidates, key=WorkerState.load)
+                worker.in_flight += 1
+            tried.add(worker.url)
+            try:
+                response = self._request(worker, path, payload, self.request_timeout)
+            except WorkerUnavailable as e:
+                print(f"Execution worker {worker.url} failed, trying another: {e}")
+                with self._lock:
+                    worker.healthy = False
+                    worker.failures += 1
+                continue
+            finally:
+                with self._lock:
+                    worker.in_flight -= 1
+            if 'missing_test_data' in response:
+                print(f"Execution worker {worker.url} lacks the test data, trying another: "
+                      f"{response['missing_test_data']}")
+                continue
+            with self._lock:
+                worker.served += 1
+            return response
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': [
+                    {'url': worker.url, 'healthy': worker.healthy, 'active': worker.active,
+                     'capacity': worker.capacity, 'in_flight': worker.in_flight,
+                     'served': worker.served, 'failures': worker.failures}
+                    for worker in self.workers
+                ],
+                'local_fallbacks': self.fallbacks
+            }
+
+    @staticmethod
+    def _request(worker, path, payload=None, timeout=None):
+        data = json.dumps(payload).encode('utf-8') if payload is not None else None
+        request = urllib.request.Request(
+            worker.url + path, data=data, headers={'Content-Type': 'application/json'}
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return json.loads(response.read())
+        except (urllib.error.URLError, OSError, ValueError) as e:
+            # Connection refused or reset, timeouts, HTTP errors and bad JSON
+            raise WorkerUnavailable(str(e))
+
+    def _health_loop(self):
+        while not self._stopped.wait(self.health_interval):
+            self.check_health()
+
+
+# Shared client used by CodeExecutor
+_remote = None
+_remote_lock = threading.Lock()
+
+
+def get_remote_executors():
+    """Return the shared worker client, or None unless EXECUTION_WORKERS is set"""
+    global _remote
+    urls = [url.strip() for url in os.getenv("EXECUTION_WORKERS", "").split(',') if url.strip()]
+    if not urls:
+        return None
+    with _remote_lock:
+        if _remote is None:
+            _remote = RemoteExecutors(
+                urls,
+                health_interval=float(os.getenv("EXECUTION_WORKER_HEALTH_INTERVAL", "2.0")),
+                request_timeout=float(os.getenv("EXECUTION_WORKER_TIMEOUT", "120"))
+            )
+            _remote.start()
+            atexit.register(_remote.stop)
+        return _remote
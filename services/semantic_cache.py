@@ -0,0 +1,267 @@
+"""
+Semantic cache for interview question generation.
+
+Candidates applying for the same role upload near-identical JDs, so the
+prompts of the question chains (the foundational warm-up above all) are
+nearly the same from one interview to the next. For the chains in its
+scope, this cache embeds the chain's matched input variables with
+document_processor.get_embeddings_model() and, when an earlier call of
+the same chain and model had similar enough inputs, answers with one of
+that call's responses instead of calling the model. Each chain matches
+on its own variables (MATCH_VARIABLES): the foundational question on the
+role and JD only, so candidates with different resumes applying for the
+same job share its warm-up questions. The other variables, such as the
+chat history, which changes on every turn, are never embedded.
+
+Only the inputs are embedded, never the rendered prompt: the fixed
+template text would use up the model's input window (all-MiniLM-L6-v2
+reads 256 word pieces), leaving the resume and history out of the match.
+Each input is split into chunks that fit the window, and its vector is
+the mean of its chunks' embeddings. Two calls match when they fill the
+same matched variables and the mean cosine similarity of those inputs,
+variable by variable, is at least `threshold`.
+
+Each cached call keeps up to `variants` responses. Until it has them
+all, a similar call still goes to the model and adds its reply as another
+variant; after that, hits rotate through the variants, so repeat
+candidates do not all get the same question. A variant that already
+appears in the inputs (a question asked earlier in this interview) is
+never reused. Lookups are counted per chain in services.metrics.
+"""
+import collections
+import itertools
+import math
+import os
+import threading
+import time
+
+from services import metrics
+
+# Words per embedded chunk, leaving room in the embeddings model's
+# 256-word-piece window for words split into several pieces
+CHUNK_WORDS = 150
+
+# Input texts whose vectors are kept, as the JD and resume repeat on
+# every turn of an interview
+MAX_TEXT_VECTORS = 256
+
+# Input variables each chain is matched on, for chains in scope without
+# their own list in SEMANTIC_CACHE_CHAINS; other chains match on all
+MATCH_VARIABLES = {
+    'foundational_question': {'job_role', 'jd_context'}
+}
+
+
+def _normalize(vector):
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+def _similarity(a, b):
+    """Cosine similarity of two normalized vectors"""
+    return sum(x * y for x, y in zip(a, b))
+
+
+def _chunks(text):
+    words = text.split()
+    return [' '.join(words[i:i + CHUNK_WORDS]) for i in range(0, len(words), CHUNK_WORDS)]
+
+
+def _inputs_similarity(a, b):
+    """Mean similarity of two calls' input vectors, 0 unless they fill the same variables"""
+    if not a or a.keys() != b.keys():
+        return 0.0
+    return sum(_similarity(a[name], b[name]) for name in a) / len(a)
+
+
+class _Entry:
+    """A cached call's input vectors and the responses the model gave for calls like it"""
+
+    def __init__(self, chain, model_name, vectors):
+        self.chain = chain
+        self.model_name = model_name
+        self.vectors = vectors
+        self.responses = []
+        self.created = time.time()
+        self.served = 0
+
+
+class SemanticCache:
+    """Reuses responses of earlier chain calls with inputs similar to a new one"""
+
+    def __init__(self, embed, chains, threshold=0.95, max_entries=256, ttl=None, variants=1):
+        """
+        Args:
+            embed (callable): Returns the embedding (list of floats) of a text
+            chains (dict): Names of the llm_chains.PROMPTS chains in scope,
+                each mapped to the input variables it is matched on (None
+                for all); a set puts every variable of its chains in play
+            threshold (float): Lowest mean cosine similarity of the
+                inputs counted as the same call
+            max_entries (int): Calls kept before the least recently used
+                is evicted
+            ttl (float): Seconds a call's responses stay valid; None keeps
+                them until evicted
+            variants (int): Responses collected per call before hits start
+                reusing them
+        """
+        self.embed = embed
+        self.chains = dict(chains) if isinstance(chains, dict) else dict.fromkeys(chains)
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.variants = max(variants, 1)
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # id -> _Entry, least recently used first
+        self._text_vectors = collections.OrderedDict()  # text -> vector, least recently used first
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def lookup(self, chain, model_name, inputs):
+        """
+        Find a response to reuse for a chain call
+
+        Args:
+            chain (str): Chain being called
+            model_name (str): Model the call is for
+            inputs (dict): The chain's input variables; those it is not
+                matched on are only checked for questions already asked
+
+        Returns:
+            tuple: (response, pending). response is None on a miss; pass
+                pending and the model's reply to store() afterwards
+        """
+        texts = {name: str(value) for name, value in inputs.items() if str(value).strip()}
+        matched = self.chains.get(chain)
+        vectors = {name: self._vector(text) for name, text in texts.items() if matched is None or name in matched}
+        asked = '\n'.join(texts.values())
+        now = time.time()
+        with self._lock:
+            if self.ttl is not None:
+                for entry_id in [i for i, e in self._entries.items() if now - e.created > self.ttl]:
+                    del self._entries[entry_id]
+            best_id, best = None, self.threshold
+            for entry_id, entry in self._entries.items():
+                if entry.chain != chain or entry.model_name != model_name:
+                    continue
+                similarity = _inputs_similarity(vectors, entry.vectors)
+                if similarity >= best:
+                    best_id, best = entry_id, similarity
+            response = None
+            if best_id is not None:
+                self._entries.move_to_end(best_id)
+                entry = self._entries[best_id]
+                unused = [r for r in entry.responses if r.strip() not in asked]
+                if unused and len(entry.responses) >= self.variants:
+                    response = unused[entry.served % len(unused)]
+                    entry.served += 1
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return response, (chain, model_name, vectors, best_id)
+
+    def _vector(self, text):
+        """Normalized mean of the embeddings of a text's chunks"""
+        with self._lock:
+            vector = self._text_vectors.get(text)
+            if vector is not None:
+                self._text_vectors.move_to_end(text)
+                return vector
+        embeddings = [_normalize(self.embed(chunk)) for chunk in _chunks(text)]
+        vector = _normalize([sum(values) / len(embeddings) for values in zip(*embeddings)])
+        with self._lock:
+            self._text_vectors[text] = vector
+            while len(self._text_vectors) > MAX_TEXT_VECTORS:
+                self._text_vectors.popitem(last=False)
+        return vector
+
+    def store(self, pending, response):
+        """Remember the model's reply to a call that missed in lookup()"""
+        chain, model_name, vectors, entry_id = pending
+        with self._lock:
+            entry = self._entries.get(entry_id) if entry_id is not None else None
+            if entry is None:
+                entry = _Entry(chain, model_name, vectors)
+                entry_id = next(self._ids)
+                self._entries[entry_id] = entry
+            if response not in entry.responses:
+                entry.responses.append(response)
+                del entry.responses[:-self.variants]
+            self._entries.move_to_end(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'chains': sorted(self.chains), 'entries': len(self._entries),
+                    'max_entries': self.max_entries, 'threshold': self.threshold,
+                    'variants': self.variants, 'ttl': self.ttl, 'hits': self.hits,
+                    'misses': self.misses, 'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._text_vectors.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def record_lookup(chain_name, hit):
+    """Count a semantic cache lookup for a chain in services.metrics"""
+    metrics.get_metrics().increment(
+        'llm_semantic_cache_lookups_total', help_text='LLM semantic cache lookups, by chain and result',
+        chain=chain_name, result='hit' if hit else 'miss'
+    )
+
+
+def _embed_query(text):
+    from services import document_processor
+    return document_processor.get_embeddings_model().embed_query(text)
+
+
+# Shared cache used by the chains in services.llm_chains
+_cache = None
+_cache_configured = False
+_cache_lock = threading.Lock()
+
+
+def get_semantic_cache():
+    """
+    Return the shared semantic cache, or None unless SEMANTIC_CACHE_CHAINS is set
+
+    SEMANTIC_CACHE_CHAINS lists the chains in scope (comma-separated, e.g.
+    'foundational_question'), each optionally followed by the variables it
+    is matched on ('foundational_question:job_role+jd_context');
+    SEMANTIC_CACHE_THRESHOLD, _MAX_ENTRIES, _TTL (seconds, 0 for no expiry)
+    and _VARIANTS tune it.
+    """
+    global _cache, _cache_configured
+    with _cache_lock:
+        if not _cache_configured:
+            chains = {}
+            for item in os.getenv("SEMANTIC_CACHE_CHAINS", "").split(','):
+                name, _, variables = item.partition(':')
+                if name.strip():
+                    matched = {variable.strip() for variable in variables.split('+') if variable.strip()}
+                    chains[name.strip()] = matched or MATCH_VARIABLES.get(name.strip())
+            if chains:
+                _cache = SemanticCache(
+                    _embed_query, chains,
+                    threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95")),
+                    max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "256")),
+                    ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")) or None,
+                    variants=int(os.getenv("SEMANTIC_CACHE_VARIANTS", "3"))
+                )
+            _cache_configured = True
+        return _cache
+
+
+def set_semantic_cache(cache):
+    """Replace the shared semantic cache (None disables it)"""
+    global _cache, _cache_configured
+    with _cache_lock:
+        _cache = cache
+        _cache_configured = True
@@ -0,0 +1,109 @@
+"""
+Store for the outcome of streamed interview turns.
+
+/interview_flow/stream sends its response body before the turn's outcome
+is known, so the session cookie cannot carry it. The outcome is written
+here, keyed by the turn ID kept in the session, and the candidate's next
+request takes it out again. That request may be served by another web
+process (several gunicorn workers), so the turns live in a SQLite file
+every process shares, like the judge queue's jobs. Turns nobody collects
+expire after a TTL, and only the newest `max_entries` are kept.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS turns (
+    id TEXT PRIMARY KEY,
+    turn TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS turns_created ON turns (created);
+"""
+
+
+class TurnStore:
+    """Pending streamed turns in a SQLite file shared by all web processes"""
+
+    def __init__(self, db_path, max_entries=1000, ttl=3600):
+        """
+        Args:
+            db_path (str): SQLite file, created if missing
+            max_entries (int): Turns kept before the oldest are dropped
+            ttl (float): Seconds a turn waits for the candidate's next
+                request
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def put(self, turn_id, turn):
+        """Keep a turn (a JSON-serializable dict) until pop() takes it"""
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO turns (id, turn, created) VALUES (?, ?, ?)",
+                (turn_id, json.dumps(turn), now)
+            )
+            conn.execute("DELETE FROM turns WHERE created < ?", (now - self.ttl,))
+            conn.execute(
+                "DELETE FROM turns WHERE id IN (SELECT id FROM turns ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+
+    def pop(self, turn_id):
+        """Remove and return a turn, or None if it never finished or expired"""
+        with self._connect() as conn:
+            row = conn.execute(
+                "DELETE FROM turns WHERE id = ? AND created >= ? RETURNING turn",
+                (turn_id, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return _closing(conn)
+
+
+class _closing:
+    """Context manager that closes a sqlite3 connection (autocommit mode)"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        return self.conn
+
+    def __exit__(self, *exc_info):
+        self.conn.close()
+
+
+# Shared store used by services.interview_manager
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_turn_store():
+    """Return the shared turn store at INTERVIEW_TURNS_DB"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = TurnStore(
+                os.getenv("INTERVIEW_TURNS_DB", os.path.join(tempfile.gettempdir(), "interview_turns.sqlite3")),
+                ttl=float(os.getenv("INTERVIEW_TURN_TTL", "3600"))
+            )
+        return _store
+
+
+def set_turn_store(store):
+    """Replace the shared turn store"""
+    global _store
+    with _store_lock:
+        _store = store
@@ -0,0 +1,124 @@
+"""
+Pool of reusable sandbox workspace directories.
+
+Every execution leases a directory of its own to write sources, compile
+and run in, and hands it back afterwards. Returned directories are
+emptied and reused rather than created and deleted per request, and
+because each execution has its own directory a single CodeExecutor can
+be shared between threads. Workspaces live on tmpfs (/dev/shm) when it
+is available and allows executing binaries.
+"""
+import atexit
+import os
+import shutil
+import stat
+import tempfile
+import threading
+
+
+def _default_root():
+    """Prefer tmpfs for workspaces unless it is mounted noexec"""
+    shm = '/dev/shm'
+    try:
+        if os.access(shm, os.W_OK | os.X_OK) and not os.statvfs(shm).f_flag & os.ST_NOEXEC:
+            return os.path.join(shm, 'code_executor_workspaces')
+    except OSError:
+        pass
+    return os.path.join(tempfile.gettempdir(), 'code_executor_workspaces')
+
+
+def _make_writable_and_retry(func, path, exc_info):
+    """rmtree error handler for directories a submission made read-only"""
+    os.chmod(os.path.dirname(path), stat.S_IRWXU)
+    if os.path.isdir(path) and not os.path.islink(path):
+        os.chmod(path, stat.S_IRWXU)
+    func(path)
+
+
+class WorkspacePool:
+    """Leases pre-created workspace directories and scrubs them on return"""
+
+    def __init__(self, root, size):
+        """
+        Args:
+            root (str): Directory the workspaces are created under
+            size (int): Idle workspaces kept for reuse; extra ones are
+                created on demand under load and removed when returned
+        """
+        self.root = root
+        self.size = size
+        self.created = 0
+        self.reused = 0
+        self._lock = threading.Lock()
+        os.makedirs(root, mode=0o700, exist_ok=True)
+        self._idle = [self._create() for _ in range(size)]
+
+    def lease(self):
+        """
+        Take an empty workspace for one execution
+
+        Returns:
+            str: Path of the workspace directory
+        """
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop()
+        return self._create()
+
+    def release(self, workspace):
+        """Empty a workspace and return it to the pool"""
+        try:
+            self._scrub(workspace)
+        except OSError:
+            shutil.rmtree(workspace, ignore_errors=True)
+            return
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(workspace)
+                return
+        shutil.rmtree(workspace, ignore_errors=True)
+
+    def stats(self):
+        with self._lock:
+            return {'size': self.size, 'idle': len(self._idle),
+                    'created': self.created, 'reused': self.reused}
+
+    def shutdown(self):
+        """Remove the pool's root directory and every workspace in it"""
+        with self._lock:
+            self._idle = []
+        if os.path.exists(self.root):
+            shutil.rmtree(self.root, onerror=_make_writable_and_retry)
+
+    def _create(self):
+        with self._lock:
+            self.created += 1
+        return tempfile.mkdtemp(prefix='slot-', dir=self.root)
+
+    @staticmethod
+    def _scrub(workspace):
+        """Remove everything a run left in the workspace"""
+        with os.scandir(workspace) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path, onerror=_make_writable_and_retry)
+                else:
+                    os.remove(entry.path)
+
+
+# Shared pool instance used by CodeExecutor
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_workspace_pool():
+    """Return the shared workspace pool, creating it on first use"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            root = os.getenv("WORKSPACE_ROOT") or _default_root()
+            size = int(os.getenv("WORKSPACE_POOL_SIZE", 2 * (os.cpu_count() or 1)))
+            _pool = WorkspacePool(os.path.join(root, str(os.getpid())), size)
+            atexit.register(_pool.shutdown)
+        return _pool
@@ -0,0 +1,358 @@
+"""
+Reference solutions to the problems in services/problems.py.
+
+Accepted solutions for every problem in each language, used by the
+benchmark suite. They are kept out of services/problems.py because the
+problem definitions are sent to the browser.
+"""
+
+TWO_SUM = {
+    'python': """import json
+
+def twoSum(nums, target):
+    seen = {}
+    for i, num in enumerate(nums):
+        if target - num in seen:
+            return [seen[target - num], i]
+        seen[num] = i
+    return []
+
+nums = json.loads(input())
+target = int(input())
+print(json.dumps(twoSum(nums, target)))
+""",
+    'cpp': """#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    string line;
+    getline(cin, line);
+    for (char& c : line) if (c == '[' || c == ']' || c == ',') c = ' ';
+    istringstream in(line);
+    vector<long long> nums;
+    long long x;
+    while (in >> x) nums.push_back(x);
+    long long target;
+    cin >> target;
+    unordered_map<long long, int> seen;
+    for (int i = 0; i < (int)nums.size(); i++) {
+        auto it = seen.find(target - nums[i]);
+        if (it != seen.end()) {
+            printf("[%d,%d]\\n", it->second, i);
+            return 0;
+        }
+        seen[nums[i]] = i;
+    }
+    printf("[]\\n");
+}
+""",
+    'java': """import java.io.*;
+import java.util.*;
+
+public class Solution {
+    public static void main(String[] args) throws IOException {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
+        String line = reader.readLine().replaceAll("[\\\\[\\\\]]", "");
+        long target = Long.parseLong(reader.readLine().trim());
+        String[] parts = line.isEmpty() ? new String[0] : line.split(",");
+        Map<Long, Integer> seen = new HashMap<>();
+        for (int i = 0; i < parts.length; i++) {
+            long num = Long.parseLong(parts[i].trim());
+            Integer j = seen.get(target - num);
+            if (j != null) {
+                System.out.println("[" + j + "," + i + "]");
+                return;
+            }
+            seen.put(num, i);
+        }
+        System.out.println("[]");
+    }
+}
+""",
+    'javascript': """const [numsLine, targetLine] = require('fs').readFileSync(0, 'utf8').split('\\n');
+const nums = JSON.parse(numsLine);
+const target = Number(targetLine);
+const seen = new Map();
+let result = [];
+for (let i = 0; i < nums.length; i++) {
+    if (seen.has(target - nums[i])) {
+        result = [seen.get(target - nums[i]), i];
+        break;
+    }
+    seen.set(nums[i], i);
+}
+console.log(JSON.stringify(result));
+""",
+    'go': """package main
+
+import (
+\t"bufio"
+\t"encoding/json"
+\t"fmt"
+\t"os"
+)
+
+func main() {
+\treader := bufio.NewReaderSize(os.Stdin, 1<<20)
+\tvar nums []int64
+\tvar target int64
+\tline, _ := reader.ReadBytes('\\n')
+\tjson.Unmarshal(line, &nums)
+\tfmt.Fscan(reader, &target)
+\tseen := make(map[int64]int)
+\tfor i, num := range nums {
+\t\tif j, ok := seen[target-num]; ok {
+\t\t\tfmt.Printf("[%d,%d]\\n", j, i)
+\t\t\treturn
+\t\t}
+\t\tseen[num] = i
+\t}
+\tfmt.Println("[]")
+}
+""",
+    'rust': """use std::collections::HashMap;
+use std::io::Read;
+
+fn main() {
+    let mut input = String::new();
+    std::io::stdin().read_to_string(&mut input).unwrap();
+    let mut lines = input.lines();
+    let nums: Vec<i64> = lines.next().unwrap()
+        .trim_matches(|c| c == '[' || c == ']' || c == ' ')
+        .split(',')
+        .filter(|s| !s.trim().is_empty())
+        .map(|s| s.trim().parse().unwrap())
+        .collect();
+    let target: i64 = lines.next().unwrap().trim().parse().unwrap();
+    let mut seen = HashMap::new();
+    for (i, num) in nums.iter().enumerate() {
+        if let Some(j) = seen.get(&(target - num)) {
+            println!("[{},{}]", j, i);
+            return;
+        }
+        seen.insert(*num, i);
+    }
+    println!("[]");
+}
+"""
+}
+
+REVERSE_STRING = {
+    'python': """import json
+
+s = json.loads(input())
+s.reverse()
+print(json.dumps(s))
+""",
+    'cpp': """#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    ios::sync_with_stdio(false);
+    string line;
+    getline(cin, line);
+    vector<string> chars;
+    for (size_t i = 0; i < line.size(); i++) {
+        if (line[i] == '"') {
+            size_t end = line.find('"', i + 1);
+            chars.push_back(line.substr(i, end - i + 1));
+            i = end;
+        }
+    }
+    reverse(chars.begin(), chars.end());
+    string out = "[";
+    for (size_t i = 0; i < chars.size(); i++) {
+        if (i) out += ", ";
+        out += chars[i];
+    }
+    cout << out << "]\\n";
+}
+""",
+    'java': """import java.io.*;
+import java.util.*;
+
+public class Solution {
+    public static void main(String[] args) throws IOException {
+        BufferedReader reader = new BufferedReader(new InputStreamReader(System.in));
+        String line = reader.readLine();
+        List<String> chars = new ArrayList<>();
+        for (int i = 0; i < line.length(); i++) {
+            if (line.charAt(i) == '"') {
+                int end = line.indexOf('"', i + 1);
+                chars.add(line.substring(i, end + 1));
+                i = end;
+            }
+        }
+        Collections.reverse(chars);
+        System.out.println("[" + String.join(", ", chars) + "]");
+    }
+}
+""",
+    'javascript': """const s = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+s.reverse();
+console.log(JSON.stringify(s));
+""",
+    'go': """package main
+
+import (
+\t"bufio"
+\t"encoding/json"
+\t"fmt"
+\t"os"
+)
+
+func main() {
+\treader := bufio.NewReaderSize(os.Stdin, 1<<20)
+\tline, _ := reader.ReadBytes('\\n')
+\tvar s []string
+\tjson.Unmarshal(line, &s)
+\tfor i, j := 0, len(s)-1; i < j; i, j = i+1, j-1 {
+\t\ts[i], s[j] = s[j], s[i]
+\t}
+\tout, _ := json.Marshal(s)
+\tfmt.Println(string(out))
+}
+""",
+    'rust': """use std::io::Read;
+
+fn main() {
+    let mut input = String::new();
+    std::io::stdin().read_to_string(&mut input).unwrap();
+    let mut chars: Vec<&str> = input.trim()
+        .trim_matches(|c| c == '[' || c == ']')
+        .split(',')
+        .map(|s| s.trim())
+        .filter(|s| !s.is_empty())
+        .collect();
+    chars.reverse();
+    println!("[{}]", chars.join(", "));
+}
+"""
+}
+
+VALID_PARENTHESES = {
+    'python': """def isValid(s):
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    for c in s:
+        if c in pairs:
+            if not stack or stack.pop() != pairs[c]:
+                return False
+        else:
+            stack.append(c)
+    return not stack
+
+print('true' if isValid(input().strip()) else 'false')
+""",
+    'cpp': """#include <bits/stdc++.h>
+using namespace std;
+
+int main() {
+    string s;
+    getline(cin, s);
+    string stack;
+    bool ok = true;
+    for (char c : s) {
+        if (c == '(' || c == '[' || c == '{') { stack.push_back(c); continue; }
+        if (c != ')' && c != ']' && c != '}') continue;
+        char open = c == ')' ? '(' : c == ']' ? '[' : '{';
+        if (stack.empty() || stack.back() != open) { ok = false; break; }
+        stack.pop_back();
+    }
+    puts(ok && stack.empty() ? "true" : "false");
+}
+""",
+    'java': """import java.io.*;
+
+public class Solution {
+    public static void main(String[] args) throws IOException {
+        String s = new BufferedReader(new InputStreamReader(System.in)).readLine().trim();
+        StringBuilder stack = new StringBuilder();
+        boolean ok = true;
+        for (char c : s.toCharArray()) {
+            if (c == '(' || c == '[' || c == '{') { stack.append(c); continue; }
+            char open = c == ')' ? '(' : c == ']' ? '[' : '{';
+            if (stack.length() == 0 || stack.charAt(stack.length() - 1) != open) { ok = false; break; }
+            stack.setLength(stack.length() - 1);
+        }
+        System.out.println(ok && stack.length() == 0 ? "true" : "false");
+    }
+}
+""",
+    'javascript': """const s = require('fs').readFileSync(0, 'utf8').trim();
+const pairs = { ')': '(', ']': '[', '}': '{' };
+const stack = [];
+let ok = true;
+for (const c of s) {
+    if (c in pairs) {
+        if (stack.pop() !== pairs[c]) { ok = false; break; }
+    } else {
+        stack.push(c);
+    }
+}
+console.log(ok && stack.length === 0 ? 'true' : 'false');
+""",
+    'go': """package main
+
+import (
+\t"bufio"
+\t"fmt"
+\t"os"
+\t"strings"
+)
+
+func main() {
+\treader := bufio.NewReaderSize(os.Stdin, 1<<20)
+\tline, _ := reader.ReadString('\\n')
+\tpairs := map[rune]rune{')': '(', ']': '[', '}': '{'}
+\tstack := []rune{}
+\tok := true
+\tfor _, c := range strings.TrimSpace(line) {
+\t\tif open, closing := pairs[c]; closing {
+\t\t\tif len(stack) == 0 || stack[len(stack)-1] != open {
+\t\t\t\tok = false
+\t\t\t\tbreak
+\t\t\t}
+\t\t\tstack = stack[:len(stack)-1]
+\t\t} else {
+\t\t\tstack = append(stack, c)
+\t\t}
+\t}
+\tfmt.Println(ok && len(stack) == 0)
+}
+""",
+    'rust': """use std::io::Read;
+
+fn main() {
+    let mut input = String::new();
+    std::io::stdin().read_to_string(&mut input).unwrap();
+    let mut stack = Vec::new();
+    let mut ok = true;
+    for c in input.trim().chars() {
+        let open = match c {
+            ')' => '(',
+            ']' => '[',
+            '}' => '{',
+            _ => { stack.push(c); continue; }
+        };
+        if stack.pop() != Some(open) {
+            ok = false;
+            break;
+        }
+    }
+    println!("{}", ok && stack.is_empty());
+}
+"""
+}
+
+# problem id -> language -> source; PyPy runs the Python solutions
+REFERENCE_SOLUTIONS = {
+    1: TWO_SUM,
+    2: REVERSE_STRING,
+    3: VALID_PARENTHESES
+}
+
+
+def get_reference_solution(problem_id, language):
+    solutions = REFERENCE_SOLUTIONS[problem_id]
+    return solutions.get(language) or solutions['python' if language == 'pypy' else language]
@@ -0,0 +1,263 @@
+"""
+Performance benchmarks for the code execution pipeline.
+
+Run with `pytest tests/test_benchmarks.py --benchmark-only`; add
+`--benchmark-json=results.json` for machine-readable output, or
+`--benchmark-autosave` and later `--benchmark-compare
+--benchmark-compare-fail=mean:20%` to fail on regressions.
+
+Every language is timed on the reference solution of every problem:
+/run_code and /submit_code latency with a cold compile cache (a
+submission never seen before) and a warm one (a resubmission, with the
+verdict cache cleared), compile and run time measured separately, and
+/submit_code throughput at 1, 4 and 16 concurrent submissions.
+Languages that are not installed are skipped.
+
+TestChainConstruction measures the per-answer overhead the LLM chain
+registry saves: building the two chains an interview answer needs from
+their prompt templates versus fetching the prebuilt runnables.
+"""
+import itertools
+import json
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import ChatPromptTemplate
+from services import judge, languages, llm_chains, problems
+from services.code_executor import CodeExecutor
+from services.jvm_pool import JvmPool
+from tests.reference_solutions import get_reference_solution
+
+LANGUAGES = [runtime.name for runtime in languages.list_runtimes()]
+
+PROBLEM_IDS = sorted(problems.PROBLEMS)
+
+CONCURRENCY_LEVELS = [1, 4, 16]
+
+# Submissions judged per throughput round
+THROUGHPUT_SUBMISSIONS = 16
+
+_unique = itertools.count()
+
+
+def _require(language):
+    if not languages.get_runtime(language).available():
+        pytest.skip(f"{language} is not installed")
+
+
+def _fresh_source(code, language):
+    """The same solution as a submission the caches have never seen"""
+    comment = '#' if language in ('python', 'pypy') else '//'
+    return f"{code}\n{comment} benchmark {time.time_ns()} {next(_unique)}\n"
+
+
+def _post(client, url, code, language, problem_id):
+    response = client.post(url, json={'code': code, 'language': language, 'problem_id': problem_id})
+    return json.loads(response.data)
+
+
+JAVA_ECHO = """
+import java.util.*;
+
+public class Solution {
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        int n = scanner.nextInt();
+        System.out.println(n * 2);
+    }
+}
+"""
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(shutil.which('javac') is None, reason="Requires javac and java installed")
+class TestJavaBackendLatency:
+    """Per-case latency of the cold `java` path versus the JVM pool"""
+    
+    def _bench(self, benchmark, executor):
+        # Compile once (and warm the compile cache) outside the timed region
+        program, workspace = executor._prepare(JAVA_ECHO, 'java')
+        try:
+            result = benchmark.pedantic(
+                executor._run_process, args=(program, "21", workspace), rounds=20, warmup_rounds=2
+            )
+            assert result['output'] == "42"
+        finally:
+            executor.workspaces.release(workspace)
+            executor.cleanup()
+    
+    def test_java_cold_start_per_case(self, benchmark):
+        """A new JVM for every test case (default backend)"""
+        benchmark.group = "java-per-case"
+        executor = CodeExecutor()
+        executor.jvm_pool = None
+        self._bench(benchmark, executor)
+    
+    def test_java_pool_per_case(self, benchmark):
+        """Test cases served by a long-lived JVM"""
+        benchmark.group = "java-per-case"
+        pool = JvmPool(1)
+        try:
+            self._bench(benchmark, CodeExecutor(jvm_pool=pool))
+        finally:
+            pool.shutdown()
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("problem_id", PROBLEM_IDS)
+@pytest.mark.parametrize("language", LANGUAGES)
+class TestEndpointLatency:
+    """/run_code and /submit_code latency per language and problem"""
+    
+    COLD_ROUNDS = 3
+    WARM_ROUNDS = 5
+    
+    def _bench(self, benchmark, client, url, language, problem_id, cache):
+        _require(language)
+        benchmark.group = f"{url.strip('/')}-{cache}-{language}"
+        benchmark.extra_info.update({'endpoint': url, 'language': language,
+                                     'problem_id': problem_id, 'cache': cache})
+        code = get_reference_solution(problem_id, language)
+        
+        if cache == 'cold':
+            def setup():
+                return (client, url, _fresh_source(code, language), language, problem_id), {}
+            rounds = self.COLD_ROUNDS
+        else:
+            # Prime the compile cache; the verdict cache is cleared before
+            # each round so the submission is judged again
+            _post(client, url, code, language, problem_id)
+            
+            def setup():
+                judge._verdict_cache.clear()
+                return (client, url, code, language, problem_id), {}
+            rounds = self.WARM_ROUNDS
+        
+        return benchmark.pedantic(_post, setup=setup, rounds=rounds)
+    
+    @pytest.mark.parametrize("cache", ['cold', 'warm'])
+    def test_run_code(self, benchmark, client, language, problem_id, cache):
+        result = self._bench(benchmark, client, '/run_code', language, problem_id, cache)
+        assert not result.get('error'), result.get('error')
+    
+    @pytest.mark.parametrize("cache", ['cold', 'warm'])
+    def test_submit_code(self, benchmark, client, language, problem_id, cache):
+        result = self._bench(benchmark, client, '/submit_code', language, problem_id, cache)
+        assert result['all_passed'], result
+        assert result['cached'] is False
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("problem_id", PROBLEM_IDS)
+@pytest.mark.parametrize("language", LANGUAGES)
+class TestCompileAndRunTime:
+    """Build time (writing and compiling the source) and per-case run time, separately"""
+    
+    def test_compile(self, benchmark, language, problem_id):
+        """Building a submission the compile cache has never seen"""
+        _require(language)
+        benchmark.group = f"compile-{language}"
+        benchmark.extra_info.update({'phase': 'compile', 'language': language, 'problem_id': problem_id})
+        executor = CodeExecutor()
+        code = get_reference_solution(problem_id, language)
+        
+        def build(source):
+            program, workspace = executor._prepare(source, language)
+            executor.workspaces.release(workspace)
+            return program
+        
+        benchmark.pedantic(
+            build, setup=lambda: ((_fresh_source(code, language),), {}), rounds=3
+        )
+    
+    def test_run(self, benchmark, language, problem_id):
+        """Running the built program on the problem's first test case"""
+        _require(language)
+        benchmark.group = f"run-{language}"
+        benchmark.extra_info.update({'phase': 'run', 'language': language, 'problem_id': problem_id})
+        executor = CodeExecutor()
+        test_case = problems.get_problem(problem_id)['test_cases'][0]
+        program, workspace = executor._prepare(get_reference_solution(problem_id, language), language)
+        try:
+            result = benchmark.pedantic(
+                executor._run_process, args=(program, '\n'.join(test_case['input']), workspace),
+                rounds=10, warmup_rounds=1
+            )
+            assert judge.outputs_match(result['output'], test_case['expected_output'])
+        finally:
+            executor.workspaces.release(workspace)
+
+
+@pytest.mark.slow
+@pytest.mark.parametrize("concurrency", CONCURRENCY_LEVELS)
+@pytest.mark.parametrize("language", ['python', 'cpp'])
+class TestSubmitThroughput:
+    """/submit_code throughput with concurrent, distinct submissions"""
+    
+    def test_throughput(self, benchmark, app, language, concurrency):
+        _require(language)
+        benchmark.group = f"submit_code-throughput-{language}"
+        code = get_reference_solution(1, language)
+        
+        def submit_all(sources):
+            def submit(source):
+                return _post(app.test_client(), '/submit_code', source, language, 1)
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                return list(pool.map(submit, sources))
+        
+        def setup():
+            return ([_fresh_source(code, language) for _ in range(THROUGHPUT_SUBMISSIONS)],), {}
+        
+        results = benchmark.pedantic(submit_all, setup=setup, rounds=2)
+        
+        # Under heavy load compiles may hit their timeout; that is reported
+        # rather than failed, since it is what the benchmark measures
+        assert all('test_results' in result for result in results)
+        benchmark.extra_info.update({
+            'language': language,
+            'concurrency': concurrency,
+            'submissions': THROUGHPUT_SUBMISSIONS,
+            'accepted': sum(1 for result in results if result['all_passed'])
+        })
+        if benchmark.stats is not None:  # None with --benchmark-disable
+            benchmark.extra_info['submissions_per_second'] = THROUGHPUT_SUBMISSIONS / benchmark.stats['mean']
+
+
+@pytest.mark.slow
+class TestChainConstruction:
+    """Getting the chains used for one interview answer: rebuilt per call versus prebuilt"""
+    
+    @pytest.fixture(autouse=True)
+    def fake_llm(self):
+        previous = llm_chains.llm
+        llm_chains.set_llm_instance(FakeListChatModel(responses=['question']))
+        yield
+        llm_chains.set_llm_instance(previous)
+    
+    def test_build_per_call(self, benchmark):
+        """How every get_*_chain() call used to work"""
+        benchmark.group = "llm-chain-per-answer"
+        analysis_messages = llm_chains.PROMPTS['answer_analysis'].messages
+        
+        def build():
+            return (
+                ChatPromptTemplate.from_messages(analysis_messages) | llm_chains.llm | StrOutputParser(),
+                ChatPromptTemplate.from_template(llm_chains.JD_RESUME_SPECIFIC_PROMPT_TEMPLATE)
+                | llm_chains.llm | StrOutputParser()
+            )
+        
+        benchmark(build)
+    
+    def test_registry(self, benchmark):
+        """Prebuilt runnables from the chain registry"""
+        benchmark.group = "llm-chain-per-answer"
+        
+        def get():
+            return llm_chains.get_answer_analysis_chain(), llm_chains.get_jd_resume_specific_chain()
+        
+        chains = benchmark(get)
+        assert chains == get()
@@ -3,8 +3,31 @@ Tests for code execution service.
 
 Tests the CodeExecutor class for Python, C++, and Java code execution.
 """
+import os
+import shutil
+import signal
+import subprocess
+import threading
+import time
 import pytest
-from services.code_executor import CodeExecutor, CodeExecutionError
+from unittest.mock import patch
+from services.code_executor import CodeExecutor, CodeExecutionError, FileCase
+from services.checker import create_checker, outputs_equal
+from services.compile_cache import CompileCache
+from services.python_pool import PythonWorkerPool
+from services.jvm_pool import JvmPool
+from services.launcher import get_launcher
+from services import languages
+from services.languages import LanguageRuntime, get_runtime, register_runtime
+from services.workspace_pool import WorkspacePool
+
+
+def _compile_calls(mock_run):
+    """Count g++ compilations, ignoring version probes and precompiled header builds"""
+    return sum(
+        1 for call in mock_run.call_args_list
+        if '-o' in call.args[0] and 'c++-header' not in call.args[0]
+    )
 
 
 class TestPythonExecution:
@@ -165,6 +188,295 @@ public class Solution {
         executor.cleanup()
 
 
+@pytest.mark.skipif(shutil.which('javac') is None, reason="Requires javac and java installed")
+class TestJvmPool:
+    """Tests for the persistent JVM backend"""
+    
+    COUNTER_CODE = """
+import java.util.*;
+
+public class Solution {
+    static int runs = 0;
+    
+    public static void main(String[] args) {
+        Scanner scanner = new Scanner(System.in);
+        runs++;
+        System.out.println(scanner.nextLine() + " " + runs);
+    }
+}
+"""
+    
+    def test_runs_reuse_jvm_with_fresh_classes(self):
+        """Test static state does not survive between runs on the same JVM"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        try:
+            results = executor.execute_batch(self.COUNTER_CODE, 'java', ["a", "b"])
+            assert [r['output'] for r in results] == ["a 1", "b 1"]
+            assert pool.stats()['recycled'] == 0
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_timeout_recycles_jvm(self):
+        """Test a runaway submission is stopped and its JVM replaced"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) {
+        while (true) {}
+    }
+}
+"""
+        try:
+            with pytest.raises(CodeExecutionError, match="Time Limit Exceeded"):
+                executor.execute(code, 'java')
+            assert pool.stats()['recycled'] == 1
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_system_exit_reports_exit_code(self):
+        """Test System.exit in a submission is reported like a cold run"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) {
+        System.out.println("partial");
+        System.exit(2);
+    }
+}
+"""
+        try:
+            with pytest.raises(CodeExecutionError, match="Runtime Error"):
+                executor.execute(code, 'java')
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+
+    def test_threads_left_running_retire_jvm(self):
+        """Test a thread outliving main cannot write into the next run"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) {
+        Thread writer = new Thread(() -> {
+            while (true) {
+                System.out.println("stray");
+            }
+        });
+        writer.setDaemon(true);
+        writer.start();
+        System.out.println("done");
+    }
+}
+"""
+        try:
+            executor.execute(code, 'java')
+            assert pool.stats()['recycled'] == 1
+            result = executor.execute(self.COUNTER_CODE, 'java', "a")
+            assert result['output'] == "a 1"
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+
+    @pytest.mark.parametrize("start_thread", [
+        # A thread group outside the one the submission starts in
+        "new Thread(new ThreadGroup(Thread.currentThread().getThreadGroup().getParent(), \"escape\"), task)",
+        # A worker of the JVM-wide common pool
+        "java.util.concurrent.ForkJoinPool.commonPool().submit(task)",
+    ], ids=["thread_group", "common_pool"])
+    def test_escaped_threads_retire_jvm(self, start_thread):
+        """Test threads started outside the submission's thread group are found too"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) throws Exception {
+        Runnable task = () -> {
+            try {
+                Thread.sleep(60000);
+                System.in.read();
+            } catch (Exception e) {
+            }
+        };
+        Object started = START_THREAD;
+        if (started instanceof Thread) {
+            ((Thread) started).setDaemon(true);
+            ((Thread) started).start();
+        }
+        System.out.println("done");
+    }
+}
+""".replace("START_THREAD", start_thread)
+        try:
+            assert executor.execute(code, 'java')['output'] == "done"
+            assert pool.stats()['recycled'] == 1
+            assert executor.execute(self.COUNTER_CODE, 'java', "a")['output'] == "a 1"
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+
+    def test_output_limit(self):
+        """Test pooled runs get the same output cap as forked runs"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) {
+        while (true) {
+            System.out.println("spam spam spam spam spam spam spam spam");
+        }
+    }
+}
+"""
+        try:
+            with pytest.raises(CodeExecutionError, match="Output Limit Exceeded"):
+                executor.execute(code, 'java')
+            assert pool.stats()['recycled'] == 1
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_cpu_limit_counts_submission_threads(self):
+        """Test CPU time of all the submission's threads is limited"""
+        pool = JvmPool(1)
+        executor = CodeExecutor(jvm_pool=pool)
+        code = """
+public class Solution {
+    public static void main(String[] args) throws Exception {
+        Thread[] workers = new Thread[4];
+        for (int i = 0; i < workers.length; i++) {
+            workers[i] = new Thread(() -> { while (true) {} });
+            workers[i].start();
+        }
+        workers[0].join();
+    }
+}
+"""
+        try:
+            with patch.object(CodeExecutor, 'CPU_TIME_LIMIT', 1):
+                with pytest.raises(CodeExecutionError, match="Time Limit Exceeded"):
+                    executor.execute(code, 'java')
+            assert pool.stats()['recycled'] == 1
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+
+
+FAKE_JAVA = """#!/usr/bin/env python3
+# Speaks JudgeRunner's protocol; the class name picks the reply
+import sys
+print("READY", flush=True)
+for line in sys.stdin:
+    class_dir, class_name, _, out_path, _, timeout, cpu, limit = line.rstrip("\\n").split("\\t")
+    with open(out_path, "w") as f:
+        f.write("x" * (int(limit) + 100) if class_name == "Big" else f"{timeout} {cpu} {limit}")
+    reply = {"Leak": "OK\\t1\\t0\\t1", "Big": "OUTPUT_LIMIT\\t1\\t0\\t0"}.get(class_name, "OK\\t1\\t250\\t0")
+    print(reply, flush=True)
+"""
+
+
+class TestJvmPoolProtocol:
+    """Tests for the pool's side of the JudgeRunner protocol, with a stand-in JVM"""
+    
+    @pytest.fixture
+    def pool(self, tmp_path, monkeypatch):
+        bin_dir = tmp_path / 'bin'
+        bin_dir.mkdir()
+        java = bin_dir / 'java'
+        java.write_text(FAKE_JAVA)
+        java.chmod(0o755)
+        monkeypatch.setenv('PATH', f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+        pool = JvmPool(1)
+        pool._runner_dir = str(tmp_path)
+        yield pool
+        pool.shutdown()
+    
+    def test_limits_are_sent_with_each_job(self, pool, tmp_path):
+        """Test the CPU and output limits reach the runner and CPU time comes back"""
+        result = pool.run(str(tmp_path), 'Solution', '', 5, cpu_limit=2, output_limit=1000)
+        assert result['stdout'] == "5000 2000 1000"
+        assert result['cpu_time'] == 0.25
+        assert result['healthy']
+        assert pool.stats() == {'size': 1, 'idle': 1, 'recycled': 0}
+    
+    def test_threads_left_running_retire_jvm(self, pool, tmp_path):
+        """Test a JVM reporting leftover threads is not reused"""
+        result = pool.run(str(tmp_path), 'Leak', '', 5)
+        assert result['returncode'] == 0
+        assert not result['healthy']
+        assert pool.stats()['recycled'] == 1
+    
+    def test_output_read_is_capped(self, pool, tmp_path):
+        """Test no more than the output limit is read back"""
+        result = pool.run(str(tmp_path), 'Big', '', 5, output_limit=1000)
+        assert result['output_exceeded']
+        assert len(result['stdout']) == 1000
+        assert pool.stats()['recycled'] == 1
+
+
+class TestResourceLimits:
+    """Tests for rlimits and per-run resource accounting"""
+    
+    def test_result_reports_memory_and_cpu_time(self):
+        """Test peak RSS and CPU time are returned next to the output"""
+        executor = CodeExecutor(python_pool=PythonWorkerPool(0, launcher=get_launcher()))
+        try:
+            result = executor.execute('print(sum(range(1000)))', 'python')
+            assert result['output'] == "499500"
+            assert result['memory'] > 0
+            assert result['cpu_time'] >= 0
+        finally:
+            executor.cleanup()
+    
+    def test_memory_excludes_parent_process(self):
+        """Test a large parent's resident set is not counted toward a run's peak"""
+        ballast = b'x' * (300 * 1024 * 1024)
+        executor = CodeExecutor(python_pool=PythonWorkerPool(0, launcher=get_launcher()))
+        try:
+            result = executor.execute('print("hi")', 'python')
+            assert 0 < result['memory'] < 100 * 1024
+            with pytest.raises(CodeExecutionError) as exc_info:
+                executor.execute('raise ValueError("boom")', 'python')
+            assert exc_info.value.verdict == 'Runtime Error'
+        finally:
+            executor.cleanup()
+            del ballast
+    
+    def test_memory_limit_exceeded(self):
+        """Test allocations beyond MEMORY_LIMIT are reported as MLE"""
+        executor = CodeExecutor()
+        code = f"data = bytearray({(CodeExecutor.MEMORY_LIMIT + 64) * 1024 * 1024})"
+        try:
+            with pytest.raises(CodeExecutionError, match="Memory Limit Exceeded") as exc_info:
+                executor.execute(code, 'python')
+            assert exc_info.value.verdict == 'Memory Limit Exceeded'
+        finally:
+            executor.cleanup()
+    
+    def test_output_limit_exceeded(self):
+        """Test runaway output is cut off instead of buffered"""
+        executor = CodeExecutor()
+        try:
+            with pytest.raises(CodeExecutionError, match="Output Limit Exceeded"):
+                executor.execute("while True: print('x' * 1000)", 'python')
+        finally:
+            executor.cleanup()
+    
+    def test_batch_error_result_has_verdict(self):
+        """Test per-case errors in a batch carry the verdict"""
+        executor = CodeExecutor()
+        try:
+            results = executor.execute_batch("raise SystemExit(input())", 'python', ["3"])
+            assert results[0]['verdict'] == 'Runtime Error'
+        finally:
+            executor.cleanup()
+
+
 class TestCodeExecutor:
     """General tests for CodeExecutor"""
     
@@ -175,15 +487,18 @@ class TestCodeExecutor:
             executor.execute("code", "ruby")
         executor.cleanup()
     
-    def test_cleanup(self):
-        """Test cleanup removes temporary directory"""
+    def test_cleanup(self, tmp_path):
+        """Test the workspace is scrubbed and returned after each run"""
         import os
-        executor = CodeExecutor()
-        temp_dir = executor.temp_dir
-        assert os.path.exists(temp_dir)
+        workspaces = WorkspacePool(str(tmp_path / 'workspaces'), size=1)
+        executor = CodeExecutor(workspaces=workspaces)
+        
+        executor.execute("open('scratch.txt', 'w').write('x')\nprint('done')", 'python')
         
+        assert workspaces.stats()['idle'] == 1
+        workspace = workspaces.lease()
+        assert os.listdir(workspace) == []
         executor.cleanup()
-        assert not os.path.exists(temp_dir)
     
     def test_multiple_executions(self):
         """Test multiple code executions"""
@@ -201,6 +516,314 @@ class TestCodeExecutor:
             executor.cleanup()
 
 
+class TestBatchExecution:
+    """Tests for running several inputs against one build"""
+    
+    def test_python_batch_returns_result_per_input(self):
+        """Test each input gets its own result in order"""
+        executor = CodeExecutor()
+        code = """
+n = int(input())
+print(n * 2)
+"""
+        try:
+            results = executor.execute_batch(code, 'python', ["1", "2", "3"])
+            assert [r['output'] for r in results] == ["2", "4", "6"]
+            assert all(r['error'] is None for r in results)
+            assert all(r['time'] >= 0 for r in results)
+        finally:
+            executor.cleanup()
+    
+    def test_batch_reports_case_errors_without_stopping(self):
+        """Test a failing case does not abort the remaining cases"""
+        executor = CodeExecutor()
+        code = """
+n = int(input())
+print(10 // n)
+"""
+        try:
+            results = executor.execute_batch(code, 'python', ["5", "0", "2"])
+            assert results[0]['output'] == "2"
+            assert "Runtime Error" in results[1]['error']
+            assert results[2]['output'] == "5"
+        finally:
+            executor.cleanup()
+    
+    def test_parallel_batch_keeps_input_order(self):
+        """Test results come back in input order when cases run concurrently"""
+        executor = CodeExecutor()
+        code = """
+import time
+n = int(input())
+time.sleep(0.05 * (5 - n))
+print(n)
+"""
+        try:
+            results = executor.execute_batch(code, 'python', ["1", "2", "3", "4"], parallel=True)
+            assert [r['output'] for r in results] == ["1", "2", "3", "4"]
+        finally:
+            executor.cleanup()
+    
+    def test_fail_fast_skips_remaining_cases(self):
+        """Test cases after the first failure are skipped"""
+        executor = CodeExecutor()
+        code = """
+n = int(input())
+print(10 // n)
+"""
+        try:
+            results = executor.execute_batch(code, 'python', ["5", "0", "2"], fail_fast=True)
+            assert results[0]['output'] == "2"
+            assert results[1]['verdict'] == 'Runtime Error'
+            assert results[2]['verdict'] == 'Skipped'
+        finally:
+            executor.cleanup()
+    
+    def test_fail_fast_with_custom_failure_check(self):
+        """Test fail_fast can stop on wrong answers via is_failure"""
+        executor = CodeExecutor()
+        expected = ["1", "2", "3"]
+        try:
+            results = executor.execute_batch(
+                'print(input())', 'python', ["1", "9", "3"],
+                fail_fast=True,
+                is_failure=lambda index, result: result['output'] != expected[index]
+            )
+            assert [r.get('skipped', False) for r in results] == [False, False, True]
+        finally:
+            executor.cleanup()
+    
+    def test_parallel_fail_fast_returns_every_case(self):
+        """Test parallel fail_fast still returns one result per input"""
+        executor = CodeExecutor()
+        try:
+            stdin_list = ["0"] + ["1"] * 20
+            results = executor.execute_batch(
+                'print(1 // int(input()))', 'python', stdin_list, parallel=True, fail_fast=True
+            )
+            assert len(results) == len(stdin_list)
+            assert results[0]['verdict'] == 'Runtime Error'
+        finally:
+            executor.cleanup()
+    
+    def test_batch_unsupported_language(self):
+        """Test unsupported language error in batch mode"""
+        executor = CodeExecutor()
+        with pytest.raises(ValueError, match="Unsupported language"):
+            executor.execute_batch("code", "ruby", ["1"])
+        executor.cleanup()
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ compiler installed")
+    def test_cpp_batch_compiles_once(self, tmp_path):
+        """Test C++ batch compiles a single time for all inputs"""
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path), 10 * 1024 * 1024))
+        code = """
+#include <iostream>
+int main() {
+    int n;
+    std::cin >> n;
+    std::cout << n + 1 << std::endl;
+    return 0;
+}
+"""
+        try:
+            with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+                results = executor.execute_batch(code, 'cpp', ["1", "2", "3"])
+            assert [r['output'] for r in results] == ["2", "3", "4"]
+            assert _compile_calls(mock_run) == 1
+        finally:
+            executor.cleanup()
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ compiler installed")
+    def test_cpp_batch_compilation_error(self):
+        """Test compilation errors are raised for the whole batch"""
+        executor = CodeExecutor()
+        with pytest.raises(CodeExecutionError, match="Compilation Error"):
+            executor.execute_batch("int main() { return 0 }", 'cpp', ["1", "2"])
+        executor.cleanup()
+
+
+class TestCompileCache:
+    """Tests for the content-addressed compile cache"""
+    
+    def _artifact(self, tmp_path, name, size):
+        path = tmp_path / name
+        path.write_bytes(b"x" * size)
+        return str(path)
+    
+    def test_key_depends_on_all_inputs(self):
+        """Test source, language, compiler version and flags all change the key"""
+        base = CompileCache.make_key("src", "cpp", "g++ 12", ["-O2"])
+        assert base == CompileCache.make_key("src", "cpp", "g++ 12", ["-O2"])
+        assert base != CompileCache.make_key("src2", "cpp", "g++ 12", ["-O2"])
+        assert base != CompileCache.make_key("src", "java", "g++ 12", ["-O2"])
+        assert base != CompileCache.make_key("src", "cpp", "g++ 13", ["-O2"])
+        assert base != CompileCache.make_key("src", "cpp", "g++ 12", ["-O0"])
+    
+    def test_hit_and_miss_counters(self, tmp_path):
+        """Test get/put round trip and counters"""
+        cache = CompileCache(str(tmp_path / "cache"), 1024 * 1024)
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        
+        assert cache.get("k1", str(dest)) is None
+        cache.put("k1", [self._artifact(tmp_path, "solution", 10)])
+        copied = cache.get("k1", str(dest))
+        
+        assert copied == [str(dest / "solution")]
+        assert (dest / "solution").read_bytes() == b"x" * 10
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['entries'] == 1
+    
+    def test_lru_eviction(self, tmp_path):
+        """Test least recently used entries are evicted past the size budget"""
+        import os
+        cache = CompileCache(str(tmp_path / "cache"), 250)
+        dest = tmp_path / "dest"
+        dest.mkdir()
+        
+        cache.put("old", [self._artifact(tmp_path, "a", 100)])
+        cache.put("recent", [self._artifact(tmp_path, "b", 100)])
+        os.utime(tmp_path / "cache" / "old", (1, 1))
+        os.utime(tmp_path / "cache" / "recent", (2, 2))
+        cache.get("old", str(dest))  # touching makes it the most recent
+        cache.put("new", [self._artifact(tmp_path, "c", 100)])
+        
+        assert cache.get("recent", str(dest)) is None
+        assert cache.get("old", str(dest)) is not None
+        assert cache.get("new", str(dest)) is not None
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ compiler installed")
+    def test_cpp_cache_hit_skips_compilation(self, tmp_path):
+        """Test the second compile of the same source is served from cache"""
+        cache = CompileCache(str(tmp_path), 10 * 1024 * 1024)
+        code = """
+#include <iostream>
+int main() { std::cout << "cached" << std::endl; return 0; }
+"""
+        first = CodeExecutor(compile_cache=cache)
+        second = CodeExecutor(compile_cache=cache)
+        try:
+            assert first.execute(code, 'cpp')['output'] == "cached"
+            with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+                assert second.execute(code, 'cpp')['output'] == "cached"
+            assert _compile_calls(mock_run) == 0
+            assert cache.stats()['hits'] == 1
+        finally:
+            first.cleanup()
+            second.cleanup()
+
+
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ installed")
+    def test_quick_build_reuses_optimized_build(self, tmp_path):
+        """Test Run reuses a cached optimized build of the same code"""
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        code = '#include <iostream>\nint main() { std::cout << 5; }'
+        executor.execute(code, 'cpp')
+        
+        with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+            result = executor.execute(code, 'cpp', quick_build=True)
+        
+        assert result['output'] == '5'
+        assert _compile_calls(mock_run) == 0
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ installed")
+    def test_one_lookup_per_build(self, tmp_path):
+        """Test a quick build counts one lookup, and lookups reach /metrics counters"""
+        from services.metrics import get_metrics
+        cache = CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024)
+        executor = CodeExecutor(compile_cache=cache)
+        get_metrics().clear()
+        
+        executor.execute('#include <iostream>\nint main() { std::cout << 6; }', 'cpp', quick_build=True)
+        executor.execute('#include <iostream>\nint main() { std::cout << 6; }', 'cpp', quick_build=True)
+        
+        assert (cache.stats()['hits'], cache.stats()['misses']) == (1, 1)
+        assert cache.stats()['hit_rate'] == 0.5
+        assert get_metrics().get_counter('compile_cache_lookups_total', language='cpp', result='miss') == 1
+        assert get_metrics().get_counter('compile_cache_lookups_total', language='cpp', result='hit') == 1
+
+
+class TestPythonWorkerPool:
+    """Tests for the pre-started Python interpreter pool"""
+    
+    def _wait_for_idle(self, pool, count):
+        import time
+        deadline = time.time() + 10
+        while pool.stats()['idle'] < count and time.time() < deadline:
+            time.sleep(0.05)
+    
+    def test_pooled_execution_uses_warm_worker(self):
+        """Test runs are served by pre-started workers"""
+        pool = PythonWorkerPool(1)
+        pool.start()
+        self._wait_for_idle(pool, 1)
+        executor = CodeExecutor(python_pool=pool)
+        try:
+            result = executor.execute('print(input()[::-1])', 'python', stdin_data="abc")
+            assert result['output'] == "cba"
+            assert pool.stats()['warm_hits'] == 1
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_worker_has_warm_modules_imported(self):
+        """Test configured modules are imported before the submission runs"""
+        pool = PythonWorkerPool(1, warm_modules=['json', 'heapq'])
+        executor = CodeExecutor(python_pool=pool)
+        code = """
+import sys
+print('heapq' in sys.modules, 'json' in sys.modules)
+"""
+        try:
+            assert executor.execute(code, 'python')['output'] == "True True"
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_each_worker_runs_one_submission(self):
+        """Test state from one run is not visible to the next"""
+        pool = PythonWorkerPool(1)
+        executor = CodeExecutor(python_pool=pool)
+        code = """
+import json
+print(hasattr(json, 'leaked'))
+json.leaked = True
+"""
+        try:
+            assert executor.execute(code, 'python')['output'] == "False"
+            assert executor.execute(code, 'python')['output'] == "False"
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_pooled_errors_match_cold_run(self):
+        """Test tracebacks only show the submission's frames"""
+        pool = PythonWorkerPool(1)
+        executor = CodeExecutor(python_pool=pool)
+        try:
+            with pytest.raises(CodeExecutionError) as exc_info:
+                executor.execute("x = 1 / 0", 'python')
+            assert "ZeroDivisionError" in str(exc_info.value)
+            assert "runpy" not in str(exc_info.value)
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+    
+    def test_pooled_timeout(self):
+        """Test the time limit still applies to pooled workers"""
+        pool = PythonWorkerPool(1)
+        executor = CodeExecutor(python_pool=pool)
+        try:
+            with pytest.raises(CodeExecutionError, match="Time Limit Exceeded"):
+                executor.execute("while True: pass", 'python')
+        finally:
+            executor.cleanup()
+            pool.shutdown()
+
+
 class TestProblemSolutions:
     """Test complete problem solutions"""
     
@@ -254,3 +877,648 @@ print(json.dumps(s))
             executor.cleanup()
 
 
+class TestWorkspacePool:
+    """Tests for reusable execution workspaces"""
+    
+    def test_released_workspace_is_scrubbed_and_reused(self, tmp_path):
+        """Test a returned workspace is emptied, including read-only directories"""
+        import os
+        pool = WorkspacePool(str(tmp_path / 'workspaces'), size=1)
+        workspace = pool.lease()
+        os.makedirs(os.path.join(workspace, 'nested', 'deeper'))
+        open(os.path.join(workspace, 'nested', 'deeper', 'file.txt'), 'w').close()
+        os.chmod(os.path.join(workspace, 'nested'), 0o500)
+        
+        pool.release(workspace)
+        
+        assert pool.lease() == workspace
+        assert os.listdir(workspace) == []
+        assert pool.stats()['reused'] == 2
+    
+    def test_overflow_workspaces_are_removed(self, tmp_path):
+        """Test workspaces created under load are not kept past the pool size"""
+        import os
+        pool = WorkspacePool(str(tmp_path / 'workspaces'), size=1)
+        first, second = pool.lease(), pool.lease()
+        assert first != second
+        
+        pool.release(first)
+        pool.release(second)
+        
+        assert pool.stats()['idle'] == 1
+        assert len(os.listdir(pool.root)) == 1
+    
+    def test_shared_executor_across_threads(self, tmp_path):
+        """Test one executor can run submissions from several threads at once"""
+        from concurrent.futures import ThreadPoolExecutor
+        executor = CodeExecutor(workspaces=WorkspacePool(str(tmp_path / 'workspaces'), size=2))
+        
+        def run(n):
+            return executor.execute(f"import time\ntime.sleep(0.05)\nprint({n})", 'python')['output']
+        
+        with ThreadPoolExecutor(max_workers=8) as threads:
+            outputs = list(threads.map(run, range(8)))
+        
+        assert outputs == [str(n) for n in range(8)]
+
+
+@pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ installed")
+class TestPrecompiledHeaders:
+    """Tests for the precompiled standard header bundle"""
+    
+    def _wait_for_bundle(self, flags, timeout=60):
+        import time
+        from services import cpp_pch
+        from services.code_executor import _compiler_version
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            pch_flags = cpp_pch.get_pch_flags('g++', _compiler_version('g++'), flags)
+            if pch_flags:
+                return pch_flags
+            time.sleep(0.2)
+        pytest.fail("Precompiled header was not built")
+    
+    def test_bundle_is_built_and_used(self, tmp_path):
+        """Test a leading #include <bits/stdc++.h> loads the PCH once it is ready"""
+        import os
+        pch_flags = self._wait_for_bundle(get_runtime('cpp').flags)
+        assert os.path.exists(os.path.join(pch_flags[1], 'bits', 'stdc++.h.gch'))
+        
+        result = subprocess.run(
+            ['g++', *get_runtime('cpp').flags, *pch_flags, '-H', '-fsyntax-only', '-x', 'c++', '-'],
+            input='#include <bits/stdc++.h>\nint main() {}\n', capture_output=True, text=True
+        )
+        assert result.stderr.startswith('! ')
+        
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+            result = executor.execute('#include <bits/stdc++.h>\nint main() { std::cout << 7; }', 'cpp')
+        
+        assert result['output'] == '7'
+        assert any(pch_flags[1] in call.args[0] for call in mock_run.call_args_list)
+    
+    @pytest.mark.parametrize('problem_id', [1, 2, 3])
+    def test_starter_code_loads_pch(self, problem_id):
+        """Test the C++ starter code begins with the precompiled header"""
+        from services import problems
+        pch_flags = self._wait_for_bundle(get_runtime('cpp').flags)
+        starter = get_runtime('cpp').starter_code(problems.get_problem(problem_id))
+        
+        result = subprocess.run(
+            ['g++', *get_runtime('cpp').flags, *pch_flags, '-H', '-fsyntax-only', '-x', 'c++', '-'],
+            input=starter, capture_output=True, text=True
+        )
+        # Only the first include matters here; jsoncpp (Two Sum) may not be installed
+        assert result.stderr.startswith('! '), result.stderr
+    
+    def test_other_sources_compile_unchanged(self, tmp_path):
+        """Test names the standard headers would clash with still compile, in one build"""
+        self._wait_for_bundle(get_runtime('cpp').flags)
+        # Without <algorithm>, 'count' and 'std::count' do not clash
+        code = """#include <cstdio>
+using namespace std;
+int count = 3;
+int main() { printf("%d", count); }
+"""
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+            result = executor.execute(code, 'cpp')
+        
+        assert result['output'] == '3'
+        assert _compile_calls(mock_run) == 1
+    
+    def test_quick_build_uses_unoptimized_flags(self, tmp_path):
+        """Test quick builds (Run) compile at -O0"""
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        with patch('services.code_executor.subprocess.run', wraps=subprocess.run) as mock_run:
+            result = executor.execute('int main() { return 0; }', 'cpp', quick_build=True)
+        
+        assert result['error'] is None
+        compile_args = [call.args[0] for call in mock_run.call_args_list if '-o' in call.args[0]]
+        assert '-O0' in compile_args[0] and '-O2' not in compile_args[0]
+
+
+class TestFileCases:
+    """Tests for test cases streamed from files"""
+    
+    def _write_case(self, tmp_path, stdin_data, expected):
+        (tmp_path / 'case.in').write_text(stdin_data)
+        (tmp_path / 'case.out').write_text(expected)
+        return FileCase(str(tmp_path / 'case.in'), str(tmp_path / 'case.out'))
+    
+    def test_large_input_streamed_and_checked(self, tmp_path):
+        """Test a multi-megabyte case is streamed and only previewed"""
+        numbers = ' '.join(str(i) for i in range(1000000))
+        case = self._write_case(tmp_path, numbers + '\n', numbers + '\n')
+        executor = CodeExecutor()
+        
+        result = executor.execute_batch("import sys\nsys.stdout.write(sys.stdin.read())", 'python', [case])[0]
+        
+        assert result['error'] is None
+        assert result['output_matches'] is True
+        assert len(result['output']) <= CodeExecutor.OUTPUT_PREVIEW
+    
+    def test_file_case_mismatch(self, tmp_path):
+        """Test wrong output for a file case is reported"""
+        case = self._write_case(tmp_path, '5\n', '25\n')
+        executor = CodeExecutor()
+        
+        result = executor.execute_batch("print(int(input()) * 2)", 'python', [case])[0]
+        
+        assert result['output'] == '10'
+        assert result['output_matches'] is False
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ installed")
+    def test_file_case_cpp(self, tmp_path):
+        """Test file cases with a compiled program"""
+        case = self._write_case(tmp_path, '3 4\n', '7\n')
+        executor = CodeExecutor()
+        code = "#include <iostream>\nint main() { int a, b; std::cin >> a >> b; std::cout << a + b; }"
+        
+        result = executor.execute_batch(code, 'cpp', [case, '1 1'])
+        
+        assert result[0]['output_matches'] is True
+        assert result[1]['output'] == '2' and 'output_matches' not in result[1]
+
+
+class TestOutputCheckers:
+    """Tests for streaming output comparison and early termination"""
+    
+    @pytest.mark.parametrize("mode, chunks, expected, matches", [
+        ('whitespace', [b'1 2', b' 3\n'], '1 2 3\n', True),
+        ('whitespace', [b'12', b'3'], '1 2 3', True),
+        ('whitespace', [b'1 2 3 4'], '1 2 3', False),
+        ('whitespace', [b'1 2'], '1 2 3', False),
+        ('whitespace', [], '\n\n', True),
+        ('exact', [b'1 2', b' 3\n\n'], '1 2 3', True),
+        ('exact', [b'12 3'], '1 2 3', False),
+        ('exact', [b'1 2 \n', b'3'], '1 2 \n3\n', True),
+        ('unordered_lines', [b'b\na', b'\nc\n'], 'a\nb\nc\n', True),
+        ('unordered_lines', [b'a\na\n'], 'a\nb\n', False),
+        ('unordered_lines', [b'a\n'], 'a\nb\n', False),
+        ('float', [b'0.3333', b'33334 2'], '0.333333333 2.0', True),
+        ('float', [b'0.34 2'], '0.333333333 2', False),
+        ('float', [b'1e-9 x'], '0 x', True),
+        ('float', [b'nan'], 'nan', True),
+        ('float', [b'1 2'], '1 2 3', False)
+    ])
+    def test_modes(self, mode, chunks, expected, matches):
+        """Test each comparison mode, fed in arbitrary chunks"""
+        checker = create_checker(mode, expected=expected)
+        for chunk in chunks:
+            checker.feed(chunk)
+        assert checker.finish() is matches
+    
+    def test_expected_file(self, tmp_path):
+        """Test the expected output can be read from a file"""
+        (tmp_path / 'expected.out').write_text('1 2 3\n')
+        checker = create_checker('exact', expected_path=str(tmp_path / 'expected.out'))
+        assert checker.feed(b'1 2 ') is True
+        assert checker.finish() is False
+    
+    def test_feed_reports_mismatch_immediately(self):
+        """Test a mismatch is detected before the output ends"""
+        checker = create_checker('whitespace', expected='1 2 3')
+        assert checker.feed(b'1 ') is True
+        assert checker.feed(b'9') is False
+        assert checker.feed(b' 3') is False
+        assert checker.finish() is False
+    
+    def test_unknown_mode(self):
+        """Test an unknown comparison mode is rejected"""
+        with pytest.raises(ValueError):
+            create_checker('fuzzy', expected='1')
+    
+    def test_outputs_equal(self):
+        """Test comparing complete outputs"""
+        assert outputs_equal('3.0000001\n', '3', mode='float')
+        assert not outputs_equal('3.1', '3', mode='float', tolerance=0.01)
+    
+    def test_checked_case(self):
+        """Test string cases with an expected output are checked while running"""
+        executor = CodeExecutor()
+        
+        results = executor.execute_batch(
+            "print(int(input()) * 2)", 'python', ['2', '3', '4'],
+            expected_outputs=['4', '7', None]
+        )
+        
+        assert results[0]['output_matches'] is True
+        assert results[1]['output_matches'] is False
+        assert 'output_matches' not in results[2]
+    
+    def test_wrong_answer_stops_program(self):
+        """Test a program printing forever is stopped at its first wrong line"""
+        executor = CodeExecutor()
+        code = "i = 0\nwhile True:\n    print(i)\n    i += 1"
+        
+        result = executor.execute_batch(code, 'python', [''], expected_outputs=['0\n1\n2\n99'])[0]
+        
+        assert result['error'] is None
+        assert result['output_matches'] is False
+        assert result['terminated_early'] is True
+        assert result['time'] < CodeExecutor.TIMEOUT / 2
+    
+    def test_wrong_answer_stops_file_case(self, tmp_path):
+        """Test early termination for file cases"""
+        (tmp_path / 'case.in').write_text('')
+        (tmp_path / 'case.out').write_text('yes\n')
+        executor = CodeExecutor()
+        
+        result = executor.execute_batch(
+            "import time\nprint('no', flush=True)\ntime.sleep(30)", 'python',
+            [FileCase(str(tmp_path / 'case.in'), str(tmp_path / 'case.out'))]
+        )[0]
+        
+        assert result['output_matches'] is False
+        assert result['time'] < CodeExecutor.TIMEOUT
+    
+    def test_compare_mode_used_while_running(self):
+        """Test the requested comparison mode is applied"""
+        executor = CodeExecutor()
+        
+        result = executor.execute_batch(
+            "print(1 / 3)", 'python', [''],
+            expected_outputs=['0.333333'], compare_mode='float', float_tolerance=1e-5
+        )[0]
+        
+        assert result['output_matches'] is True
+
+
+class TestLanguageRuntimes:
+    """Tests for the language runtime registry"""
+    
+    @pytest.mark.parametrize("language, code", [
+        ('go', 'package main\nimport "fmt"\nfunc main() { var a, b int; fmt.Scan(&a, &b); fmt.Println(a + b) }'),
+        ('rust', 'use std::io::Read;\nfn main() { let mut s = String::new(); '
+                 'std::io::stdin().read_to_string(&mut s).unwrap(); '
+                 'let v: Vec<i64> = s.split_whitespace().map(|x| x.parse().unwrap()).collect(); '
+                 'println!("{}", v[0] + v[1]); }'),
+        ('javascript', "const [a, b] = require('fs').readFileSync(0, 'utf8').split(/\\s+/).map(Number);\n"
+                       "console.log(a + b);"),
+        ('pypy', "a, b = map(int, input().split())\nprint(a + b)")
+    ])
+    def test_language_runs(self, tmp_path, language, code):
+        """Test each registered language builds and runs a submission"""
+        if not get_runtime(language).available():
+            pytest.skip(f"{language} is not installed")
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        
+        results = executor.execute_batch(code, language, ['3 4', '10 -2'])
+        
+        assert [result['output'] for result in results] == ['7', '8']
+    
+    @pytest.mark.skipif(shutil.which('go') is None, reason="Requires go installed")
+    def test_compiled_language_uses_compile_cache(self, tmp_path):
+        """Test compiled runtimes share the compile cache"""
+        cache = CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024)
+        executor = CodeExecutor(compile_cache=cache)
+        code = 'package main\nimport "fmt"\nfunc main() { fmt.Println(42) }'
+        
+        executor.execute(code, 'go')
+        result = executor.execute(code, 'go')
+        
+        assert result['output'] == '42'
+        assert cache.hits == 1
+    
+    @pytest.mark.skipif(shutil.which('go') is None, reason="Requires go installed")
+    def test_memory_limit_with_data_rlimit(self):
+        """Test runtimes capped with RLIMIT_DATA still hit the memory limit"""
+        executor = CodeExecutor()
+        code = 'package main\nfunc main() { a := [][]byte{}; for { b := make([]byte, 1<<20); b[0] = 1; a = append(a, b) } }'
+        
+        with pytest.raises(CodeExecutionError) as exc_info:
+            executor.execute(code, 'go')
+        
+        assert exc_info.value.verdict == 'Memory Limit Exceeded'
+    
+    def test_registered_runtime_is_used(self, monkeypatch):
+        """Test a language added by configuration runs through the executor"""
+        monkeypatch.setattr('services.languages._runtimes', dict(languages._runtimes))
+        register_runtime(LanguageRuntime(
+            'python-optimized', 'Python -O', 'main.py', run_cmd=['python3', '-O', '{source}']
+        ))
+        executor = CodeExecutor()
+        
+        result = executor.execute("assert False\nprint('asserts off')", 'python-optimized')
+        
+        assert result['output'] == 'asserts off'
+    
+    def test_starter_code_fallbacks(self):
+        """Test starter code comes from the problem, a shared language or a template"""
+        problem = {'starter_code': {'python': 'py starter', 'java': 'java starter'}}
+        
+        assert get_runtime('java').starter_code(problem) == 'java starter'
+        assert get_runtime('pypy').starter_code(problem) == 'py starter'
+        assert get_runtime('go').starter_code(problem).startswith('package main')
+    
+    def test_unavailable_runtime(self):
+        """Test runtimes whose tools are missing are reported unavailable"""
+        runtime = LanguageRuntime('missing', 'Missing', 'a.x', run_cmd=['definitely-not-installed', '{source}'])
+        
+        assert runtime.available() is False
+        assert get_runtime('python').available() is True
+
+
+class TestPhaseTimings:
+    """Tests for per-phase timing of executions"""
+    
+    def test_single_run_reports_every_phase(self):
+        """Test a run reports write, spawn, run and cleanup times"""
+        executor = CodeExecutor(python_pool=None)
+        
+        result = executor.execute("print('hi')", 'python')
+        
+        assert set(result['phases']) == {'write', 'spawn', 'run', 'cleanup'}
+        assert all(seconds >= 0 for seconds in result['phases'].values())
+    
+    @pytest.mark.skipif(shutil.which('g++') is None, reason="Requires g++ installed")
+    def test_batch_phases_include_compile(self, tmp_path):
+        """Test compiled batches time the compile once for every case"""
+        executor = CodeExecutor(compile_cache=CompileCache(str(tmp_path / 'cache'), 64 * 1024 * 1024))
+        code = "#include <iostream>\nint main() { int n; std::cin >> n; std::cout << n; }"
+        
+        results = executor.execute_batch(code, 'cpp', ['1', '2'])
+        
+        assert {'write', 'compile', 'spawn', 'run', 'cleanup'} <= set(results[0]['phases'])
+        assert results[0]['phases']['compile'] == results[1]['phases']['compile']
+    
+    def test_error_results_keep_phases(self):
+        """Test failed cases still report how long they ran"""
+        executor = CodeExecutor()
+        
+        results = executor.execute_batch("raise SystemExit(3)", 'python', [''])
+        
+        assert results[0]['error']
+        assert results[0]['phases']['run'] >= 0
+    
+    def test_compilation_error_keeps_build_phases(self):
+        """Test a failed build reports its write and compile times"""
+        if shutil.which('g++') is None:
+            pytest.skip("Requires g++ installed")
+        executor = CodeExecutor()
+        
+        with pytest.raises(CodeExecutionError) as exc_info:
+            executor.execute("int main() { return undefined; }", 'cpp')
+        
+        assert set(exc_info.value.usage['phases']) == {'write', 'compile'}
+    
+    def test_phases_exported_as_histograms(self):
+        """Test executions are recorded in the metrics registry"""
+        from services.metrics import get_metrics
+        
+        metrics = get_metrics()
+        metrics.clear()
+        CodeExecutor().execute("print(1)", 'python')
+        
+        for phase in ('write', 'spawn', 'run', 'cleanup'):
+            histogram = metrics.get_histogram('code_execution_phase_seconds', language='python', phase=phase)
+            assert histogram.count == 1
+        assert 'code_execution_phase_seconds_bucket{language="python",phase="run",le="+Inf"} 1' \
+            in metrics.render()
+
+
+def _is_running(pid, wait=1.0):
+    """Whether a process is alive (not exited or a zombie) after up to `wait` seconds"""
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                state = f.read().rsplit(')', 1)[1].split()[0]
+        except OSError:
+            return False
+        if state in ('Z', 'X'):
+            return False
+        if time.monotonic() >= deadline:
+            return True
+        time.sleep(0.01)
+
+
+class TestProcessCleanup:
+    """Tests for stopping and reaping runs and their children"""
+    
+    def test_sigterm_ignored_is_killed(self):
+        """Test a program that ignores SIGTERM is killed after the grace period"""
+        executor = CodeExecutor()
+        code = "import signal\nsignal.signal(signal.SIGTERM, signal.SIG_IGN)\nwhile True: pass"
+        
+        start = time.monotonic()
+        with pytest.raises(CodeExecutionError) as exc_info:
+            executor.execute(code, 'python')
+        
+        assert exc_info.value.verdict == 'Time Limit Exceeded'
+        assert time.monotonic() - start < CodeExecutor.TIMEOUT + 1
+        # The reaped run reports its resource usage
+        assert exc_info.value.usage['cpu_time'] > 0
+    
+    def test_background_children_are_killed(self):
+        """Test children a program leaves behind die with its process group"""
+        executor = CodeExecutor()
+        code = (
+            "import os, time\n"
+            "pid = os.fork()\n"
+            "if pid == 0:\n"
+            "    os.close(1)\n"
+            "    os.close(2)\n"
+            "    time.sleep(60)\n"
+            "else:\n"
+            "    print(pid)\n"
+        )
+        
+        result = executor.execute(code, 'python')
+        
+        assert not _is_running(int(result['output']))
+    
+    def test_stopped_run_is_reaped(self):
+        """Test an early-stopped run leaves no zombie behind"""
+        executor = CodeExecutor()
+        
+        with patch.object(CodeExecutor, '_reap', autospec=True, side_effect=CodeExecutor._reap) as reap:
+            executor.execute_batch("while True: print('no')", 'python', [''], expected_outputs=['yes'])
+        
+        process = reap.call_args.args[1]
+        assert reap.call_args.kwargs['terminate'] is True
+        assert process.returncode is not None
+        assert not os.path.exists(f'/proc/{process.pid}')
+    
+    def test_cpu_limit_separate_from_wall_clock(self):
+        """Test the CPU time limit applies even while the wall-clock limit has not passed"""
+        executor = CodeExecutor()
+        # Pooled workers are started with the default limits
+        executor.python_pool = None
+        executor.CPU_TIME_LIMIT = 1
+        
+        with pytest.raises(CodeExecutionError) as exc_info:
+            executor.execute("while True: pass", 'python')
+        
+        assert exc_info.value.verdict == 'Time Limit Exceeded'
+        assert 'CPU time' in str(exc_info.value)
+    
+    def test_watchdog_kills_leaked_process(self):
+        """Test the watchdog reports and kills processes left in a finished group"""
+        from services.process_watchdog import ProcessWatchdog
+        
+        leaked = subprocess.Popen(['sleep', '30'], start_new_session=True)
+        watchdog = ProcessWatchdog()
+        try:
+            watchdog.watch(leaked.pid)
+            found = watchdog.check()
+            
+            assert [pid for pid, _ in found] == [leaked.pid]
+            assert leaked.wait(timeout=5) == -signal.SIGKILL
+            assert watchdog.stats()['leaked'] == 1
+        finally:
+            leaked.kill()
+            leaked.wait()
+    
+    def test_watchdog_ignores_recycled_group(self):
+        """Test processes started after the run finished are left alone"""
+        from services.process_watchdog import ProcessWatchdog
+        
+        watchdog = ProcessWatchdog()
+        watchdog.watch(os.getpgrp())
+        with patch('services.process_watchdog._clock_ticks_since_boot', return_value=0):
+            watchdog.watch(os.getpgrp())
+        
+        assert watchdog.check() == []
+
+
+class TestExecutionWorkers:
+    """Tests for running executions on remote workers (all on localhost)"""
+    
+    @pytest.fixture
+    def workers(self):
+        """Start two execution workers on free ports"""
+        from services.execution_worker import make_server
+        
+        servers = [make_server(port=0) for _ in range(2)]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        yield servers
+        for server in servers:
+            server.shutdown()
+            server.server_close()
+    
+    @staticmethod
+    def _remote(servers):
+        from services.remote_executor import RemoteExecutors
+        
+        remote = RemoteExecutors([f"http://127.0.0.1:{server.server_address[1]}" for server in servers])
+        remote.check_health()
+        return remote
+    
+    def test_batch_runs_on_worker(self, workers):
+        """Test a batch is served by a worker, with checked results and callbacks"""
+        executor = CodeExecutor(remote=self._remote(workers))
+        seen = []
+        
+        results = executor.execute_batch(
+            "print(int(input()) * 2)", 'python', ['1', '2'], expected_outputs=['2', '5'],
+            on_result=lambda index, result: seen.append(index)
+        )
+        
+        assert [result['output'] for result in results] == ['2', '4']
+        assert [result['output_matches'] for result in results] == [True, False]
+        assert seen == [0, 1]
+        assert sum(server.worker.served for server in workers) == 1
+    
+    def test_errors_are_raised_again(self, workers):
+        """Test a compilation error on a worker is raised on the web node"""
+        if shutil.which('g++') is None:
+            pytest.skip("Requires g++ installed")
+        executor = CodeExecutor(remote=self._remote(workers))
+        
+        with pytest.raises(CodeExecutionError) as exc_info:
+            executor.execute("int main() { return undefined; }", 'cpp')
+        
+        assert exc_info.value.verdict == 'Compilation Error'
+    
+    def test_least_loaded_worker_is_chosen(self, workers):
+        """Test requests go to the worker with the most spare capacity"""
+        remote = self._remote(workers)
+        remote.workers[0].active = remote.workers[0].capacity
+        executor = CodeExecutor(remote=remote)
+        
+        executor.execute("print('hi')", 'python')
+        
+        assert workers[0].worker.served == 0
+        assert workers[1].worker.served == 1
+    
+    def test_failover_to_another_worker(self, workers):
+        """Test a worker that stopped answering is skipped"""
+        remote = self._remote(workers)
+        workers[0].shutdown()
+        workers[0].server_close()
+        remote.workers[1].active = remote.workers[1].capacity  # prefer the dead one
+        
+        result = CodeExecutor(remote=remote).execute("print('hi')", 'python')
+        
+        assert result['output'] == 'hi'
+        assert remote.workers[0].healthy is False
+        assert remote.workers[0].failures == 1
+        assert workers[1].worker.served == 1
+    
+    def test_falls_back_to_local_execution(self):
+        """Test executions run locally when no worker answers"""
+        from services.remote_executor import RemoteExecutors
+        
+        remote = RemoteExecutors(['http://127.0.0.1:9'], health_timeout=0.5)
+        remote.check_health()
+        
+        result = CodeExecutor(remote=remote).execute("print('local')", 'python')
+        
+        assert result['output'] == 'local'
+        assert remote.stats()['local_fallbacks'] == 1
+    
+    def test_hidden_tests_sent_to_worker_with_the_data(self, tmp_path, monkeypatch):
+        """Test file-backed cases go by name to a worker that has the files"""
+        from services import problems
+        from services.execution_worker import ExecutionWorker, make_server
+        
+        web_data = tmp_path / 'web'
+        (web_data / '1').mkdir(parents=True)
+        (web_data / '1' / 'big.in').write_text('21\n')
+        (web_data / '1' / 'big.out').write_text('42\n')
+        monkeypatch.setattr(problems, 'TEST_DATA_DIR', str(web_data))
+        shutil.copytree(web_data, tmp_path / 'worker')
+        servers = [make_server(port=0, worker=ExecutionWorker(test_data_dir=str(tmp_path / directory)))
+                   for directory in ('missing', 'worker')]
+        for server in servers:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            remote = self._remote(servers)
+            remote.workers[1].active = remote.workers[1].capacity  # ask the one without the data first
+            case = FileCase(str(web_data / '1' / 'big.in'), str(web_data / '1' / 'big.out'))
+            
+            results = CodeExecutor(remote=remote).execute_batch("print(int(input()) * 2)", 'python', [case])
+        finally:
+            for server in servers:
+                server.shutdown()
+                server.server_close()
+        
+        assert results[0]['output_matches'] is True
+        assert remote.workers[0].healthy is True
+        assert [worker.served for worker in remote.workers] == [0, 1]
+    
+    def test_hidden_tests_run_locally_without_worker_data(self, workers, tmp_path, monkeypatch):
+        """Test file-backed cases no worker has run on the web node"""
+        from services import problems
+        monkeypatch.setattr(problems, 'TEST_DATA_DIR', str(tmp_path / 'data'))
+        (tmp_path / 'case.in').write_text('5\n')
+        (tmp_path / 'case.out').write_text('10\n')
+        remote = self._remote(workers)
+        
+        results = CodeExecutor(remote=remote).execute_batch(
+            "print(int(input()) * 2)", 'python', [FileCase(str(tmp_path / 'case.in'), str(tmp_path / 'case.out'))]
+        )
+        
+        assert results[0]['output_matches'] is True
+        assert sum(server.worker.served for server in workers) == 0
+    
+    def test_health_reports_load_and_languages(self, workers):
+        """Test /health describes the worker"""
+        remote = self._remote(workers)
+        
+        assert all(worker.healthy for worker in remote.workers)
+        assert 'python' in remote.workers[0].languages
+        assert remote.workers[0].capacity >= 1
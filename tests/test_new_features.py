@@ -2,7 +2,9 @@
 Tests for new features: audio interviews and coding challenges.
 """
 import pytest
+import copy
 import json
+import math
 from unittest.mock import patch, MagicMock
 
 
@@ -17,6 +19,17 @@ class TestCodingChallengeRoutes:
         response = client.get('/coding_challenge')
         assert response.status_code == 200
     
+    def test_coding_challenge_lists_available_languages(self, client):
+        """Test the language selector offers the installed runtimes"""
+        from services import languages
+        with client.session_transaction() as sess:
+            sess['current_problem_id'] = 1
+        
+        html = client.get('/coding_challenge').get_data(as_text=True)
+        
+        for runtime in languages.list_runtimes():
+            assert (f'<option value="{runtime.name}"' in html) is runtime.available()
+    
     def test_coding_challenge_random_problem(self, client):
         """Test random problem selection"""
         response = client.get('/coding_challenge')
@@ -66,16 +79,66 @@ class TestCodingChallengeRoutes:
         
         assert response.status_code == 400
     
+    @patch('services.code_executor.CodeExecutor')
+    def test_run_code_custom_stdin(self, mock_executor_class, client):
+        """Test Run uses custom stdin and reports runtime and memory"""
+        mock_executor = MagicMock()
+        mock_executor.execute.return_value = {
+            'output': '7', 'error': None, 'exit_code': 0, 'time': 0.02, 'memory': 9000
+        }
+        mock_executor_class.return_value = mock_executor
+        
+        response = client.post('/run_code', data=json.dumps({
+            'code': 'print(sum(map(int, input().split())))', 'language': 'python',
+            'problem_id': 1, 'stdin': '3 4'
+        }), content_type='application/json')
+        result = json.loads(response.data)
+        
+        mock_executor.execute.assert_called_once_with(
+            'print(sum(map(int, input().split())))', 'python', '3 4', quick_build=True
+        )
+        assert result['custom_input'] is True
+        assert result['runtime'] == 0.02
+        assert result['memory'] == 9000
+        assert 'passed' not in result
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_run_code_sample_reports_match(self, mock_executor_class, client):
+        """Test Run on the sample case says whether the output matched"""
+        mock_executor = MagicMock()
+        mock_executor.execute.return_value = {'output': '[0,1]', 'error': None, 'exit_code': 0}
+        mock_executor_class.return_value = mock_executor
+        
+        response = client.post('/run_code', data=json.dumps({
+            'code': 'solution', 'language': 'python', 'problem_id': 1
+        }), content_type='application/json')
+        result = json.loads(response.data)
+        
+        assert result['custom_input'] is False
+        assert result['passed'] is True
+        assert result['expected_output'] == '[0,1]'
+    
+    def test_run_code_custom_stdin_too_large(self, client):
+        """Test oversized custom input is rejected"""
+        from config import Config
+        
+        response = client.post('/run_code', data=json.dumps({
+            'code': 'print(1)', 'language': 'python', 'problem_id': 1,
+            'stdin': 'x' * (Config.MAX_CUSTOM_STDIN_BYTES + 1)
+        }), content_type='application/json')
+        
+        assert response.status_code == 400
+    
     @patch('services.code_executor.CodeExecutor')
     def test_submit_code_all_pass(self, mock_executor_class, client):
         """Test submitting code with all tests passing"""
         # Setup mock
         mock_executor = MagicMock()
-        mock_executor.execute.return_value = {
+        mock_executor.execute_batch.return_value = [{
             'output': '[0,1]',
             'error': None,
             'exit_code': 0
-        }
+        }] * 3
         mock_executor_class.return_value = mock_executor
         
         data = {
@@ -101,11 +164,11 @@ class TestCodingChallengeRoutes:
         """Test submitting code with test failures"""
         # Setup mock
         mock_executor = MagicMock()
-        mock_executor.execute.return_value = {
+        mock_executor.execute_batch.return_value = [{
             'output': '[1,0]',  # Wrong answer
             'error': None,
             'exit_code': 0
-        }
+        }] * 3
         mock_executor_class.return_value = mock_executor
         
         data = {
@@ -125,6 +188,161 @@ class TestCodingChallengeRoutes:
         result = json.loads(response.data)
         assert result['all_passed'] == False
     
+    @patch('services.code_executor.CodeExecutor')
+    def test_submit_code_reports_memory_limit(self, mock_executor_class, client):
+        """Test per-case verdict, runtime and memory in submission results"""
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[0,1]', 'error': None, 'exit_code': 0, 'time': 0.01, 'memory': 9000},
+            {'output': '', 'error': 'Memory Limit Exceeded (> 256 MB)',
+             'verdict': 'Memory Limit Exceeded', 'time': 0.2, 'memory': 262000},
+            {'output': '[0,1]', 'error': None, 'exit_code': 0, 'time': 0.01, 'memory': 9000}
+        ]
+        mock_executor_class.return_value = mock_executor
+        
+        data = {
+            'code': 'solution code',
+            'language': 'python',
+            'problem_id': 1
+        }
+        
+        response = client.post(
+            '/submit_code',
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        
+        result = json.loads(response.data)
+        verdicts = [t['verdict'] for t in result['test_results']]
+        assert verdicts == ['Accepted', 'Memory Limit Exceeded', 'Accepted']
+        assert result['test_results'][1]['memory'] == 262000
+        assert result['all_passed'] == False
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_submit_code_fail_fast(self, mock_executor_class, client):
+        """Test fail_fast is forwarded and skipped cases are reported"""
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[1,0]', 'error': None, 'exit_code': 0},
+            {'output': '', 'error': None, 'verdict': 'Skipped', 'skipped': True},
+            {'output': '', 'error': None, 'verdict': 'Skipped', 'skipped': True}
+        ]
+        mock_executor_class.return_value = mock_executor
+        
+        data = {
+            'code': 'solution code',
+            'language': 'python',
+            'problem_id': 1,
+            'fail_fast': True
+        }
+        
+        response = client.post(
+            '/submit_code',
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        
+        result = json.loads(response.data)
+        assert mock_executor.execute_batch.call_args.kwargs['fail_fast'] is True
+        assert [t['verdict'] for t in result['test_results']] == ['Wrong Answer', 'Skipped', 'Skipped']
+    
+    @pytest.fixture
+    def stream_queue(self, tmp_path):
+        """A judge queue with one worker serving the streamed submission routes"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1)
+        queue.start()
+        with patch('services.judge_queue.get_judge_queue', return_value=queue):
+            yield queue
+        queue.stop()
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_submit_code_stream(self, mock_executor_class, client, stream_queue):
+        """Test streamed submission sends each case before the summary"""
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[0,1]', 'error': None, 'exit_code': 0, 'time': 0.01, 'memory': 9000}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        data = {
+            'code': 'solution code',
+            'language': 'python',
+            'problem_id': 1
+        }
+        
+        response = client.post(
+            '/submit_code_stream',
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 200
+        assert response.mimetype == 'application/x-ndjson'
+        events = [json.loads(line) for line in response.data.decode().splitlines()]
+        assert [event['type'] for event in events] == ['start', 'case', 'case', 'case', 'summary']
+        assert events[0]['total_tests'] == 3
+        assert sorted(event['index'] for event in events[1:4]) == [0, 1, 2]
+        assert events[1]['case']['memory'] == 9000
+        assert events[-1]['total_tests'] == 3
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_submit_code_stream_records_verdict(self, mock_executor_class, client, stream_queue):
+        """Test a streamed submission's verdict reaches the session on the next request"""
+        from services import judge
+        
+        judge._verdict_cache.clear()
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': 'wrong', 'error': None, 'exit_code': 0, 'time': 0.01, 'memory': 9000}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        response = client.post(
+            '/submit_code_stream',
+            data=json.dumps({'code': 'streamed code', 'language': 'python', 'problem_id': 1}),
+            content_type='application/json'
+        )
+        summary = json.loads(response.data.decode().splitlines()[-1])
+        with client.session_transaction() as sess:
+            assert len(sess['pending_jobs']) == 1
+            submissions = len(sess.get('code_submissions', []))
+        
+        # Read back from the queue database, so any web process can do this
+        client.get('/metrics')
+        
+        with client.session_transaction() as sess:
+            assert len(sess['code_submissions']) == submissions + 1
+            assert sess['code_submissions'][-1]['passed'] is summary['all_passed'] is False
+            assert sess['pending_jobs'] == {}
+    
+    def test_submit_code_stream_goes_through_queue(self, client, tmp_path):
+        """Test streamed submissions get the queue's backpressure and hand off to polling"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=0, max_depth=1)
+        data = json.dumps({'code': 'solution code', 'language': 'python', 'problem_id': 1})
+        with patch('services.judge_queue.get_judge_queue', return_value=queue), \
+                patch.object(JudgeQueue, 'STREAM_TIMEOUT', 0.2), patch.object(JudgeQueue, 'POLL_INTERVAL', 0.05):
+            queued = client.post('/submit_code_stream', data=data, content_type='application/json')
+            last_event = json.loads(queued.data.decode().splitlines()[-1])
+            full = client.post('/submit_code_stream', data=data, content_type='application/json')
+        
+        assert last_event['type'] == 'timeout'
+        assert last_event['status_url'].startswith('/judge/jobs/')
+        assert full.status_code == 503
+    
+    def test_submit_code_stream_missing_code(self, client):
+        """Test streamed submission validates input before streaming"""
+        response = client.post(
+            '/submit_code_stream',
+            data=json.dumps({'language': 'python', 'problem_id': 1}),
+            content_type='application/json'
+        )
+        
+        assert response.status_code == 400
+    
     def test_change_problem(self, client):
         """Test changing to different problem"""
         response = client.get('/change_problem/2', follow_redirects=False)
@@ -140,6 +358,575 @@ class TestCodingChallengeRoutes:
         assert b'Problem not found' in response.data
 
 
+class TestVerdictCache:
+    """Tests for caching verdicts of identical submissions"""
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_resubmission_served_from_cache(self, mock_executor_class, client):
+        """Test identical code is only executed once"""
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[0,1]', 'error': None, 'exit_code': 0}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        data = json.dumps({'code': 'solution code', 'language': 'python', 'problem_id': 1})
+        first = json.loads(client.post('/submit_code', data=data, content_type='application/json').data)
+        second = json.loads(client.post('/submit_code', data=data, content_type='application/json').data)
+        
+        assert mock_executor.execute_batch.call_count == 1
+        assert first['cached'] is False
+        assert second['cached'] is True
+        assert second['test_results'] == first['test_results']
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_changed_test_cases_invalidate(self, mock_executor_class):
+        """Test editing a problem's test cases bypasses old entries"""
+        from services import judge, problems
+        
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[0,1]', 'error': None, 'exit_code': 0}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        problem = copy.deepcopy(problems.get_problem(1))
+        judge.judge_submission('solution code', 'python', problem)
+        problem['test_cases'][0]['expected_output'] = '[1,0]'
+        result = judge.judge_submission('solution code', 'python', problem)
+        
+        assert mock_executor.execute_batch.call_count == 2
+        assert result['cached'] is False
+        assert result['test_results'][0]['passed'] is False
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_time_limit_not_cached(self, mock_executor_class):
+        """Test load-dependent verdicts are re-run"""
+        from services import judge, problems
+        
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '', 'error': 'Time limit exceeded', 'verdict': 'Time Limit Exceeded'}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        problem = problems.get_problem(1)
+        judge.judge_submission('while True: pass', 'python', problem)
+        judge.judge_submission('while True: pass', 'python', problem)
+        
+        assert mock_executor.execute_batch.call_count == 2
+    
+    @pytest.mark.parametrize('message,verdict', [
+        ("Compilation Timeout", 'Compilation Error'),
+        ("Execution failed: [Errno 11] Resource temporarily unavailable", None)
+    ])
+    @patch('services.code_executor.CodeExecutor')
+    def test_infrastructure_errors_not_cached(self, mock_executor_class, message, verdict):
+        """Test compiler timeouts and executor failures are judged again"""
+        from services import judge, problems
+        from services.code_executor import CodeExecutionError
+        
+        judge._verdict_cache.clear()
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.side_effect = CodeExecutionError(message, verdict=verdict)
+        mock_executor_class.return_value = mock_executor
+        
+        problem = problems.get_problem(1)
+        judge.judge_submission('flaky code', 'cpp', problem)
+        result = judge.judge_submission('flaky code', 'cpp', problem)
+        
+        assert mock_executor.execute_batch.call_count == 2
+        assert result['cached'] is False
+    
+    @pytest.mark.parametrize('exit_code,cached', [(-9, False), (-15, False), (1, True)])
+    @patch('services.code_executor.CodeExecutor')
+    def test_killed_runs_not_cached(self, mock_executor_class, exit_code, cached):
+        """Test a Runtime Error from a run killed by a signal is judged again"""
+        from services import judge, problems
+        
+        judge._verdict_cache.clear()
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '', 'error': 'Runtime Error:\nKilled', 'verdict': 'Runtime Error', 'exit_code': exit_code}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        problem = problems.get_problem(1)
+        judge.judge_submission('x = [0] * 10**9', 'python', problem)
+        result = judge.judge_submission('x = [0] * 10**9', 'python', problem)
+        
+        assert mock_executor.execute_batch.call_count == (1 if cached else 2)
+        assert result['cached'] is cached
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_compiler_diagnostics_cached(self, mock_executor_class):
+        """Test a genuine compilation error is served from the cache"""
+        from services import judge, problems
+        from services.code_executor import CodeExecutionError
+        
+        judge._verdict_cache.clear()
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.side_effect = CodeExecutionError(
+            "Compilation Error:\nexpected ';'", verdict='Compilation Error'
+        )
+        mock_executor_class.return_value = mock_executor
+        
+        problem = problems.get_problem(1)
+        judge.judge_submission('int main() {', 'cpp', problem)
+        result = judge.judge_submission('int main() {', 'cpp', problem)
+        
+        assert mock_executor.execute_batch.call_count == 1
+        assert result['cached'] is True
+    
+    @patch('services.code_executor.CodeExecutor')
+    def test_submission_logged_with_phases(self, mock_executor_class, capsys):
+        """Test each submission prints one structured log line"""
+        from services import judge, problems
+        
+        mock_executor = MagicMock()
+        mock_executor.execute_batch.return_value = [
+            {'output': '[0,1]', 'error': None, 'exit_code': 0,
+             'phases': {'write': 0.001, 'spawn': 0.002, 'run': 0.01, 'cleanup': 0.003}}
+        ] * 3
+        mock_executor_class.return_value = mock_executor
+        
+        result = judge.judge_submission('logged code', 'python', problems.get_problem(1))
+        log = json.loads(capsys.readouterr().out.strip().splitlines()[-1])
+        
+        assert result['phases']['run'] == pytest.approx(0.03)
+        assert result['phases']['write'] == 0.001
+        assert log['event'] == 'submission'
+        assert log['language'] == 'python'
+        assert log['problem_id'] == 1
+        assert log['verdict'] == result['test_results'][1]['verdict'] == 'Wrong Answer'
+        assert log['phases']['spawn'] == pytest.approx(0.006)
+    
+    def test_metrics_endpoint(self, client):
+        """Test /metrics serves phase histograms and submission counts"""
+        from services.metrics import get_metrics
+        
+        get_metrics().observe('code_execution_phase_seconds', 0.2, language='cpp', phase='compile')
+        get_metrics().increment('judge_submissions_total', language='cpp', verdict='Accepted')
+        response = client.get('/metrics')
+        body = response.data.decode()
+        
+        assert response.status_code == 200
+        assert response.content_type.startswith('text/plain')
+        assert '# TYPE code_execution_phase_seconds histogram' in body
+        assert 'code_execution_phase_seconds_bucket{language="cpp",phase="compile",le="0.25"}' in body
+        assert 'judge_submissions_total{language="cpp",verdict="Accepted"}' in body
+    
+    def test_lru_eviction(self):
+        """Test the cache stays within its bound"""
+        from services.judge import VerdictCache
+        
+        cache = VerdictCache(2)
+        cache.put('a', {'n': 1})
+        cache.put('b', {'n': 2})
+        cache.get('a')
+        cache.put('c', {'n': 3})
+        
+        assert cache.get('b') is None
+        assert cache.get('a') == {'n': 1}
+        assert cache.stats()['entries'] == 2
+
+
+class TestComplexityAnalysis:
+    """Tests for complexity estimation on scaled inputs"""
+    
+    @pytest.mark.parametrize("growth, expected", [
+        (lambda n: 1e-6 * n, 'O(n)'),
+        (lambda n: 1e-7 * n * math.log2(n), 'O(n log n)'),
+        (lambda n: 1e-8 * n * n, 'O(n^2)')
+    ])
+    def test_fit_complexity(self, growth, expected):
+        """Test synthetic timings are classified correctly"""
+        from services.complexity import fit_complexity
+        sizes = [10**4, 10**5, 10**6, 10**7]
+        assert fit_complexity(sizes, [growth(n) for n in sizes]) == expected
+    
+    def test_fit_complexity_needs_signal(self):
+        """Test noise-level timings are not over-interpreted"""
+        from services.complexity import fit_complexity
+        assert fit_complexity([1000, 10000], [0.001, 0.002]) == 'O(1)'
+        assert fit_complexity([1000, 10000], [0.001, 0.5]) is None
+    
+    def test_fit_complexity_time_limit_bound(self):
+        """Test a size that ran out of time rules out classes that would have finished it"""
+        from services.complexity import fit_complexity
+        assert fit_complexity([1000], [0.1], lower_bounds=[(10000, 5.0)]) == 'O(n^2)'
+        assert fit_complexity([1000, 3000], [0.1, 0.9], lower_bounds=[(10000, 5.0)]) == 'O(n^2)'
+    
+    def test_analyze_complexity_quadratic(self):
+        """Test a real O(n^2) solution is classified on the problem's own sizes"""
+        from services import complexity, problems
+        from services.code_executor import CodeExecutor
+        code = """import json
+nums = json.loads(input()); target = int(input())
+answer = None
+for i in range(len(nums)):
+    for j in range(i + 1, len(nums)):
+        if nums[i] + nums[j] == target:
+            answer = [i, j]
+print(json.dumps(answer))
+"""
+        with patch.object(CodeExecutor, 'CPU_TIME_LIMIT', 2):
+            result = complexity.analyze_complexity(code, 'python', problems.get_problem(1))
+        
+        verdicts = [t['verdict'] for t in result['timings']]
+        assert 'Time Limit Exceeded' in verdicts
+        assert result['complexity'] == 'O(n^2)'
+        assert result['within_budget'] is False
+    
+    @pytest.mark.parametrize("problem_id", [1, 2, 3])
+    def test_perf_generators(self, problem_id):
+        """Test every problem's generator yields deterministic, solvable inputs"""
+        from services import problems
+        problem = problems.get_problem(problem_id)
+        stdin_data, expected = problems.generate_perf_input(problem, 1000)
+        
+        assert problem['perf']['sizes'] == sorted(problem['perf']['sizes'])
+        assert problems.generate_perf_input(problem, 1000) == (stdin_data, expected)
+        if problem_id == 1:
+            nums, target = json.loads(stdin_data.split('\n')[0]), int(stdin_data.split('\n')[1])
+            pairs = [(i, j) for i in range(len(nums)) for j in range(i + 1, len(nums))
+                     if nums[i] + nums[j] == target]
+            assert pairs == [tuple(json.loads(expected))]
+    
+    def test_analyze_complexity_python(self):
+        """Test a linear solution is timed on every size and classified"""
+        from services import complexity, problems
+        problem = copy.deepcopy(problems.get_problem(3))
+        problem['perf']['sizes'] = [20000, 200000]
+        code = """s = input().strip()
+pairs = {')': '(', ']': '[', '}': '{'}
+stack = []
+ok = True
+for c in s:
+    if c in pairs:
+        if not stack or stack.pop() != pairs[c]:
+            ok = False
+            break
+    else:
+        stack.append(c)
+print(str(ok and not stack).lower())
+"""
+        result = complexity.analyze_complexity(code, 'python', problem)
+        
+        assert [t['verdict'] for t in result['timings']] == ['Accepted', 'Accepted']
+        assert result['expected_complexity'] == 'O(n)'
+        assert result['within_budget'] is True
+    
+    def test_analyze_complexity_wrong_answer_stops(self):
+        """Test a wrong answer on scaled input stops the larger sizes"""
+        from services import complexity, problems
+        problem = copy.deepcopy(problems.get_problem(3))
+        problem['perf']['sizes'] = [1000, 2000]
+        code = "s = input()\nprint('true' if len(s) < 10 else 'false')"
+        
+        result = complexity.analyze_complexity(code, 'python', problem)
+        
+        assert [t['verdict'] for t in result['timings']] == ['Wrong Answer', 'Skipped']
+        assert result['within_budget'] is False
+    
+    def test_analyze_complexity_route(self, client, tmp_path):
+        """Test the route queues the analysis and the job returns its result"""
+        import time
+        from services.judge_queue import JudgeQueue
+        
+        analyze = MagicMock(return_value={'complexity': 'O(n)', 'timings': []})
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, analyze_fn=analyze)
+        queue.start()
+        try:
+            with patch('services.judge_queue.get_judge_queue', return_value=queue):
+                response = client.post(
+                    '/analyze_complexity',
+                    data=json.dumps({'code': 'code', 'language': 'python', 'problem_id': 1}),
+                    content_type='application/json'
+                )
+                assert response.status_code == 202
+                status_url = json.loads(response.data)['status_url']
+                deadline = time.time() + 5
+                job = json.loads(client.get(status_url).data)
+                while job['status'] not in ('done', 'error') and time.time() < deadline:
+                    time.sleep(0.05)
+                    job = json.loads(client.get(status_url).data)
+        finally:
+            queue.stop()
+        
+        assert job['kind'] == 'complexity'
+        assert job['result']['complexity'] == 'O(n)'
+        assert analyze.call_args.args[:2] == ('code', 'python')
+        with client.session_transaction() as sess:
+            assert not sess.get('code_submissions')
+    
+    def test_perf_inputs_are_memoized(self):
+        """Test scaled inputs are generated once per problem and size"""
+        from services import problems
+        problem = problems.get_problem(1)
+        
+        assert problems.generate_perf_input(problem, 5000) is problems.generate_perf_input(problem, 5000)
+        assert problems.generate_perf_input(problem, 5000) != problems.generate_perf_input(problem, 6000)
+
+
+class TestHiddenTests:
+    """Tests for hidden test data stored on disk"""
+    
+    SOLUTION = """import json
+nums = json.loads(input()); target = int(input())
+seen = {}
+for i, x in enumerate(nums):
+    if target - x in seen:
+        print(json.dumps([seen[target - x], i])); break
+    seen[x] = i
+"""
+    
+    def test_hidden_tests_are_judged(self, tmp_path, monkeypatch):
+        """Test generated stress files run after the visible cases"""
+        from services import judge, problems
+        monkeypatch.setattr(problems, 'TEST_DATA_DIR', str(tmp_path))
+        problem = problems.get_problem(1)
+        problems.write_perf_test_files(problem, [100000])
+        
+        result = judge.judge_submission(self.SOLUTION, 'python', problem)
+        
+        hidden = result['test_results'][-1]
+        assert result['total_tests'] == len(problem['test_cases']) + 1
+        assert result['all_passed'] is True
+        assert hidden['expected'] == 'Hidden'
+        assert hidden['input'].startswith('Hidden test stress_100000.in')
+    
+    def test_hidden_test_wrong_answer(self, tmp_path, monkeypatch):
+        """Test a solution failing only the hidden test is rejected"""
+        from services import judge, problems
+        monkeypatch.setattr(problems, 'TEST_DATA_DIR', str(tmp_path))
+        problem = problems.get_problem(1)
+        problems.write_perf_test_files(problem, [1000])
+        # Correct on the visible cases only
+        code = self.SOLUTION.replace("seen[x] = i", "seen[x] = i\n    if i > 100: print('[0,1]'); break")
+        
+        result = judge.judge_submission(code, 'python', problem)
+        
+        assert [t['verdict'] for t in result['test_results']] == ['Accepted'] * 3 + ['Wrong Answer']
+    
+    def test_new_hidden_tests_invalidate_cache(self, tmp_path, monkeypatch):
+        """Test adding hidden test files changes the verdict cache key"""
+        from services import judge, problems
+        monkeypatch.setattr(problems, 'TEST_DATA_DIR', str(tmp_path))
+        problem = problems.get_problem(1)
+        before = judge.VerdictCache.make_key('code', 'python', problem, False)
+        problems.write_perf_test_files(problem, [1000])
+        
+        assert judge.VerdictCache.make_key('code', 'python', problem, False) != before
+
+
+class TestJudgeQueue:
+    """Tests for the asynchronous judge queue"""
+    
+    @staticmethod
+    def _fake_judge(code, language, problem, fail_fast, on_case):
+        results = []
+        for index, test_case in enumerate(problem['test_cases']):
+            graded = {'expected': test_case['expected_output'], 'passed': True, 'verdict': 'Accepted'}
+            on_case(index, graded)
+            results.append(graded)
+        return {'test_results': results, 'all_passed': True,
+                'total_tests': len(results), 'passed_tests': len(results)}
+    
+    @staticmethod
+    def _wait_until_finished(queue, job_id, timeout=5):
+        import time
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = queue.get(job_id)
+            if job['status'] in ('done', 'error'):
+                return job
+            time.sleep(0.05)
+        raise AssertionError(f"Job {job_id} did not finish")
+    
+    def test_job_runs_and_records_cases(self, tmp_path):
+        """Test a worker picks up a job and stores each case's result"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, judge_fn=self._fake_judge)
+        job_id = queue.submit('code', 'python', 1)
+        queue.start()
+        try:
+            job = self._wait_until_finished(queue, job_id)
+        finally:
+            queue.stop()
+        
+        assert job['status'] == 'done'
+        assert job['result']['all_passed'] is True
+        assert len(job['cases']) == job['result']['total_tests']
+    
+    def test_unknown_problem_marks_job_failed(self, tmp_path):
+        """Test errors while judging are stored on the job"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, judge_fn=self._fake_judge)
+        job_id = queue.submit('code', 'python', 999)
+        queue.start()
+        try:
+            job = self._wait_until_finished(queue, job_id)
+        finally:
+            queue.stop()
+        
+        assert job['status'] == 'error'
+        assert 'Problem not found' in job['error']
+    
+    def test_queue_rejects_when_full(self, tmp_path):
+        """Test submissions beyond max_depth are rejected"""
+        from services.judge_queue import JudgeQueue, QueueFullError
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=0, max_depth=2)
+        first = queue.submit('code', 'python', 1)
+        queue.submit('code', 'python', 1)
+        
+        with pytest.raises(QueueFullError):
+            queue.submit('code', 'python', 1)
+        assert queue.stats()['queue_depth'] == 2
+        assert queue.get(first)['queue_position'] == 1
+    
+    def test_finished_jobs_are_pruned(self, tmp_path):
+        """Test finished jobs lose their code at once and are deleted after the retention period"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, judge_fn=self._fake_judge, retention=0)
+        job_id = queue.submit('secret code', 'python', 1)
+        queue.start()
+        try:
+            self._wait_until_finished(queue, job_id)
+        finally:
+            queue.stop()
+        with queue._connect() as conn:
+            assert conn.execute("SELECT code FROM jobs WHERE id = ?", (job_id,)).fetchone()[0] == ''
+        
+        queue.maintain()
+        
+        assert queue.get(job_id) is None
+        with queue._connect() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM job_cases").fetchone()[0] == 0
+    
+    def test_stale_job_is_requeued_while_running(self, tmp_path):
+        """Test a job abandoned by a dead worker is picked up without a restart"""
+        import time
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, judge_fn=self._fake_judge)
+        queue.start()
+        try:
+            # Claimed by a worker that died after the queue started
+            with queue._connect() as conn:
+                conn.execute(
+                    "INSERT INTO jobs (id, status, problem_id, language, code, worker, created, started) "
+                    "VALUES ('stale', 'running', 1, 'python', 'code', 'dead-worker', ?, ?)",
+                    (time.time(), time.time() - JudgeQueue.STALE_AFTER - 1)
+                )
+            with patch.object(JudgeQueue, 'MAINTENANCE_INTERVAL', 0):
+                job = self._wait_until_finished(queue, 'stale')
+        finally:
+            queue.stop()
+        
+        assert job['status'] == 'done'
+    
+    def test_event_stream_stops_at_deadline(self, client, tmp_path):
+        """Test an event stream for a job that never finishes ends with a timeout event"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=0)
+        job_id = queue.submit('code', 'python', 1)
+        with patch('services.judge_queue.get_judge_queue', return_value=queue), \
+                patch.object(JudgeQueue, 'STREAM_TIMEOUT', 0.3), patch.object(JudgeQueue, 'POLL_INTERVAL', 0.05):
+            body = client.get(f'/judge/jobs/{job_id}/events').get_data(as_text=True)
+        
+        assert 'event: status' in body
+        assert body.rstrip().split('\n')[-2] == 'event: timeout'
+
+    def test_event_stream_reconnect_skips_sent_cases(self, client, tmp_path):
+        """Test a reconnecting client gets only the cases it has not seen"""
+        from services.judge_queue import JudgeQueue
+
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=0)
+        job_id = queue.submit('code', 'python', 1)
+        with queue._connect() as conn:
+            for index in (0, 2):
+                conn.execute("INSERT INTO job_cases (job_id, case_index, result) VALUES (?, ?, '{}')",
+                             (job_id, index))
+        with patch('services.judge_queue.get_judge_queue', return_value=queue), \
+                patch.object(JudgeQueue, 'STREAM_TIMEOUT', 0.2), patch.object(JudgeQueue, 'POLL_INTERVAL', 0.05):
+            first = client.get(f'/judge/jobs/{job_id}/events').get_data(as_text=True)
+            last_id = [line for line in first.split('\n') if line.startswith('id: ')][-1][4:]
+            with queue._connect() as conn:
+                conn.execute("INSERT INTO job_cases (job_id, case_index, result) VALUES (?, 1, '{}')", (job_id,))
+            second = client.get(f'/judge/jobs/{job_id}/events',
+                                headers={'Last-Event-ID': last_id}).get_data(as_text=True)
+
+        assert first.startswith('retry: ')
+        assert first.count('event: case') == 2
+        assert second.count('event: case') == 1
+        assert '"index": 1' in second
+
+    def test_database_without_job_kinds_is_upgraded(self, tmp_path):
+        """Test a queue database from before job kinds gets the column"""
+        import sqlite3
+        from services.judge_queue import JudgeQueue
+        
+        db_path = str(tmp_path / 'queue.db')
+        conn = sqlite3.connect(db_path)
+        conn.execute("CREATE TABLE jobs (id TEXT PRIMARY KEY, status TEXT NOT NULL, problem_id INTEGER, "
+                     "language TEXT NOT NULL, code TEXT NOT NULL, fail_fast INTEGER NOT NULL DEFAULT 0, "
+                     "worker TEXT, created REAL NOT NULL, started REAL, finished REAL, result TEXT, error TEXT)")
+        conn.close()
+        
+        queue = JudgeQueue(db_path, workers=0)
+        job_id = queue.submit('code', 'python', 1)
+        
+        assert queue.get(job_id)['kind'] == 'submission'
+    
+    def test_async_submit_and_poll(self, client, tmp_path):
+        """Test /submit_code_async returns a job that can be polled to completion"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=1, judge_fn=self._fake_judge)
+        queue.start()
+        try:
+            with patch('services.judge_queue.get_judge_queue', return_value=queue):
+                response = client.post(
+                    '/submit_code_async',
+                    data=json.dumps({'code': 'solution code', 'language': 'python', 'problem_id': 1}),
+                    content_type='application/json'
+                )
+                assert response.status_code == 202
+                job_id = json.loads(response.data)['job_id']
+                
+                self._wait_until_finished(queue, job_id)
+                result = json.loads(client.get(f'/judge/jobs/{job_id}').data)
+        finally:
+            queue.stop()
+        
+        assert result['status'] == 'done'
+        assert result['result']['all_passed'] is True
+        with client.session_transaction() as sess:
+            assert sess['code_submissions'][-1]['passed'] is True
+            assert job_id not in sess['pending_jobs']
+    
+    def test_async_submit_queue_full(self, client, tmp_path):
+        """Test a full queue answers 503 with Retry-After"""
+        from services.judge_queue import JudgeQueue
+        
+        queue = JudgeQueue(str(tmp_path / 'queue.db'), workers=0, max_depth=0)
+        with patch('services.judge_queue.get_judge_queue', return_value=queue):
+            response = client.post(
+                '/submit_code_async',
+                data=json.dumps({'code': 'solution code', 'language': 'python', 'problem_id': 1}),
+                content_type='application/json'
+            )
+        
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '5'
+
+
 class TestAudioInterviewFeatures:
     """Tests for audio interview features"""
     
@@ -173,6 +960,161 @@ class TestAudioInterviewFeatures:
                     assert response.status_code == 302
 
 
+class TestInterviewStreaming:
+    """Tests for streaming interview turns over server-sent events"""
+    
+    @pytest.fixture
+    def streaming_client(self, client, tmp_path):
+        """A client mid-interview, with a fake model that streams its replies"""
+        from services import llm_chains, turn_store
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        previous = llm_chains.llm
+        turn_store.set_turn_store(turn_store.TurnStore(str(tmp_path / 'turns.db')))
+        with client.session_transaction() as sess:
+            sess['interview_history'] = [{"question": "Tell me about yourself.", "answer": None, "feedback": None}]
+            sess['current_stage'] = 'FOUNDATIONAL_WARMUP'
+            sess['stage_question_count'] = 0
+        with patch('services.document_processor.get_vector_store', return_value=MagicMock()):
+            yield client, lambda responses: llm_chains.set_llm_instance(FakeListChatModel(responses=responses))
+        llm_chains.set_llm_instance(previous)
+        turn_store.set_turn_store(None)
+    
+    @staticmethod
+    def _events(response):
+        events = []
+        for block in response.get_data(as_text=True).strip().split('\n\n'):
+            lines = dict(line.split(': ', 1) for line in block.split('\n'))
+            events.append((lines['event'], json.loads(lines['data'])))
+        return events
+    
+    def test_feedback_then_question_streamed(self, streaming_client):
+        """Test feedback and question arrive in pieces and the turn is saved afterwards"""
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: Clear and relevant.\nACTION: CONTINUE", "What is a hash map?"])
+        
+        response = client.post('/interview_flow/stream', data={'user_answer': 'I build APIs.'})
+        events = self._events(response)
+        
+        assert response.mimetype == 'text/event-stream'
+        feedback = [data['text'] for name, data in events if name == 'feedback']
+        question = [data['text'] for name, data in events if name == 'question']
+        assert len(feedback) > 1 and ''.join(feedback) == "Clear and relevant."
+        assert len(question) > 1 and ''.join(question) == "What is a hash map?"
+        assert [name for name, _ in events].index('question') > [name for name, _ in events].index('feedback')
+        assert events[-1] == ('done', {'action': 'CONTINUE', 'redirect': '/start_interview'})
+        
+        page = client.get('/start_interview')
+        with client.session_transaction() as sess:
+            history = sess['interview_history']
+        
+        assert b'What is a hash map?' in page.data
+        assert history[0]['answer'] == 'I build APIs.'
+        assert history[0]['feedback'].startswith("Clear and relevant.")
+        assert history[1] == {"question": "What is a hash map?", "answer": None, "feedback": None}
+        assert 'pending_turn' not in sess
+    
+    def test_turn_applied_by_another_process(self, streaming_client, tmp_path):
+        """Test the next request finds the streamed turn without the streaming process's memory"""
+        from services import turn_store
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: Clear and relevant.\nACTION: CONTINUE", "What is a hash map?"])
+        
+        client.post('/interview_flow/stream', data={'user_answer': 'I build APIs.'}).get_data()
+        # A fresh store on the same file, as another gunicorn worker would open
+        turn_store.set_turn_store(turn_store.TurnStore(str(tmp_path / 'turns.db')))
+        client.get('/start_interview')
+        
+        with client.session_transaction() as sess:
+            assert sess['interview_history'][1]['question'] == "What is a hash map?"
+            assert 'pending_turn' not in sess
+    
+    def test_turn_store_expires_and_bounds_turns(self, tmp_path):
+        """Test uncollected turns expire and only the newest are kept"""
+        import time
+        from services.turn_store import TurnStore
+        
+        store = TurnStore(str(tmp_path / 'turns.db'), max_entries=2, ttl=60)
+        for turn_id in ('a', 'b', 'c'):
+            store.put(turn_id, {'session': {}, 'flashes': [["Saved", "info"]]})
+        
+        assert store.pop('a') is None
+        assert store.pop('b') == {'session': {}, 'flashes': [["Saved", "info"]]}
+        assert store.pop('b') is None
+        with patch('services.turn_store.time.time', return_value=time.time() + 61):
+            assert store.pop('c') is None
+    
+    def test_end_interview_action(self, streaming_client):
+        """Test an END_INTERVIEW analysis sends the candidate to end_interview"""
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: The answer was dismissive.\nACTION: END_INTERVIEW"])
+        
+        events = self._events(client.post('/interview_flow/stream', data={'user_answer': 'No.'}))
+        
+        assert 'question' not in [name for name, _ in events]
+        assert events[-1] == ('done', {'action': 'END_INTERVIEW', 'redirect': '/end_interview'})
+    
+    def test_failed_stream_leaves_session_unchanged(self, streaming_client):
+        """Test a turn that fails midway is not saved, so the form post fallback starts clean"""
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: Good.\nACTION: CONTINUE"])
+        
+        with patch('services.interview_manager.stream_next_question', side_effect=RuntimeError("quota exceeded")):
+            events = self._events(client.post('/interview_flow/stream', data={'user_answer': 'I build APIs.'}))
+        client.get('/start_interview')
+        with client.session_transaction() as sess:
+            history = sess['interview_history']
+        
+        assert events[-1] == ('error', {'error': 'quota exceeded'})
+        assert history == [{"question": "Tell me about yourself.", "answer": None, "feedback": None}]
+    
+    def test_missing_answer_rejected(self, streaming_client):
+        """Test an empty answer is refused before streaming starts"""
+        client, _ = streaming_client
+        
+        assert client.post('/interview_flow/stream', data={'user_answer': ''}).status_code == 400
+    
+    def test_single_call_turn_streamed(self, streaming_client):
+        """Test single-call mode streams feedback and question from one model reply"""
+        from config import Config
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: Clear and relevant.\nACTION: CONTINUE\nNEXT_QUESTION: What is a hash map?", "unused"])
+        
+        with patch.object(Config, 'SINGLE_CALL_TURNS', True):
+            events = self._events(client.post('/interview_flow/stream', data={'user_answer': 'I build APIs.'}))
+        client.get('/start_interview')
+        with client.session_transaction() as sess:
+            history = sess['interview_history']
+        
+        assert ''.join(data['text'] for name, data in events if name == 'feedback') == "Clear and relevant."
+        assert ''.join(data['text'] for name, data in events if name == 'question') == "What is a hash map?"
+        assert 'reset' not in [name for name, _ in events]
+        assert history[1]['question'] == "What is a hash map?"
+    
+    def test_single_call_parse_failure_restreams(self, streaming_client):
+        """Test an unparsable single-call reply is cleared and the turn is redone in two calls"""
+        from config import Config
+        client, use_model = streaming_client
+        use_model(["FEEDBACK: Fine.\nNEXT_QUESTION: Missing action?",
+                   "FEEDBACK: Clear.\nACTION: CONTINUE", "What is recursion?"])
+        
+        with patch.object(Config, 'SINGLE_CALL_TURNS', True):
+            events = self._events(client.post('/interview_flow/stream', data={'user_answer': 'I build APIs.'}))
+        names = [name for name, _ in events]
+        
+        after_reset = events[names.index('reset') + 1:]
+        assert ''.join(data['text'] for name, data in after_reset if name == 'question') == "What is recursion?"
+        assert events[-1][0] == 'done'
+    
+    def test_partial_action_marker_held_back(self):
+        """Test streamed feedback never shows the start of the ACTION line"""
+        from services.interview_manager import _partial_section
+        
+        assert _partial_section("FEEDBACK: Good answer.\nACT", "FEEDBACK:", "ACTION:") == "Good answer."
+        assert _partial_section("FEEDBACK: Good answer.\nACTION: CONT", "FEEDBACK:", "ACTION:") == "Good answer."
+        assert _partial_section("Thinking", "FEEDBACK:", "ACTION:") == ""
+
+
 class TestProblemsService:
     """Tests for problems service"""
     
@@ -246,11 +1188,11 @@ class TestSessionPersistence:
         
         with patch('services.code_executor.CodeExecutor') as mock_executor_class:
             mock_executor = MagicMock()
-            mock_executor.execute.return_value = {
+            mock_executor.execute_batch.return_value = [{
                 'output': '[0,1]',
                 'error': None,
                 'exit_code': 0
-            }
+            }] * 3
             mock_executor_class.return_value = mock_executor
             
             data = {
@@ -3,7 +3,9 @@ Unit tests for service layer components.
 
 Tests for document processing, ATS analysis, interview management, and LLM chains.
 """
+import json
 import pytest
+import time
 from unittest.mock import Mock, MagicMock, patch
 from langchain.schema import Document
 
@@ -337,6 +339,38 @@ class TestLLMChains:
         chain = llm_chains.get_ats_score_chain()
         
         assert chain is not None
+    
+    def test_chains_are_built_once_per_llm(self):
+        """Test the registry hands out the same runnable until the LLM changes"""
+        from services import llm_chains
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        first_llm = FakeListChatModel(responses=["first"])
+        llm_chains.set_llm_instance(first_llm)
+        chain = llm_chains.get_answer_analysis_chain()
+        
+        assert llm_chains.get_answer_analysis_chain() is chain
+        assert llm_chains.get_ats_score_chain().first is llm_chains.PROMPTS['ats_score']
+        
+        llm_chains.set_llm_instance(FakeListChatModel(responses=["second"]))
+        rebuilt = llm_chains.get_answer_analysis_chain()
+        
+        assert rebuilt is not chain
+        assert rebuilt.invoke({'jd_text': '', 'resume_content': '', 'chat_history_str': '',
+                               'question': 'q', 'answer': 'a'}) == "second"
+    
+    def test_chains_rebuilt_when_llm_replaced_directly(self):
+        """Test assigning llm_chains.llm also invalidates the registry"""
+        from services import llm_chains
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        llm_chains.set_llm_instance(FakeListChatModel(responses=["old"]))
+        old_chain = llm_chains.get_initial_question_chain()
+        with patch('services.llm_chains.llm', FakeListChatModel(responses=["new"])):
+            chain = llm_chains.get_initial_question_chain()
+        
+        assert chain is not old_chain
+        assert chain.invoke({'job_role': 'SWE', 'jd_context': '', 'resume_context': ''}) == "new"
 
 
 class TestConfig:
@@ -359,3 +393,381 @@ class TestConfig:
         assert 'docx' in Config.ALLOWED_EXTENSIONS
         assert 'txt' not in Config.ALLOWED_EXTENSIONS
 
+
+
+class TestLLMResponseCache:
+    """Tests for caching responses of deterministic LLM chains"""
+    
+    @pytest.fixture
+    def counting_llm(self):
+        """A fake model that counts its calls, with a fresh memory cache"""
+        from services import llm_cache, llm_chains
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        previous = llm_chains.llm
+        llm = FakeListChatModel(responses=["Python, SQL", "Java, Go"])
+        llm_chains.set_llm_instance(llm)
+        llm_cache.set_llm_cache(llm_cache.MemoryResponseCache(16))
+        yield llm
+        llm_cache.set_llm_cache(None)
+        llm_chains.set_llm_instance(previous)
+    
+    def test_deterministic_chain_served_from_cache(self, counting_llm):
+        """Test a repeated keyword extraction does not call the model again"""
+        from services import llm_cache, llm_chains
+        
+        chain = llm_chains.get_keyword_extraction_chain()
+        first = chain.invoke({'jd_text': 'Backend engineer'})
+        second = chain.invoke({'jd_text': 'Backend engineer'})
+        other = chain.invoke({'jd_text': 'Different role'})
+        
+        assert first == second == "Python, SQL"
+        assert other == "Java, Go"
+        assert llm_cache.get_llm_cache().stats()['hits'] == 1
+        assert llm_cache.get_llm_cache().stats()['misses'] == 2
+    
+    def test_conversational_chain_not_cached(self, counting_llm):
+        """Test chains outside CACHED_CHAINS always call the model"""
+        from services import llm_cache, llm_chains
+        
+        chain = llm_chains.get_initial_question_chain()
+        inputs = {'job_role': 'SWE', 'jd_context': 'jd', 'resume_context': 'cv'}
+        
+        assert chain.invoke(inputs) != chain.invoke(inputs)
+        assert llm_cache.get_llm_cache().stats()['hits'] == 0
+    
+    def test_key_depends_on_model(self):
+        """Test the same prompt to another model is a different entry"""
+        from services.llm_cache import make_key
+        
+        assert make_key('gemini-1.5-flash', 'prompt') != make_key('gemini-1.5-pro', 'prompt')
+        assert make_key('gemini-1.5-flash', 'prompt') == make_key('gemini-1.5-flash', 'prompt')
+    
+    @pytest.mark.parametrize("backend", ['memory', 'sqlite'])
+    def test_ttl_and_eviction(self, backend, tmp_path):
+        """Test expired and least recently used entries are dropped"""
+        from services.llm_cache import MemoryResponseCache, SqliteResponseCache
+        
+        def new_cache(**kwargs):
+            if backend == 'memory':
+                return MemoryResponseCache(**kwargs)
+            return SqliteResponseCache(str(tmp_path / 'llm.sqlite3'), **kwargs)
+        
+        cache = new_cache(max_entries=2)
+        cache.put('a', 'A')
+        cache.put('b', 'B')
+        cache.get('a')
+        cache.put('c', 'C')
+        assert cache.get('b') is None
+        assert cache.get('a') == 'A'
+        assert cache.stats()['entries'] == 2
+        
+        expiring = new_cache(max_entries=2, ttl=60)
+        expiring.put('k', 'V')
+        with patch('services.llm_cache.time.time', return_value=time.time() + 61):
+            assert expiring.get('k') is None
+    
+    def test_sqlite_cache_persists(self, tmp_path):
+        """Test responses survive a new cache instance on the same file"""
+        from services.llm_cache import SqliteResponseCache
+        
+        SqliteResponseCache(str(tmp_path / 'llm.sqlite3')).put('key', 'Score: 80/100')
+        
+        assert SqliteResponseCache(str(tmp_path / 'llm.sqlite3')).get('key') == 'Score: 80/100'
+    
+    def test_lookups_exported_as_metrics(self, counting_llm):
+        """Test hits and misses are counted per chain"""
+        from services import llm_chains
+        from services.metrics import get_metrics
+        
+        get_metrics().clear()
+        chain = llm_chains.get_keyword_extraction_chain()
+        chain.invoke({'jd_text': 'jd'})
+        chain.invoke({'jd_text': 'jd'})
+        
+        assert get_metrics().get_counter('llm_cache_lookups_total', chain='keyword_extraction', result='hit') == 1
+        assert get_metrics().get_counter('llm_cache_lookups_total', chain='keyword_extraction', result='miss') == 1
+
+
+def _bag_of_words(text):
+    """Deterministic stand-in for the sentence embeddings: word counts in 64 buckets"""
+    import hashlib
+    vector = [0.0] * 64
+    for word in text.lower().split():
+        vector[hashlib.md5(word.encode()).digest()[0] % 64] += 1.0
+    return vector
+
+
+class TestSemanticCache:
+    """Tests for reusing question generation responses across similar prompts"""
+    
+    JD = "Backend engineer building Python APIs with PostgreSQL, Redis and AWS. " * 5
+    
+    @pytest.fixture
+    def question_llm(self):
+        """A fake model and a semantic cache for the foundational question chain"""
+        from services import llm_chains, semantic_cache
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        previous = llm_chains.llm
+        llm = FakeListChatModel(responses=["What is a hash map?", "Explain recursion.", "What is a heap?"])
+        llm_chains.set_llm_instance(llm)
+        cache = semantic_cache.SemanticCache(
+            _bag_of_words, {'foundational_question': semantic_cache.MATCH_VARIABLES['foundational_question']},
+            threshold=0.9
+        )
+        semantic_cache.set_semantic_cache(cache)
+        yield cache
+        semantic_cache.set_semantic_cache(None)
+        llm_chains.set_llm_instance(previous)
+    
+    def _inputs(self, jd, history="", resume="Python developer"):
+        return {'job_role': 'SWE', 'jd_context': jd, 'resume_content': resume, 'chat_history': history}
+    
+    def test_similar_prompt_reuses_response(self, question_llm):
+        """Test a near-identical JD gets the earlier question without a model call"""
+        from services import llm_chains
+        
+        chain = llm_chains.get_foundational_question_chain()
+        first = chain.invoke(self._inputs(self.JD))
+        second = chain.invoke(self._inputs(self.JD + " Remote friendly."))
+        other = chain.invoke(self._inputs("Frontend developer for React dashboards and design systems"))
+        
+        assert first == second == "What is a hash map?"
+        assert other == "Explain recursion."
+        assert question_llm.stats()['hits'] == 1
+        assert question_llm.stats()['hit_rate'] == pytest.approx(1 / 3)
+    
+    def test_question_already_asked_not_reused(self, question_llm):
+        """Test a cached question in the interview history is not asked again"""
+        from services import llm_chains
+        
+        chain = llm_chains.get_foundational_question_chain()
+        first = chain.invoke(self._inputs(self.JD))
+        second = chain.invoke(self._inputs(self.JD, history=f"Q: {first}\nA: A key-value store."))
+        
+        assert second != first
+        assert question_llm.stats()['hits'] == 0
+    
+    def test_same_jd_different_resume_reused(self, question_llm):
+        """Test candidates with different resumes for the same JD share warm-up questions"""
+        from services import llm_chains
+        
+        chain = llm_chains.get_foundational_question_chain()
+        first = chain.invoke(self._inputs(self.JD, resume="Python developer with Django and Celery"))
+        second = chain.invoke(self._inputs(self.JD, resume="Java Spring engineer running Kafka on Kubernetes"))
+        
+        assert second == first
+        assert question_llm.stats()['hits'] == 1
+    
+    def test_chain_matched_on_all_variables(self):
+        """Test a chain without its own variable list matches on every input"""
+        from services.semantic_cache import SemanticCache
+        
+        cache = SemanticCache(_bag_of_words, {'chain': None}, threshold=0.9)
+        cache.store(cache.lookup('chain', 'model', self._inputs(self.JD, resume="Python developer with Django"))[1], "Q1")
+        
+        assert cache.lookup('chain', 'model', self._inputs(self.JD, resume="Java Spring engineer on Kafka"))[0] is None
+        assert cache.lookup('chain', 'model', self._inputs(self.JD, resume="Python developer with Django"))[0] == "Q1"
+    
+    def test_unmatched_inputs_not_embedded(self):
+        """Test the chat history is only searched for asked questions, never embedded"""
+        from services.semantic_cache import SemanticCache
+        
+        embed = Mock(side_effect=_bag_of_words)
+        cache = SemanticCache(embed, {'chain': {'jd_context'}}, threshold=0.9)
+        history = "Q: What is a hash map?\nA: A key-value store."
+        cache.store(cache.lookup('chain', 'model', self._inputs(self.JD))[1], "What is a hash map?")
+        
+        assert cache.lookup('chain', 'model', self._inputs(self.JD, history=history))[0] is None
+        assert [c.args[0] for c in embed.call_args_list] == [self.JD.strip()]
+    
+    def test_chains_configured_from_environment(self, monkeypatch):
+        """Test SEMANTIC_CACHE_CHAINS gives each chain its matched variables"""
+        from services import semantic_cache
+        
+        monkeypatch.setenv('SEMANTIC_CACHE_CHAINS', 'foundational_question, pivot_behavioral:job_role+resume_content')
+        monkeypatch.setattr(semantic_cache, '_cache_configured', False)
+        try:
+            chains = semantic_cache.get_semantic_cache().chains
+        finally:
+            semantic_cache.set_semantic_cache(None)
+        
+        assert chains == {'foundational_question': {'job_role', 'jd_context'},
+                          'pivot_behavioral': {'job_role', 'resume_content'}}
+    
+    def test_long_input_embedded_in_chunks(self):
+        """Test the whole of a long input counts, embedded in chunks the model reads in full"""
+        from services.semantic_cache import CHUNK_WORDS, SemanticCache
+        
+        embed = Mock(side_effect=_bag_of_words)
+        cache = SemanticCache(embed, {'chain'}, threshold=0.9)
+        opening = "Backend engineer building Python APIs. " * 40
+        cache.store(cache.lookup('chain', 'model', {'jd': opening + "Team uses Go and gRPC. " * 40})[1], "Q1")
+        
+        assert cache.lookup('chain', 'model', {'jd': opening + "Frontend work in React and CSS. " * 40})[0] is None
+        assert all(len(c.args[0].split()) <= CHUNK_WORDS for c in embed.call_args_list)
+    
+    def test_variants_rotate(self):
+        """Test hits start once enough variants are collected, then rotate"""
+        from services.semantic_cache import SemanticCache
+        
+        cache = SemanticCache(_bag_of_words, {'chain'}, threshold=0.9, variants=2)
+        for reply in ["Q1", "Q2"]:
+            response, pending = cache.lookup('chain', 'model', {'jd': self.JD})
+            assert response is None
+            cache.store(pending, reply)
+        
+        served = [cache.lookup('chain', 'model', {'jd': self.JD})[0] for _ in range(4)]
+        
+        assert served == ["Q1", "Q2", "Q1", "Q2"]
+        assert cache.stats()['entries'] == 1
+    
+    def test_scope_model_eviction_and_ttl(self):
+        """Test entries are per chain and model, bounded and expire"""
+        from services.semantic_cache import SemanticCache
+        
+        cache = SemanticCache(_bag_of_words, {'chain'}, threshold=0.9, max_entries=1, ttl=60)
+        cache.store(cache.lookup('chain', 'model', {'jd': self.JD})[1], "Q1")
+        
+        assert cache.lookup('other_chain', 'model', {'jd': self.JD})[0] is None
+        assert cache.lookup('chain', 'other_model', {'jd': self.JD})[0] is None
+        assert cache.lookup('chain', 'model', {'jd': self.JD})[0] == "Q1"
+        with patch('services.semantic_cache.time.time', return_value=time.time() + 61):
+            assert cache.lookup('chain', 'model', {'jd': self.JD})[0] is None
+        
+        cache.store(cache.lookup('chain', 'model', {'jd': self.JD})[1], "Q1")
+        cache.store(cache.lookup('chain', 'model', {'jd': "Completely different words here"})[1], "Q2")
+        assert cache.stats()['entries'] == 1
+        assert cache.lookup('chain', 'model', {'jd': self.JD})[0] is None
+    
+    def test_chain_out_of_scope_calls_model(self, question_llm):
+        """Test chains not listed in the cache's scope are not cached"""
+        from services import llm_chains
+        
+        chain = llm_chains.get_jd_resume_specific_chain()
+        inputs = dict(self._inputs(self.JD), retrieved_context="")
+        
+        assert chain.invoke(inputs) != chain.invoke(inputs)
+        assert question_llm.stats()['hits'] + question_llm.stats()['misses'] == 0
+    
+    def test_embedding_failure_calls_model(self, question_llm):
+        """Test the chain still answers when the embeddings model is unavailable"""
+        from services import llm_chains
+        
+        question_llm.embed = Mock(side_effect=OSError("model not downloaded"))
+        
+        assert llm_chains.get_foundational_question_chain().invoke(self._inputs(self.JD)) == "What is a hash map?"
+    
+    def test_hit_rate_exposed(self, client, question_llm):
+        """Test lookups reach /metrics and the hit rate /llm/cache_stats"""
+        from services import llm_chains
+        from services.metrics import get_metrics
+        
+        get_metrics().clear()
+        chain = llm_chains.get_foundational_question_chain()
+        chain.invoke(self._inputs(self.JD))
+        chain.invoke(self._inputs(self.JD))
+        stats = json.loads(client.get('/llm/cache_stats').data)
+        
+        assert stats['semantic_cache']['hit_rate'] == 0.5
+        assert get_metrics().get_counter(
+            'llm_semantic_cache_lookups_total', chain='foundational_question', result='hit'
+        ) == 1
+
+
+class TestSingleCallTurns:
+    """Tests for analyzing the answer and writing the next question in one LLM call"""
+    
+    @pytest.mark.parametrize("reply", [
+        "FEEDBACK: Good use of STAR.\nIt was concise.\nACTION: CONTINUE\nNEXT_QUESTION: What is a hash map?",
+        "**Feedback:** Good use of STAR.\nIt was concise.\n\n**Action:** `CONTINUE`\n\n**Next Question:** What is a hash map?",
+        "FEEDBACK: Good use of STAR.\nIt was concise.\nACTION: [CONTINUE]\nNext question: \"What is a hash map?\"",
+    ])
+    def test_parse_turn_formats(self, reply):
+        """Test the labelled sections are found in the formats models tend to use"""
+        from services.interview_manager import parse_turn
+        
+        assert parse_turn(reply) == ("Good use of STAR.\nIt was concise.", "CONTINUE", "What is a hash map?")
+    
+    @pytest.mark.parametrize("reply", [
+        "FEEDBACK: Good.\nACTION: [CONTINUE|PIVOT_BEHAVIORAL|PIVOT_FOUNDATIONAL|CLARIFY|END_INTERVIEW]\nNEXT_QUESTION: Why?",
+        "FEEDBACK: Good.\nACTION: PROCEED\nNEXT_QUESTION: Why?",
+        "FEEDBACK: Good.\nACTION: CONTINUE\nNEXT_QUESTION: NONE",
+        "FEEDBACK: Good.\nACTION: CONTINUE",
+        "ACTION: CONTINUE\nNEXT_QUESTION: Why?",
+        "What is a hash map?",
+    ])
+    def test_parse_turn_rejects_incomplete(self, reply):
+        """Test missing or ambiguous parts make the reply unusable"""
+        from services.interview_manager import parse_turn
+        
+        assert parse_turn(reply) is None
+    
+    def test_end_interview_needs_no_question(self):
+        """Test END_INTERVIEW parses without a next question"""
+        from services.interview_manager import parse_turn
+        
+        assert parse_turn("FEEDBACK: Dismissive.\nACTION: END_INTERVIEW\nNEXT_QUESTION: NONE") == \
+            ("Dismissive.", "END_INTERVIEW", None)
+    
+    def test_next_stage_after_warmup(self):
+        """Test the stage a CONTINUE leads to, used to pick the question guidance"""
+        from services.interview_manager import next_stage
+        from config import Config
+        
+        last = Config.MAX_FOUNDATIONAL_QUESTIONS - 1
+        assert next_stage('FOUNDATIONAL_WARMUP', last, 'CONTINUE') == ('JD_RESUME_SPECIFIC', 0)
+        assert next_stage('FOUNDATIONAL_WARMUP', last, 'CLARIFY') == ('FOUNDATIONAL_WARMUP', last)
+    
+    @pytest.fixture
+    def interview_client(self, client):
+        """A client mid-interview in single-call mode"""
+        from services import llm_chains
+        from config import Config
+        
+        previous = llm_chains.llm
+        with client.session_transaction() as sess:
+            sess['interview_history'] = [{"question": "Tell me about yourself.", "answer": None, "feedback": None}]
+            sess['current_stage'] = 'FOUNDATIONAL_WARMUP'
+            sess['stage_question_count'] = 0
+        with patch('services.document_processor.get_vector_store', return_value=MagicMock()), \
+                patch.object(Config, 'SINGLE_CALL_TURNS', True):
+            yield client
+        llm_chains.set_llm_instance(previous)
+    
+    def _answer(self, client, responses):
+        from services import llm_chains
+        from langchain_core.language_models.fake_chat_models import FakeListChatModel
+        
+        llm = FakeListChatModel(responses=responses)
+        llm_chains.set_llm_instance(llm)
+        client.post('/interview_flow', data={'user_answer': 'I build APIs.'})
+        with client.session_transaction() as sess:
+            return llm, sess['interview_history']
+    
+    def test_one_model_call_per_turn(self, interview_client):
+        """Test a parsed reply supplies feedback and the next question"""
+        llm, history = self._answer(interview_client, [
+            "FEEDBACK: Clear.\nACTION: CONTINUE\nNEXT_QUESTION: What is a hash map?", "unused"
+        ])
+        
+        assert llm.i == 1
+        assert history[0]['feedback'] == "Clear."
+        assert history[1]['question'] == "What is a hash map?"
+    
+    def test_parse_failure_falls_back_to_two_calls(self, interview_client):
+        """Test an unparsable reply is replaced by the analysis and question chains"""
+        from services.metrics import get_metrics
+        
+        get_metrics().clear()
+        llm, history = self._answer(interview_client, [
+            "Sure! Here is my feedback: good answer.",
+            "FEEDBACK: Clear.\nACTION: CONTINUE",
+            "What is recursion?",
+            "unused"
+        ])
+        
+        assert llm.i == 3
+        assert history[1]['question'] == "What is recursion?"
+        assert get_metrics().get_counter('interview_single_call_turns_total', result='fallback') == 1